@@ -0,0 +1,19 @@
+"""性能测试工具，使用本地模拟服务，不访问真实的腾讯云和公网IP源"""
+import math
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class BenchSettings:
+    """替代 ConfigManager 提供全局设置，不读写配置文件"""
+    global_settings: dict = field(default_factory=dict)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """最近秩法百分位数，values 为空时返回0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
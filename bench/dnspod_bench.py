@@ -0,0 +1,212 @@
+"""DNSUpdater 性能测试
+
+在子进程中启动本地模拟 DNSPod API 服务，生成 N 个账号 × M 个主域名 × K 条记录的配置，
+每轮切换一次公网IP，使每条记录都需要写入，统计每轮耗时、API调用次数、峰值内存和
+单条记录生效延迟(本轮开始到服务端写入该记录的时间)的 p50/p99。
+第 1 轮为创建记录，之后各轮为修改记录。
+
+用法:
+    python -m bench.dnspod_bench --accounts 10 --domains 5 --records 20 --cycles 3
+    python -m bench.dnspod_bench --latency 0.05 --jitter 0.05 --error-rate 0.02 --rate-limit 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+import tracemalloc
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from bench import BenchSettings, percentile
+from bench.mock_dnspod import MockDnspodServer, FaultConfig, STATS_PATH, add_fault_arguments, fault_config
+from core.config_manager import AccountConfig, DomainConfig
+from core.dns_updater import DNSUpdater
+from core.ip_resolver import IPSnapshot
+from core.rate_limiter import RateLimiter
+from core.retry import RetryPolicy
+
+
+@dataclass
+class CycleReport:
+    cycle: int
+    elapsed: float                  # 本轮总耗时(秒)
+    succeeded: int                  # 成功的记录数
+    failed: int                     # 失败的记录数
+    calls: Dict[str, int]           # 服务端收到的各接口调用次数(含被拒绝的)
+    rejected: Dict[str, int]        # 服务端返回错误的次数，按错误码统计
+    latencies: List[float] = field(default_factory=list)    # 各记录生效延迟(秒)
+    peak_memory: Optional[int] = None   # 本轮 Python 内存分配峰值(字节)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+def build_accounts(accounts: int, domains: int, records: int, record_type: str = 'A') -> Dict[str, AccountConfig]:
+    """生成合成配置，每个账号使用独立的 SecretId 和主域名"""
+    return {
+        f'bench{i}': AccountConfig(
+            secret_id=f'AKIDbench{i:04d}',
+            secret_key='bench',
+            domains={
+                f'd{j}.bench{i}.test': [
+                    DomainConfig(subdomain=f'r{k}', record_type=record_type, line='默认')
+                    for k in range(records)
+                ]
+                for j in range(domains)
+            }
+        )
+        for i in range(accounts)
+    }
+
+
+def _serve(queue, faults: FaultConfig):
+    # 模拟服务运行在独立进程中，其内存和CPU占用不计入被测进程
+    server = MockDnspodServer(faults=faults)
+    queue.put(server.endpoint)
+    server.serve_forever()
+
+
+def fetch_stats(endpoint: str) -> dict:
+    with urllib.request.urlopen(endpoint + STATS_PATH, timeout=10) as resp:
+        return json.loads(resp.read().decode('utf-8'))
+
+
+def create_updater(args, endpoint: str) -> DNSUpdater:
+    logger = logging.getLogger('bench')
+    logger.setLevel(logging.WARNING if args.verbose else logging.ERROR)
+    return DNSUpdater(
+        logger=logger,
+        config_manager=BenchSettings(),     # IP由每轮传入，不读取本机配置文件
+        max_workers=args.api_concurrency,
+        account_concurrency=args.account_concurrency,
+        parallel_accounts=args.parallel_accounts,
+        account_timeout=0,
+        rate_limiter=RateLimiter(rate=args.client_rate_limit, burst=args.client_rate_limit, logger=logger),
+        retry_policy=RetryPolicy(),
+        batch_threshold=args.batch_threshold,
+        api_endpoint=endpoint
+    )
+
+
+async def run_cycle(
+        updater: DNSUpdater,
+        accounts: Dict[str, AccountConfig],
+        endpoint: str,
+        cycle: int,
+        measure_memory: bool
+) -> CycleReport:
+    # 每轮使用不同的IP，保证所有记录都需要写入
+    snapshot = IPSnapshot(ipv4=f'198.51.100.{cycle % 254 + 1}', ipv6=f'2001:db8::{cycle + 1:x}')
+    fetch_stats(endpoint)   # 清空上一轮的统计
+    if measure_memory:
+        tracemalloc.clear_traces()
+        tracemalloc.reset_peak()
+
+    started_at = time.time()
+    start = time.perf_counter()
+    reports = await updater.update_all(accounts, snapshot)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if measure_memory else None
+
+    stats = fetch_stats(endpoint)
+    applied = stats['applied']
+    results = [result for report in reports for result in report.results]
+    latencies = [
+        applied[key] - started_at
+        for key in (
+            '|'.join((result.domain, result.subdomain, result.record_type, result.line))
+            for result in results if result.success
+        )
+        if key in applied
+    ]
+    succeeded = sum(1 for result in results if result.success)
+    return CycleReport(
+        cycle=cycle,
+        elapsed=elapsed,
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        calls=stats['calls'],
+        rejected=stats['rejected'],
+        latencies=latencies,
+        peak_memory=peak
+    )
+
+
+def format_reports(reports: List[CycleReport]) -> str:
+    lines = [
+        f'{"轮次":>4} {"耗时(s)":>8} {"成功":>6} {"失败":>5} {"API调用":>8} {"被拒":>6} '
+        f'{"p50(ms)":>8} {"p99(ms)":>8} {"峰值内存(MB)":>12}'
+    ]
+    for r in reports:
+        memory = f'{r.peak_memory / 1024 / 1024:.1f}' if r.peak_memory is not None else '-'
+        lines.append(
+            f'{r.cycle:>4} {r.elapsed:>8.2f} {r.succeeded:>6} {r.failed:>5} {r.total_calls:>8} '
+            f'{sum(r.rejected.values()):>6} {percentile(r.latencies, 50) * 1000:>8.0f} '
+            f'{percentile(r.latencies, 99) * 1000:>8.0f} {memory:>12}'
+        )
+    for r in reports:
+        calls = ', '.join(f'{action}={count}' for action, count in sorted(r.calls.items()))
+        rejected = ', '.join(f'{code}={count}' for code, count in sorted(r.rejected.items()))
+        lines.append(f'第 {r.cycle} 轮调用: {calls}' + (f'；错误: {rejected}' if rejected else ''))
+    return '\n'.join(lines)
+
+
+async def run_bench(args, endpoint: str) -> List[CycleReport]:
+    accounts = build_accounts(args.accounts, args.domains, args.records, args.record_type)
+    updater = create_updater(args, endpoint)
+    reports = []
+    try:
+        for cycle in range(1, args.cycles + 1):
+            reports.append(await run_cycle(updater, accounts, endpoint, cycle, not args.no_memory))
+    finally:
+        await updater.close()
+        updater.shutdown()
+    return reports
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='DNSUpdater 性能测试(本地模拟 DNSPod API)')
+    parser.add_argument('--accounts', type=int, default=4, help='账号数 N')
+    parser.add_argument('--domains', type=int, default=5, help='每个账号的主域名数 M')
+    parser.add_argument('--records', type=int, default=10, help='每个主域名的记录数 K')
+    parser.add_argument('--record-type', default='A', choices=('A', 'AAAA'))
+    parser.add_argument('--cycles', type=int, default=3, help='更新轮数，第1轮为创建记录')
+    parser.add_argument('--api-concurrency', type=int, default=8, help='同 api_concurrency 设置')
+    parser.add_argument('--account-concurrency', type=int, default=4, help='同 account_concurrency 设置')
+    parser.add_argument('--parallel-accounts', type=int, default=4, help='同 parallel_accounts 设置')
+    parser.add_argument('--client-rate-limit', type=float, default=20, help='同 api_rate_limit 设置')
+    parser.add_argument('--batch-threshold', type=int, default=3, help='同 batch_threshold 设置')
+    parser.add_argument('--no-memory', action='store_true', help='不统计内存(tracemalloc 会拖慢运行)')
+    parser.add_argument('--verbose', action='store_true', help='输出更新过程中的警告日志')
+    add_fault_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(message)s')
+
+    queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(queue, fault_config(args)), daemon=True)
+    server.start()
+    try:
+        endpoint = queue.get(timeout=10)
+        print(
+            f'模拟服务 {endpoint}，{args.accounts} 个账号 × {args.domains} 个主域名 × {args.records} 条记录，'
+            f'共 {args.accounts * args.domains * args.records} 条'
+        )
+        if not args.no_memory:
+            tracemalloc.start()
+        reports = asyncio.run(run_bench(args, endpoint))
+        print(format_reports(reports))
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == '__main__':
+    main()
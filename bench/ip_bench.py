@@ -0,0 +1,152 @@
+"""IPResolver 获取IPv4耗时测试
+
+启动一组本地模拟IP源(见 bench.mock_ip_source)并将 ip_sources 指向它们，
+分别以 sequential、race、quorum 策略多次获取IPv4，统计获取耗时分布、
+成功率、得到错误IP的次数和平均每次请求的源数量，用于调整源的选择和超时设置。
+
+用法:
+    python -m bench.ip_bench --iterations 50
+    python -m bench.ip_bench --source fast:delay=0.02 --source dead:hang=1 --source-timeout 2
+    python -m bench.ip_bench --changing-ip --quorum 2 --fanout 3
+"""
+import argparse
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from bench import BenchSettings, percentile
+from bench.mock_ip_source import MockIPSourceGroup, SourceSpec, DEFAULT_SOURCES
+from core import metrics
+from core.ip_resolver import IPResolver
+
+STRATEGIES = ('sequential', 'race', 'quorum')
+
+
+@dataclass
+class StrategyReport:
+    strategy: str
+    durations: List[float] = field(default_factory=list)    # 每次获取的耗时(秒)
+    succeeded: int = 0      # 得到当前模拟IP的次数
+    wrong: int = 0          # 得到其他IP的次数
+    failed: int = 0         # 未得到IP的次数
+    requests: int = 0       # 各源收到的请求总数
+    source_hits: Dict[str, int] = field(default_factory=dict)
+    source_failures: Dict[str, int] = field(default_factory=dict)  # 客户端判定为失败的次数
+
+
+def build_settings(args, urls: List[str], strategy: str) -> dict:
+    return {
+        'ip_sources': urls,
+        'ip_resolve_strategy': strategy,
+        'ip_race_fanout': args.fanout,
+        'ip_quorum': args.quorum,
+        'ip_source_timeout': args.source_timeout,
+        'ip_resolve_budget': args.budget,
+        'ip_cache_ttl': 0,
+    }
+
+
+def next_ip(iteration: int) -> str:
+    return f'198.51.100.{iteration % 254 + 1}'
+
+
+async def run_strategy(args, group: MockIPSourceGroup, strategy: str) -> StrategyReport:
+    logger = logging.getLogger('bench')
+    resolver = IPResolver(logger=logger, config=BenchSettings(build_settings(args, group.urls, strategy)))
+    report = StrategyReport(strategy)
+    failures_before = {
+        source.spec.name: metrics.IP_SOURCE_FAILURES.value(source=source.url) for source in group.sources
+    }
+    group.ip = next_ip(0)
+    group.reset_stats()
+    try:
+        for iteration in range(args.iterations):
+            if args.changing_ip:
+                # 每次都是新IP，quorum 策略需要多个源一致
+                group.ip = next_ip(iteration)
+            start = time.perf_counter()
+            ip: Optional[str] = await resolver.get_ipv4()
+            report.durations.append(time.perf_counter() - start)
+            if ip is None:
+                report.failed += 1
+            elif ip == group.ip:
+                report.succeeded += 1
+            else:
+                report.wrong += 1
+    finally:
+        await resolver.close()
+
+    for source in group.sources:
+        report.source_hits[source.spec.name] = source.hits
+        report.source_failures[source.spec.name] = int(
+            metrics.IP_SOURCE_FAILURES.value(source=source.url) - failures_before[source.spec.name]
+        )
+    report.requests = sum(report.source_hits.values())
+    return report
+
+
+def format_reports(reports: List[StrategyReport], iterations: int) -> str:
+    lines = [
+        f'{"策略":<10} {"成功":>5} {"错误IP":>6} {"失败":>5} {"p50(ms)":>8} {"p90(ms)":>8} '
+        f'{"p99(ms)":>8} {"最大(ms)":>9} {"请求/次":>8}'
+    ]
+    for r in reports:
+        lines.append(
+            f'{r.strategy:<10} {r.succeeded:>5} {r.wrong:>6} {r.failed:>5} '
+            f'{percentile(r.durations, 50) * 1000:>8.0f} {percentile(r.durations, 90) * 1000:>8.0f} '
+            f'{percentile(r.durations, 99) * 1000:>8.0f} {max(r.durations, default=0) * 1000:>9.0f} '
+            f'{r.requests / max(1, iterations):>8.2f}'
+        )
+    lines.append('各源请求数/客户端判定失败数(refuse 类型的源不接受连接，请求数为0):')
+    for r in reports:
+        sources = ', '.join(
+            f'{name}={hits}/{r.source_failures.get(name, 0)}' for name, hits in r.source_hits.items()
+        )
+        lines.append(f'  {r.strategy:<10} {sources}')
+    return '\n'.join(lines)
+
+
+async def run_bench(args, group: MockIPSourceGroup) -> List[StrategyReport]:
+    return [await run_strategy(args, group, strategy) for strategy in args.strategies]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='IPResolver 获取IPv4耗时测试(本地模拟IP源)')
+    parser.add_argument(
+        '--source', action='append', dest='sources',
+        help='模拟源描述，可重复，如 fast:delay=0.02 或 dead:hang=1；不指定时使用默认组合'
+    )
+    parser.add_argument('--strategy', action='append', dest='strategies', choices=STRATEGIES,
+                        help='要测试的策略，可重复；不指定时测试全部')
+    parser.add_argument('--iterations', type=int, default=30, help='每种策略获取IPv4的次数')
+    parser.add_argument('--changing-ip', action='store_true', help='每次获取前更换模拟IP')
+    parser.add_argument('--fanout', type=int, default=3, help='同 ip_race_fanout 设置')
+    parser.add_argument('--quorum', type=int, default=2, help='同 ip_quorum 设置')
+    parser.add_argument('--source-timeout', type=float, default=5, help='同 ip_source_timeout 设置')
+    parser.add_argument('--budget', type=float, default=15, help='同 ip_resolve_budget 设置')
+    parser.add_argument('--verbose', action='store_true', help='输出各源失败的警告日志')
+    args = parser.parse_args(argv)
+    args.sources = args.sources or DEFAULT_SOURCES
+    args.strategies = args.strategies or list(STRATEGIES)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(message)s')
+    logging.getLogger('bench').setLevel(logging.WARNING if args.verbose else logging.ERROR)
+
+    group = MockIPSourceGroup([SourceSpec.parse(text) for text in args.sources]).start()
+    try:
+        for source in group.sources:
+            print(f'{source.spec.name:<8} {source.url}  {source.spec}')
+        reports = asyncio.run(run_bench(args, group))
+        print(format_reports(reports, args.iterations))
+    finally:
+        group.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+"""本地模拟的 DNSPod API 服务(2021-03-23 版本)
+
+实现 DescribeRecordList、CreateRecord、ModifyRecord、DeleteRecord 以及
+ModifyRecordBatch、DescribeBatchTask，请求和响应格式与腾讯云 API 3.0 一致，
+不校验签名。可注入响应延迟、随机错误和按 SecretId 的频率限制。
+
+单独运行:
+    python -m bench.mock_dnspod --port 8080 --latency 0.05 --error-rate 0.01 --rate-limit 20
+然后将全局设置 api_endpoint 设为 http://127.0.0.1:8080。
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# 统计接口路径，GET 返回本次统计并清零
+STATS_PATH = '/__stats'
+# 从 Authorization 头中提取 SecretId
+CREDENTIAL_PATTERN = re.compile(r'Credential=([^/,\s]+)')
+# 未设置 Limit 时 DescribeRecordList 默认返回条数
+DEFAULT_LIST_LIMIT = 100
+
+
+@dataclass
+class FaultConfig:
+    latency: float = 0.0        # 每个请求的基础延迟(秒)
+    jitter: float = 0.0         # 在基础延迟上增加 [0, jitter) 的随机延迟(秒)
+    error_rate: float = 0.0     # 返回 InternalError 的概率
+    rate_limit: float = 0.0     # 每个 SecretId 每秒允许的请求数，0表示不限制
+
+
+class ApiError(Exception):
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class MockZoneStore:
+    """全部主域名的记录，以及写入时间和调用统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._zones: Dict[str, List[dict]] = {}
+        self._record_ids = itertools.count(1000)
+        self._job_ids = itertools.count(1)
+        self._jobs: Dict[int, list] = {}
+        # 统计信息，由 stats() 读取后清零
+        self._calls: Dict[str, int] = {}
+        self._rejected: Dict[str, int] = {}
+        # {"主域名|主机记录|类型|线路": 最近一次写入的时间(time.time)}
+        self._applied: Dict[str, float] = {}
+
+    def count_call(self, action: str, rejected: Optional[str] = None):
+        with self._lock:
+            self._calls[action] = self._calls.get(action, 0) + 1
+            if rejected:
+                self._rejected[rejected] = self._rejected.get(rejected, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = {'calls': self._calls, 'rejected': self._rejected, 'applied': self._applied}
+            self._calls, self._rejected, self._applied = {}, {}, {}
+        return data
+
+    def _mark_applied(self, domain: str, record: dict):
+        key = '|'.join((domain, record['Name'], record['Type'], record['Line']))
+        self._applied[key] = time.time()
+
+    def _find(self, domain: str, record_id) -> dict:
+        for record in self._zones.get(domain, []):
+            if record['RecordId'] == record_id:
+                return record
+        raise ApiError('InvalidParameter.RecordIdInvalid', '记录编号错误。')
+
+    def describe_record_list(self, params: dict) -> dict:
+        domain = params['Domain']
+        with self._lock:
+            records = [
+                r for r in self._zones.get(domain, [])
+                if params.get('Subdomain') in (None, r['Name'])
+                and params.get('RecordType') in (None, r['Type'])
+                and params.get('RecordLine') in (None, r['Line'])
+            ]
+            if not records:
+                raise ApiError('ResourceNotFound.NoDataOfRecord', '记录列表为空。')
+            offset = params.get('Offset', 0)
+            page = [dict(r) for r in records[offset:offset + params.get('Limit', DEFAULT_LIST_LIMIT)]]
+        return {
+            'RecordCountInfo': {
+                'SubdomainCount': len(records),
+                'ListCount': len(page),
+                'TotalCount': len(records)
+            },
+            'RecordList': page
+        }
+
+    def create_record(self, params: dict) -> dict:
+        domain = params['Domain']
+        record = {
+            'RecordId': next(self._record_ids),
+            'Name': params.get('SubDomain', '@'),
+            'Type': params['RecordType'],
+            'Line': params['RecordLine'],
+            'LineId': '0',
+            'Value': params['Value'],
+            'TTL': params.get('TTL', 600),
+            'Status': 'ENABLE',
+            'Weight': None,
+            'MX': 0,
+            'MonitorStatus': '',
+            'Remark': '',
+            'DefaultNS': False,
+            'UpdatedOn': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with self._lock:
+            zone = self._zones.setdefault(domain, [])
+            for r in zone:
+                if all(r[k] == record[k] for k in ('Name', 'Type', 'Line', 'Value')):
+                    raise ApiError('InvalidParameter.DomainRecordExist', '记录已经存在，无需再次添加。')
+            zone.append(record)
+            self._mark_applied(domain, record)
+        return {'RecordId': record['RecordId']}
+
+    def modify_record(self, params: dict) -> dict:
+        domain = params['Domain']
+        with self._lock:
+            record = self._find(domain, params['RecordId'])
+            record.update(
+                Name=params.get('SubDomain', record['Name']),
+                Type=params['RecordType'],
+                Line=params['RecordLine'],
+                Value=params['Value'],
+                UpdatedOn=time.strftime('%Y-%m-%d %H:%M:%S')
+            )
+            self._mark_applied(domain, record)
+        return {'RecordId': record['RecordId']}
+
+    def delete_record(self, params: dict) -> dict:
+        domain = params['Domain']
+        with self._lock:
+            record = self._find(domain, params['RecordId'])
+            self._zones[domain].remove(record)
+        return {}
+
+    def modify_record_batch(self, params: dict) -> dict:
+        if params.get('Change') != 'value':
+            raise ApiError('InvalidParameter', '模拟服务只支持修改记录值。')
+        value = params['ChangeTo']
+        ids = set(params.get('RecordIdList', []))
+        # 批量任务立即完成，按主域名汇总执行结果
+        details = []
+        with self._lock:
+            for domain, zone in self._zones.items():
+                records = []
+                for record in zone:
+                    if record['RecordId'] not in ids:
+                        continue
+                    record['Value'] = value
+                    self._mark_applied(domain, record)
+                    records.append({
+                        'RecordId': record['RecordId'],
+                        'SubDomain': record['Name'],
+                        'RecordType': record['Type'],
+                        'RecordLine': record['Line'],
+                        'Value': value,
+                        'Status': 'success'
+                    })
+                if records:
+                    details.append({'Domain': domain, 'Status': 'success', 'RecordList': records})
+            job_id = next(self._job_ids)
+            self._jobs[job_id] = details
+        return {'JobId': job_id}
+
+    def describe_batch_task(self, params: dict) -> dict:
+        with self._lock:
+            details = self._jobs.get(params['JobId'])
+        if details is None:
+            raise ApiError('InvalidParameter.JobNotExist', '任务不存在。')
+        count = sum(len(d['RecordList']) for d in details)
+        return {
+            'DetailList': details,
+            'TotalCount': count,
+            'SuccessCount': count,
+            'FailCount': 0,
+            'JobType': 'modify_record',
+            'CreatedAt': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+
+class _CredentialThrottle:
+    """服务端按 SecretId 计数的令牌桶，超出时返回 RequestLimitExceeded"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def allow(self, key: str) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        return allowed
+
+
+class MockDnspodServer:
+    """在后台线程中运行的模拟服务"""
+
+    ACTIONS = {
+        'DescribeRecordList': MockZoneStore.describe_record_list,
+        'CreateRecord': MockZoneStore.create_record,
+        'ModifyRecord': MockZoneStore.modify_record,
+        'DeleteRecord': MockZoneStore.delete_record,
+        'ModifyRecordBatch': MockZoneStore.modify_record_batch,
+        'DescribeBatchTask': MockZoneStore.describe_batch_task,
+    }
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, faults: Optional[FaultConfig] = None):
+        self.faults = faults or FaultConfig()
+        self.store = MockZoneStore()
+        self._throttle = _CredentialThrottle(self.faults.rate_limit)
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockDnspodServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-dnspod', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def handle(self, action: str, secret_id: str, params: dict) -> dict:
+        """处理一次API调用，返回 Response 字段内容"""
+        faults = self.faults
+        if faults.latency or faults.jitter:
+            time.sleep(faults.latency + random.uniform(0, faults.jitter))
+        try:
+            if not self._throttle.allow(secret_id):
+                raise ApiError('RequestLimitExceeded', '请求的次数超过了频率限制。')
+            if faults.error_rate and random.random() < faults.error_rate:
+                raise ApiError('InternalError', '模拟的内部错误。')
+            handler = self.ACTIONS.get(action)
+            if handler is None:
+                raise ApiError('InvalidAction', f'接口不存在: {action}')
+            response = handler(self.store, params)
+        except ApiError as e:
+            self.store.count_call(action, e.code)
+            response = {'Error': {'Code': e.code, 'Message': e.message}}
+        else:
+            self.store.count_call(action)
+        response['RequestId'] = str(uuid.uuid4())
+        return response
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    params = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    params = {}
+                match = CREDENTIAL_PATTERN.search(self.headers.get('Authorization', ''))
+                response = server.handle(
+                    self.headers.get('X-TC-Action', ''),
+                    match.group(1) if match else '',
+                    params
+                )
+                self._send_json({'Response': response})
+
+            def do_GET(self):
+                if self.path == STATS_PATH:
+                    self._send_json(server.store.stats())
+                else:
+                    self.send_error(404)
+
+            def _send_json(self, data: dict):
+                body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 压测时请求量大，不输出访问日志
+                pass
+
+        return Handler
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='本地模拟 DNSPod API 服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    add_fault_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的基础延迟(秒)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='随机附加延迟上限(秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 InternalError 的概率')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='每个 SecretId 每秒允许的请求数，0表示不限制')
+
+
+def fault_config(args) -> FaultConfig:
+    return FaultConfig(args.latency, args.jitter, args.error_rate, args.rate_limit)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = MockDnspodServer(args.host, args.port, fault_config(args))
+    print(f'模拟 DNSPod API 服务: {server.endpoint}  故障配置: {asdict(server.faults)}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""本地模拟的公网IP查询源
+
+每个源是一个独立的 HTTP 服务(独立端口)，可配置响应延迟、失败率、响应内容，
+以及接受连接后不响应(hang)或拒绝连接(refuse)，用于测试 IPResolver 在慢源、
+死源和返回垃圾内容的源下的表现。
+
+源的描述格式为 "名称:参数=值,参数=值"，例如:
+    fast:delay=0.02
+    slow:delay=1.5,jitter=0.5
+    flaky:delay=0.1,fail=0.3
+    junk:body=<html>busy</html>
+    liar:body=203.0.113.99
+    dead:hang=1
+    gone:refuse=1
+body 中的 {ip} 会替换为当前模拟的公网IP，body 不能包含逗号。
+"""
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+# hang 模式下最长保持连接的时间(秒)，服务停止时立即结束
+HANG_SECONDS = 300
+
+
+@dataclass
+class SourceSpec:
+    name: str
+    delay: float = 0.0          # 响应延迟(秒)
+    jitter: float = 0.0         # 在延迟上增加 [0, jitter) 的随机延迟(秒)
+    failure_rate: float = 0.0   # 返回 HTTP 500 的概率
+    body: str = '{ip}'          # 响应内容，{ip} 替换为模拟的公网IP
+    hang: bool = False          # 接受连接但不响应，直到客户端超时
+    refuse: bool = False        # 不监听端口，连接被拒绝
+
+    # 描述字符串中的参数名与字段的对应关系
+    ALIASES = {'fail': 'failure_rate'}
+
+    @classmethod
+    def parse(cls, text: str) -> 'SourceSpec':
+        name, _, options = text.partition(':')
+        spec = cls(name=name.strip() or 'source')
+        for option in filter(None, options.split(',')):
+            key, _, value = option.partition('=')
+            key = cls.ALIASES.get(key.strip(), key.strip())
+            if key == 'body':
+                spec.body = value
+            elif key in ('hang', 'refuse'):
+                setattr(spec, key, value.strip().lower() not in ('0', 'false', 'no', ''))
+            elif key in ('delay', 'jitter', 'failure_rate'):
+                setattr(spec, key, float(value))
+            else:
+                raise ValueError(f'未知的源参数: {key}')
+        return spec
+
+
+# 默认源组合：快、慢、不稳定、返回垃圾内容、无响应、拒绝连接各一个
+DEFAULT_SOURCES = [
+    'fast:delay=0.02,jitter=0.02',
+    'medium:delay=0.2,jitter=0.1',
+    'slow:delay=1.5,jitter=0.5',
+    'flaky:delay=0.1,fail=0.3',
+    'junk:delay=0.05,body=<html>service busy</html>',
+    'dead:hang=1',
+    'gone:refuse=1',
+]
+
+
+class MockIPSource:
+    """单个模拟源，统计收到的请求数和注入的失败数"""
+
+    def __init__(self, spec: SourceSpec, group: 'MockIPSourceGroup', host: str = '127.0.0.1'):
+        self.spec = spec
+        self.hits = 0
+        self.failures = 0
+        self._group = group
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        if spec.refuse:
+            # 占用后立即释放一个端口，连接该端口会被拒绝
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.bind((host, 0))
+                self.url = f'http://{host}:{sock.getsockname()[1]}/'
+        else:
+            self._httpd = ThreadingHTTPServer((host, 0), self._make_handler())
+            self._httpd.daemon_threads = True
+            self._httpd.block_on_close = False
+            self.url = f'http://{host}:{self._httpd.server_address[1]}/'
+
+    def start(self):
+        if self._httpd:
+            threading.Thread(target=self._httpd.serve_forever, name=f'ip-source-{self.spec.name}', daemon=True).start()
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.failures = 0
+
+    def respond(self) -> Optional[tuple]:
+        """生成一次响应 (状态码, 内容)，hang 模式返回 None"""
+        spec = self.spec
+        with self._lock:
+            self.hits += 1
+        if spec.hang:
+            self._group.stopped.wait(HANG_SECONDS)
+            return None
+        if spec.delay or spec.jitter:
+            time.sleep(spec.delay + random.uniform(0, spec.jitter))
+        if spec.failure_rate and random.random() < spec.failure_rate:
+            with self._lock:
+                self.failures += 1
+            return 500, 'internal error'
+        return 200, spec.body.replace('{ip}', self._group.ip)
+
+    def _make_handler(self):
+        source = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                response = source.respond()
+                if response is None:
+                    # 不响应，直接断开
+                    self.close_connection = True
+                    return
+                status, text = response
+                body = text.encode('utf-8')
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except ConnectionError:
+                    # 竞速中落后的请求会被客户端取消并断开连接
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class MockIPSourceGroup:
+    """一组模拟源，共享当前模拟的公网IP"""
+
+    def __init__(self, specs: List[SourceSpec], ip: str = '198.51.100.1'):
+        self.ip = ip
+        self.stopped = threading.Event()
+        self.sources = [MockIPSource(spec, self) for spec in specs]
+
+    @property
+    def urls(self) -> List[str]:
+        return [source.url for source in self.sources]
+
+    def start(self) -> 'MockIPSourceGroup':
+        for source in self.sources:
+            source.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        for source in self.sources:
+            source.stop()
+
+    def reset_stats(self):
+        for source in self.sources:
+            source.reset_stats()
@@ -1,7 +1,9 @@
+import copy
+import hashlib
 import logging
 import os
-from dataclasses import dataclass
-from typing import List, Dict, Optional
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple
 import json
 from utils.encryption import EncryptionHandler
 
@@ -12,6 +14,7 @@ class DomainConfig:
     record_type: str  # 'A' or 'AAAA'
     line: str
     enabled: bool = True
+    update_interval: int = 0    # 更新间隔(分钟)，0表示使用账号的间隔
 
 
 @dataclass
@@ -19,64 +22,181 @@ class AccountConfig:
     secret_id: str
     secret_key: str
     domains: Dict[str, List[DomainConfig]]
-    update_interval: int = 300
+    update_interval: int = 0    # 更新间隔(分钟)，0表示使用全局设置 update_interval
+
+
+@dataclass
+class ConfigChange:
+    """配置文件重新加载前后的差异"""
+    added: List[str] = field(default_factory=list)      # 新增的账号
+    removed: List[str] = field(default_factory=list)    # 删除的账号
+    changed: List[str] = field(default_factory=list)    # 凭据或记录有变化的账号
+    settings: List[str] = field(default_factory=list)   # 有变化的全局设置项
+
+    @property
+    def affected_accounts(self) -> List[str]:
+        """需要立即重新核对的账号"""
+        return self.added + self.changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.settings)
 
 
 class ConfigManager:
-    def __init__(self):
+    def __init__(self, filename: str = 'config.enc'):
+        self.filename = filename
         self.accounts = {}
+        # 最近一次加载/保存的文件 (mtime, 大小) 和内容摘要，用于检测外部修改
+        self._file_signature: Optional[Tuple[int, int]] = None
+        self._file_digest: Optional[str] = None
         self.global_settings = {
             'startup_enabled': False,
-            'update_interval': 5,
+            'update_interval': 5,       # 默认更新间隔(分钟)，账号或记录可单独设置
+            'failure_retry_interval': 60,  # 记录更新失败后重试的间隔(秒)，不超过该记录的更新间隔
+            'api_concurrency': 8,       # 全局同时进行的API调用数
+            'account_concurrency': 4,   # 单个账号同时进行的API调用数
+            'api_rate_limit': 20,       # 单个SecretId每秒API调用数，0表示不限制
+            'api_rate_burst': 20,       # 令牌桶容量(允许的瞬时突发调用数)
+            'api_throttle_retries': 3,  # 触发频率限制后重新排队的次数
+            'api_retry_attempts': 3,    # 临时错误(网络、服务内部错误)的重试次数
+            'api_retry_base_delay': 0.5,  # 首次重试退避上限(秒)，之后指数增长
+            'api_retry_max_delay': 8,   # 单次重试退避上限(秒)
+            'api_retry_budget': 30,     # 每轮用于重试等待的总时间(秒)
+            'batch_threshold': 3,       # 同一主域名下需改为同一IP的记录数达到该值时批量修改，0表示不使用
+            'batch_task_timeout': 30,   # 等待批量任务完成的超时时间(秒)
+            'api_endpoint': '',         # DNSPod API地址，为空时使用默认地址；可指向本地模拟服务做压测
+            'parallel_accounts': 4,     # 同时更新的账号数
+            'account_timeout': 120,     # 单个账号一轮更新的超时时间(秒)，0表示不限制
+            'ip_cache_ttl': 30,         # 公网IP缓存有效期(秒)
+            'ip_resolve_strategy': 'race',  # IPv4获取方式: sequential 逐个尝试 / race 并发竞速 / quorum 多源一致
+            'ip_race_fanout': 3,        # 同时请求的源数量
+            'ip_quorum': 2,             # quorum 模式下新IP需一致的源数量
+            'ip_source_timeout': 5,     # 单个源超时(秒)
+            'ip_resolve_budget': 15,    # 单次获取IPv4的总时间预算(秒)
+            'network_watch': True,      # 网络地址变化时立即更新
+            'network_poll_interval': 5,  # 网卡地址轮询间隔(秒)
+            'network_debounce': 3,      # 地址变化后等待稳定的时间(秒)
+            'metrics_host': '127.0.0.1',
+            'metrics_port': 0,          # 服务指标HTTP端点端口，0表示不启用
+            'config_poll_interval': 5,  # 服务检查配置文件变化的间隔(秒)，0表示不检查
+            'full_reconcile_interval': 60,  # IP未变化时强制与云端核对的间隔(分钟)，0表示每次都核对
             'ip_sources': [
                 'http://www.3322.org/dyndns/getip',
                 'https://ifconfig.me/ip',
                 'https://api.ip.sb/ip'
             ]
         }
+        # 默认设置，重新加载时配置文件中删除的设置项恢复为默认值
+        self._default_settings = copy.deepcopy(self.global_settings)
         self.encryption = EncryptionHandler()
         # 初始化时立即加载配置
         self.load_config()
 
-    def load_config(self, filename='config.enc'):
+    def load_config(self, filename: Optional[str] = None):
         """加载配置文件"""
+        filename = filename or self.filename
         try:
             if os.path.exists(filename):
+                signature = self._stat_signature(filename)
                 with open(filename, 'r') as f:
                     encrypted_data = f.read()
-                    data = json.loads(self.encryption.decrypt(encrypted_data))
-
-                    # 加载全局设置
-                    self.global_settings.update(data.get('settings', {}))
-
-                    # 加载账号信息
-                    accounts_data = data.get('accounts', {})
-                    for name, acc_data in accounts_data.items():
-                        account = AccountConfig(
-                            secret_id=acc_data['secret_id'],
-                            secret_key=acc_data['secret_key'],
-                            domains={}
-                        )
-
-                        # 加载域名配置
-                        for domain, configs in acc_data.get('domains', {}).items():
-                            account.domains[domain] = []
-                            for config in configs:
-                                domain_config = DomainConfig(
-                                    subdomain=config['subdomain'],
-                                    record_type=config['record_type'],
-                                    line=config['line'],
-                                    enabled=config.get('enabled', True)
-                                )
-                                account.domains[domain].append(domain_config)
-
-                        self.accounts[name] = account
+                data = json.loads(self.encryption.decrypt(encrypted_data))
+
+                # 加载全局设置
+                self.global_settings.update(data.get('settings', {}))
+
+                # 加载账号信息
+                self.accounts.update(self._parse_accounts(data))
+                self._remember_file(signature, encrypted_data)
 
         except Exception as e:
             logging.error(f"加载配置失败: {str(e)}")
 
-    def save_config(self, filename='config.enc'):
+    @staticmethod
+    def _parse_accounts(data: dict) -> Dict[str, AccountConfig]:
+        accounts = {}
+        accounts_data = data.get('accounts', {})
+        for name, acc_data in accounts_data.items():
+            account = AccountConfig(
+                secret_id=acc_data['secret_id'],
+                secret_key=acc_data['secret_key'],
+                domains={},
+                update_interval=acc_data.get('update_interval', 0)
+            )
+
+            # 加载域名配置
+            for domain, configs in acc_data.get('domains', {}).items():
+                account.domains[domain] = []
+                for config in configs:
+                    domain_config = DomainConfig(
+                        subdomain=config['subdomain'],
+                        record_type=config['record_type'],
+                        line=config['line'],
+                        enabled=config.get('enabled', True),
+                        update_interval=config.get('update_interval', 0)
+                    )
+                    account.domains[domain].append(domain_config)
+
+            accounts[name] = account
+        return accounts
+
+    @staticmethod
+    def _stat_signature(filename: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _remember_file(self, signature: Optional[Tuple[int, int]], content: str):
+        self._file_signature = signature
+        self._file_digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def reload_if_changed(self) -> Optional[ConfigChange]:
+        """配置文件被其他进程修改时重新加载，返回差异；未变化或加载失败时返回None
+
+        先比较 mtime 和大小，变化后再比较内容摘要，避免仅修改时间变化时重复解密。
+        账号和设置在原对象上就地更新，持有本对象的组件无需重建。
+        """
+        signature = self._stat_signature(self.filename)
+        if signature is None or signature == self._file_signature:
+            return None
+        try:
+            with open(self.filename, 'r') as f:
+                encrypted_data = f.read()
+            if hashlib.sha256(encrypted_data.encode('utf-8')).hexdigest() == self._file_digest:
+                self._file_signature = signature
+                return None
+            data = json.loads(self.encryption.decrypt(encrypted_data))
+            accounts = self._parse_accounts(data)
+        except Exception as e:
+            # 文件可能正在写入，保留旧配置，下次检查时重试
+            logging.warning(f"重新加载配置失败: {str(e)}")
+            return None
+        self._remember_file(signature, encrypted_data)
+
+        change = ConfigChange()
+        for name, account in accounts.items():
+            if name not in self.accounts:
+                change.added.append(name)
+            elif account != self.accounts[name]:
+                change.changed.append(name)
+        change.removed = [name for name in self.accounts if name not in accounts]
+        settings = copy.deepcopy(self._default_settings)
+        settings.update(data.get('settings', {}))
+        change.settings = [key for key, value in settings.items() if self.global_settings.get(key) != value]
+        # 既不在文件中也没有默认值的设置项直接删除
+        change.settings += [key for key in self.global_settings if key not in settings]
+
+        self.global_settings.clear()
+        self.global_settings.update(settings)
+        self.accounts.clear()
+        self.accounts.update(accounts)
+        return change
+
+    def save_config(self, filename: Optional[str] = None):
         """保存配置到文件"""
+        filename = filename or self.filename
         try:
             data = {
                 'settings': self.global_settings,
@@ -88,6 +208,7 @@ class ConfigManager:
                 acc_data = {
                     'secret_id': account.secret_id,
                     'secret_key': account.secret_key,
+                    'update_interval': account.update_interval,
                     'domains': {}
                 }
 
@@ -98,23 +219,35 @@ class ConfigManager:
                             'subdomain': config.subdomain,
                             'record_type': config.record_type,
                             'line': config.line,
-                            'enabled': config.enabled
+                            'enabled': config.enabled,
+                            'update_interval': config.update_interval
                         } for config in configs
                     ]
 
                 data['accounts'][name] = acc_data
 
-            # 加密并保存
+            # 加密后先写临时文件再替换，服务进程不会读到写了一半的配置
             encrypted_data = self.encryption.encrypt(json.dumps(data))
-            with open(filename, 'w') as f:
+            tmp_file = f'{filename}.tmp'
+            with open(tmp_file, 'w') as f:
                 f.write(encrypted_data)
+            os.replace(tmp_file, filename)
+            if os.path.abspath(filename) == os.path.abspath(self.filename):
+                self._remember_file(self._stat_signature(filename), encrypted_data)
 
             return True
         except Exception as e:
             logging.error(f"保存配置失败: {str(e)}")
             return False
 
-    def add_account(self, name: str, secret_id: str, secret_key: str, domains: list) -> bool:
+    def add_account(
+            self,
+            name: str,
+            secret_id: str,
+            secret_key: str,
+            domains: list,
+            update_interval: int = 0
+    ) -> bool:
         """添加新账号"""
         if name in self.accounts:
             return False
@@ -122,7 +255,8 @@ class ConfigManager:
         account = AccountConfig(
             secret_id=secret_id,
             secret_key=secret_key,
-            domains={}
+            domains={},
+            update_interval=update_interval
         )
 
         # 处理域名配置
@@ -136,14 +270,22 @@ class ConfigManager:
                     subdomain=domain_config['subdomain'],
                     record_type=domain_config['type'],
                     line=domain_config['line'],
-                    enabled=True
+                    enabled=True,
+                    update_interval=domain_config.get('update_interval', 0)
                 )
             )
 
         self.accounts[name] = account
         return True
 
-    def update_account(self, name: str, secret_id: str, secret_key: str, domains: list) -> bool:
+    def update_account(
+            self,
+            name: str,
+            secret_id: str,
+            secret_key: str,
+            domains: list,
+            update_interval: int = 0
+    ) -> bool:
         """更新账号配置"""
         if name not in self.accounts:
             return False
@@ -151,7 +293,8 @@ class ConfigManager:
         account = AccountConfig(
             secret_id=secret_id,
             secret_key=secret_key,
-            domains={}
+            domains={},
+            update_interval=update_interval
         )
 
         # 处理域名配置
@@ -165,7 +308,8 @@ class ConfigManager:
                     subdomain=domain_config['subdomain'],
                     record_type=domain_config['type'],
                     line=domain_config['line'],
-                    enabled=domain_config['enabled']
+                    enabled=domain_config['enabled'],
+                    update_interval=domain_config.get('update_interval', 0)
                 )
             )
 
@@ -1,12 +1,39 @@
-from typing import Optional, List, Dict
+import asyncio
+import contextvars
+import ipaddress
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, List, Dict, Set, Tuple
 from tencentcloud.common import credential
+from tencentcloud.common.profile.client_profile import ClientProfile
+from tencentcloud.common.profile.http_profile import HttpProfile
 from tencentcloud.dnspod.v20210323 import dnspod_client, models
 import logging
 from dataclasses import dataclass
-from core.config_manager import AccountConfig, DomainConfig
-from core.ip_resolver import IPResolver
+from core.config_manager import AccountConfig, DomainConfig, ConfigManager
+from core.ip_resolver import IPResolver, IPSnapshot
+from core.state_store import RecordStateStore
+from core.rate_limiter import RateLimiter, PRIORITY_READ, PRIORITY_WRITE
+from core.retry import RetryPolicy, classify_error, THROTTLED, RETRYABLE
+from core import metrics
 import ujson as json
 
+# DescribeRecordList 单页最大条数
+RECORD_LIST_PAGE_SIZE = 3000
+# 单次 ModifyRecordBatch 提交的记录数
+RECORD_BATCH_SIZE = 100
+# 轮询批量任务状态的间隔(秒)
+BATCH_POLL_INTERVAL = 1
+# 批量任务中仍在执行的记录状态
+BATCH_PENDING_STATUSES = ('', 'wait', 'waiting', 'pending', 'running', 'processing')
+# 批量任务中执行成功的记录状态
+BATCH_SUCCESS_STATUSES = ('ok', 'success')
+
+# 当前账号的并发槽位，由 update_records 设置，子任务自动继承
+_account_slots: contextvars.ContextVar[Optional[asyncio.Semaphore]] = contextvars.ContextVar(
+    '_account_slots', default=None
+)
+
 
 @dataclass
 class UpdateResult:
@@ -15,11 +42,73 @@ class UpdateResult:
     ip: str
     domain: str
     subdomain: str
+    record_id: Optional[int] = None
+    account: str = ''
+    record_type: str = ''
+    line: str = ''
+
+
+@dataclass
+class AccountRunReport:
+    """单个账号一轮更新的结果和耗时"""
+    account: str
+    results: List[UpdateResult]
+    elapsed: float
+    error: Optional[str] = None     # 账号整体失败(超时或异常)时的原因
+
+    @property
+    def success(self) -> bool:
+        return self.error is None and all(result.success for result in self.results)
+
+
+def same_address(a: Optional[str], b: Optional[str]) -> bool:
+    """比较两个记录值，IPv6 的不同写法(大小写、零压缩)视为相同"""
+    if a == b:
+        return True
+    try:
+        return ipaddress.ip_address(a) == ipaddress.ip_address(b)
+    except (TypeError, ValueError):
+        return False
+
+
+class ZoneSnapshot:
+    """单个主域名下全部解析记录的快照，按 (主机记录, 记录类型, 线路) 建立索引"""
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self._index: Dict[Tuple[str, str, str], list] = {}
+        self._records: list = []
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, record):
+        self._records.append(record)
+        self._index.setdefault((record.Name, record.Type, record.Line), []).append(record)
+
+    def get(self, name: str, record_type: str, line: str) -> list:
+        """按 (主机记录, 记录类型, 线路) 查找记录"""
+        return list(self._index.get((name, record_type, line), []))
 
 
 class DNSUpdater:
-    def __init__(self, logger: Optional[logging.Logger] = None):
-        self.ip_resolver = IPResolver()
+    def __init__(
+            self,
+            logger: Optional[logging.Logger] = None,
+            config_manager: Optional[ConfigManager] = None,
+            max_workers: int = 8,
+            account_concurrency: int = 4,
+            state_store: Optional[RecordStateStore] = None,
+            full_reconcile_interval: int = 60,
+            parallel_accounts: int = 4,
+            account_timeout: float = 120,
+            rate_limiter: Optional[RateLimiter] = None,
+            throttle_retries: int = 3,
+            retry_policy: Optional[RetryPolicy] = None,
+            batch_threshold: int = 3,
+            batch_task_timeout: float = 30,
+            api_endpoint: str = ''
+    ):
         self._clients: Dict[str, dnspod_client.DnspodClient] = {}
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -28,158 +117,580 @@ class DNSUpdater:
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/91.0.864.59'
         ]
         self.logger = logger or logging.getLogger(__name__)
-        self.ip_resolver = IPResolver(logger=self.logger)   # 向ip_resolver传入logger
+        self.ip_resolver = IPResolver(logger=self.logger, config=config_manager)   # 向ip_resolver传入logger及共享配置
+        # SDK 调用均为阻塞调用，统一放到线程池执行；线程数即全局并发上限
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='dnspod')
+        self.account_concurrency = max(1, account_concurrency)
+        # 最后一次成功应用的记录状态；IP未变化时直接跳过，每隔 full_reconcile_interval 分钟强制与云端核对一次
+        self.state_store = state_store
+        self.full_reconcile_interval = full_reconcile_interval
+        # 多账号并发更新，单个账号超时或出错不影响其他账号
+        self.parallel_accounts = max(1, parallel_accounts)
+        self.account_timeout = account_timeout
+        # 按 SecretId 限制调用频率；被限流的调用降速后重新排队，而不是直接记为失败
+        self.rate_limiter = rate_limiter or RateLimiter(logger=self.logger)
+        self.throttle_retries = max(0, throttle_retries)
+        # 临时错误在本轮内退避重试，不必等到下一个更新间隔
+        self.retry_policy = retry_policy or RetryPolicy()
+        # 同一主域名下待修改为同一IP的记录数达到阈值时走批量修改，0表示不使用
+        self.batch_threshold = batch_threshold
+        self.batch_task_timeout = batch_task_timeout
+        # 自定义API地址(如本地模拟服务)，为空时使用SDK默认地址
+        self.api_endpoint = api_endpoint
 
-    def _get_client(self, secret_id: str, secret_key: str) -> dnspod_client.DnspodClient:
+    def apply_settings(self, settings: dict):
+        """配置热加载后应用新的调度参数，线程池大小需重启后生效"""
+        self.account_concurrency = max(1, settings.get('account_concurrency', self.account_concurrency))
+        self.full_reconcile_interval = settings.get('full_reconcile_interval', self.full_reconcile_interval)
+        self.parallel_accounts = max(1, settings.get('parallel_accounts', self.parallel_accounts))
+        self.account_timeout = settings.get('account_timeout', self.account_timeout)
+        self.throttle_retries = max(0, settings.get('api_throttle_retries', self.throttle_retries))
+        self.batch_threshold = settings.get('batch_threshold', self.batch_threshold)
+        self.batch_task_timeout = settings.get('batch_task_timeout', self.batch_task_timeout)
+        api_endpoint = settings.get('api_endpoint', self.api_endpoint)
+        if api_endpoint != self.api_endpoint:
+            # 已创建的客户端绑定了旧地址
+            self.api_endpoint = api_endpoint
+            self._clients.clear()
+        self.rate_limiter.configure(
+            settings.get('api_rate_limit', self.rate_limiter.rate),
+            settings.get('api_rate_burst', self.rate_limiter.burst)
+        )
+        policy = self.retry_policy
+        policy.max_attempts = settings.get('api_retry_attempts', policy.max_attempts)
+        policy.base_delay = settings.get('api_retry_base_delay', policy.base_delay)
+        policy.max_delay = settings.get('api_retry_max_delay', policy.max_delay)
+        policy.budget = settings.get('api_retry_budget', policy.budget)
+
+    def get_client(self, secret_id: str, secret_key: str) -> dnspod_client.DnspodClient:
+        """获取凭据对应的客户端(按凭据缓存)，使用设置中的 api_endpoint"""
         key = f"{secret_id}:{secret_key}"
         if key not in self._clients:
             cred = credential.Credential(secret_id, secret_key)
-            self._clients[key] = dnspod_client.DnspodClient(cred, "")
+            if self.api_endpoint:
+                # 支持 "http://host:port" 或 "host:port"(默认https)
+                scheme, _, host = self.api_endpoint.rpartition('://')
+                profile = ClientProfile(httpProfile=HttpProfile(protocol=scheme or 'https', endpoint=host))
+                self._clients[key] = dnspod_client.DnspodClient(cred, "", profile)
+            else:
+                self._clients[key] = dnspod_client.DnspodClient(cred, "")
         return self._clients[key]
 
-    async def update_records(self, account: AccountConfig) -> List[UpdateResult]:
+    async def close(self):
+        """释放网络会话，需在执行更新的事件循环中调用"""
+        await self.ip_resolver.close()
+
+    def shutdown(self):
+        """程序退出时释放线程池"""
+        self._executor.shutdown(wait=False)
+
+    async def _call(
+            self,
+            client: dnspod_client.DnspodClient,
+            action: str,
+            req,
+            priority: Optional[int] = None
+    ):
+        """在线程池中执行 SDK 调用，受凭据调用频率和账号并发上限约束
+
+        写请求默认优先于查询请求获得令牌；触发限流时降低该凭据的速率并重新排队；
+        临时错误按指数退避(全抖动)重试，等待时间不超过本轮剩余的重试预算。
+        CreateRecord 重试时若上次请求实际已生效，云端会返回记录已存在错误，不会重复创建。
+        """
+        if priority is None:
+            priority = PRIORITY_READ if action.startswith('Describe') else PRIORITY_WRITE
+        limit_key = client.credential.secret_id
+        throttled = retried = 0
+        while True:
+            await self.rate_limiter.acquire(limit_key, priority)
+            try:
+                slots = _account_slots.get()
+                if slots is None:
+                    resp = await self._run_sdk(client, action, req)
+                else:
+                    async with slots:
+                        resp = await self._run_sdk(client, action, req)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind == THROTTLED:
+                    self.rate_limiter.on_throttled(limit_key)
+                    if throttled >= self.throttle_retries:
+                        raise
+                    throttled += 1
+                elif kind == RETRYABLE:
+                    if retried >= self.retry_policy.max_attempts:
+                        raise
+                    delay = self.retry_policy.backoff(retried)
+                    if delay > self.retry_policy.remaining():
+                        raise
+                    retried += 1
+                    self.logger.warning(
+                        f"{action} 调用失败，{delay:.2f} 秒后第 {retried} 次重试: {str(e)}"
+                    )
+                    await asyncio.sleep(delay)
+                else:
+                    raise
+                metrics.API_RETRIES.inc(action=action, reason=kind)
+                continue
+            self.rate_limiter.on_success(limit_key)
+            return resp
+
+    async def _run_sdk(self, client: dnspod_client.DnspodClient, action: str, req):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, getattr(client, action), req)
+        except Exception as e:
+            metrics.API_ERRORS.inc(action=action, code=getattr(e, 'code', None) or type(e).__name__)
+            raise
+        finally:
+            metrics.API_CALL_SECONDS.observe(time.perf_counter() - start, action=action)
+
+    async def update_all(
+            self,
+            accounts: Dict[str, AccountConfig],
+            ip_snapshot: Optional[IPSnapshot] = None,
+            on_account_done: Optional[Callable[[AccountRunReport], None]] = None
+    ) -> List[AccountRunReport]:
+        """并发更新多个账号，本轮耗时取决于最慢的账号而不是所有账号之和
+
+        Args:
+            accounts: {账号名: 账号配置}
+            ip_snapshot: 本轮共享的IP快照，为空时自行获取一次
+            on_account_done: 每个账号完成时回调，按完成顺序调用
+
+        Returns:
+            按账号配置顺序排列的各账号报告
+        """
+        if ip_snapshot is None:
+            ip_snapshot = await self.ip_resolver.resolve()
+        slots = asyncio.Semaphore(self.parallel_accounts)
+        # 本轮所有账号共享同一重试预算
+        budget_token = self.retry_policy.start_cycle()
+
+        async def run_account(name: str, account: AccountConfig) -> AccountRunReport:
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    if self.account_timeout:
+                        results = await asyncio.wait_for(
+                            self.update_records(account, ip_snapshot, name), self.account_timeout
+                        )
+                    else:
+                        results = await self.update_records(account, ip_snapshot, name)
+                    report = AccountRunReport(name, results, time.perf_counter() - start)
+                except asyncio.TimeoutError:
+                    error = f"账号更新超时({self.account_timeout}秒)"
+                    report = AccountRunReport(
+                        name, self._account_failed(name, account, error), time.perf_counter() - start, error
+                    )
+                except Exception as e:
+                    error = f"账号更新失败: {str(e)}"
+                    report = AccountRunReport(
+                        name, self._account_failed(name, account, error), time.perf_counter() - start, error
+                    )
+
+            metrics.ACCOUNT_SECONDS.observe(report.elapsed, account=name)
+            if report.error:
+                self.logger.error(f"账号 {name} {report.error}，耗时 {report.elapsed:.2f} 秒")
+            else:
+                self.logger.info(f"账号 {name} 更新完成，耗时 {report.elapsed:.2f} 秒")
+            if on_account_done:
+                on_account_done(report)
+            return report
+
+        try:
+            return list(await asyncio.gather(*(
+                run_account(name, account) for name, account in accounts.items()
+            )))
+        finally:
+            self.retry_policy.end_cycle(budget_token)
+
+    @staticmethod
+    def _account_failed(name: str, account: AccountConfig, error: str) -> List[UpdateResult]:
+        """账号整体失败时，为每条已启用的记录生成失败结果"""
+        return [
+            UpdateResult(
+                False, error, '', domain, config.subdomain,
+                account=name, record_type=config.record_type, line=config.line
+            )
+            for domain, configs in account.domains.items()
+            for config in configs
+            if config.enabled
+        ]
+
+    async def update_records(
+            self,
+            account: AccountConfig,
+            ip_snapshot: Optional[IPSnapshot] = None,
+            account_name: str = ''
+    ) -> List[UpdateResult]:
+        """更新账号下的全部记录
+
+        Args:
+            account: 账号配置
+            ip_snapshot: 本轮共享的IP快照，为空时自行获取
+            account_name: 账号名称，用于记录状态
+        """
         results = []
         self.logger.info(f"开始更新DNS记录")
-        client = self._get_client(account.secret_id, account.secret_key)
-
-        ipv4 = await self.ip_resolver.get_ipv4()
-        # self.logger.info(f"获取到IPv4地址: {ipv4}")
-        ipv6 = await self.ip_resolver.get_ipv6()
-        # self.logger.info(f"获取到IPv6地址: {ipv6}")
-
-        for domain, configs in account.domains.items():
-            self.logger.info(f"处理域名: {domain}")
-            for config in configs:
-                self.logger.info(f"处理记录: {config.subdomain}.{domain} ({config.record_type})")
-
-                if not config.enabled:
-                    self.logger.info(f"记录 {config.subdomain}.{domain} 已禁用，跳过更新")
-                    results.append(UpdateResult(
-                        success=False,
-                        message="记录已禁用",
-                        ip="127.0.0.1",
-                        domain=domain,
-                        subdomain=config.subdomain,
-                    ))
-                    continue
+        client = self.get_client(account.secret_id, account.secret_key)
 
-                ip = ipv4 if config.record_type == 'A' else ipv6
-                if not ip:
-                    self.logger.error(f"无法获取 {config.record_type} 地址")
-                    results.append(UpdateResult(
-                        False,
-                        f"无法获取 {config.record_type} 地址",
-                        "",
+        if ip_snapshot is None:
+            ip_snapshot = await self.ip_resolver.resolve()
+        ipv4, ipv6 = ip_snapshot.ipv4, ip_snapshot.ipv6
+
+        account_name = account_name or RecordStateStore.anonymous_account(account.secret_id)
+        # 各主域名并发处理，结果按配置顺序返回
+        token = _account_slots.set(asyncio.Semaphore(self.account_concurrency))
+        # 单独调用时也限定重试预算；由 update_all 调用时沿用整轮的预算
+        budget_token = None if RetryPolicy.in_cycle() else self.retry_policy.start_cycle()
+        try:
+            domain_results = await asyncio.gather(*(
+                self._update_domain(client, account_name, domain, configs, ipv4, ipv6)
+                for domain, configs in account.domains.items()
+            ))
+        finally:
+            _account_slots.reset(token)
+            if budget_token is not None:
+                self.retry_policy.end_cycle(budget_token)
+            if self.state_store:
+                self.state_store.save()
+
+        for items in domain_results:
+            for result in items:
+                result.account = account_name
+            results.extend(items)
+        return results
+
+    async def _update_domain(
+            self,
+            client: dnspod_client.DnspodClient,
+            account_name: str,
+            domain: str,
+            configs: List[DomainConfig],
+            ipv4: Optional[str],
+            ipv6: Optional[str]
+    ) -> List[UpdateResult]:
+        """处理单个主域名下的全部记录"""
+        self.logger.info(f"处理域名: {domain}")
+        results: List[Optional[UpdateResult]] = [None] * len(configs)
+        pending: Dict[Tuple[str, str, str], List[Tuple[int, DomainConfig, str]]] = {}
+
+        for i, config in enumerate(configs):
+            self.logger.info(f"处理记录: {config.subdomain}.{domain} ({config.record_type})")
+
+            if not config.enabled:
+                self.logger.info(f"记录 {config.subdomain}.{domain} 已禁用，跳过更新")
+                results[i] = UpdateResult(
+                    success=False,
+                    message="记录已禁用",
+                    ip="127.0.0.1",
+                    domain=domain,
+                    subdomain=config.subdomain,
+                )
+                continue
+
+            ip = ipv4 if config.record_type == 'A' else ipv6
+            if not ip:
+                self.logger.error(f"无法获取 {config.record_type} 地址")
+                results[i] = UpdateResult(
+                    False,
+                    f"无法获取 {config.record_type} 地址",
+                    "",
+                    domain,
+                    config.subdomain
+                )
+                continue
+
+            # IP与上次成功应用的值相同，且未到强制核对时间，跳过API调用
+            if self.state_store:
+                state_key = RecordStateStore.make_key(
+                    account_name, domain, config.subdomain, config.record_type, config.line
+                )
+                if self.state_store.is_fresh(state_key, ip, self.full_reconcile_interval * 60):
+                    results[i] = UpdateResult(
+                        True,
+                        "IP未变化，跳过",
+                        ip,
                         domain,
-                        config.subdomain
-                    ))
+                        config.subdomain,
+                        record_id=self.state_store.get(state_key).record_id
+                    )
+                    metrics.RECORD_RESULTS.inc(result='skipped')
                     continue
 
+            # 不同 (主机记录, 类型, 线路) 的记录互不影响，可并发处理；重复配置同一键的在组内顺序执行
+            pending.setdefault((config.subdomain, config.record_type, config.line), []).append((i, config, ip))
+
+        if pending:
+            # 每个主域名每轮只拉取一次完整记录列表
+            try:
+                zone = await self._describe_zone(client, domain)
+            except Exception as e:
+                zone_error = f"查询域名记录失败: {str(e)}"
+                self.logger.error(f"{zone_error} ({domain})")
+                for group in pending.values():
+                    for i, config, ip in group:
+                        results[i] = UpdateResult(False, zone_error, ip, domain, config.subdomain)
+                return self._tag_results(results, configs)
+
+            # IP变化时同一主域名下大量记录改为同一值，先批量修改，失败的记录再逐条处理
+            batched = await self._modify_batch(client, domain, zone, pending)
+
+            async def run_group(group):
+                for i, config, ip in group:
+                    start = time.perf_counter()
+                    try:
+                        if i in batched:
+                            result = batched[i]
+                        else:
+                            result = await self._update_single_record(
+                                client, domain, config, ip, zone
+                            )
+                        self.logger.info(f"更新结果: {result.domain} - {result.subdomain} -> {result.ip} ({result.message})")
+                    except Exception as e:
+                        self.logger.error(f"更新失败: {domain} - {config.subdomain}: {str(e)}")
+                        result = UpdateResult(
+                            False,
+                            str(e),
+                            ip,
+                            domain,
+                            config.subdomain
+                        )
+                    results[i] = result
+                    metrics.RECORD_RECONCILE_SECONDS.observe(time.perf_counter() - start)
+                    metrics.RECORD_RESULTS.inc(result='success' if result.success else 'failure')
+                    if self.state_store:
+                        state_key = RecordStateStore.make_key(
+                            account_name, domain, config.subdomain, config.record_type, config.line
+                        )
+                        if result.success:
+                            self.state_store.put(state_key, ip, result.record_id)
+                        else:
+                            self.state_store.discard(state_key)
+
+            await asyncio.gather(*(run_group(group) for group in pending.values()))
+
+        return self._tag_results(results, configs)
+
+    @staticmethod
+    def _match_record(zone: ZoneSnapshot, config: DomainConfig, ip: str):
+        """在记录快照中查找配置对应的现有记录
+
+        A 与 AAAA 等不同类型、不同线路各自独立，按 (主机记录, 记录类型, 线路) 精确匹配；
+        同一键下有多条记录(多值)时，已有目标值的记录优先，否则取第一条。
+        """
+        records = zone.get(config.subdomain, config.record_type, config.line)
+        for record in records:
+            if same_address(record.Value, ip):
+                return record
+        return records[0] if records else None
+
+    @staticmethod
+    def _find_conflict(zone: ZoneSnapshot, config: DomainConfig):
+        """同名同线路下的 CNAME 记录不能与 A/AAAA 共存，返回冲突记录"""
+        records = zone.get(config.subdomain, 'CNAME', config.line)
+        return records[0] if records else None
+
+    async def _modify_batch(
+            self,
+            client: dnspod_client.DnspodClient,
+            domain: str,
+            zone: ZoneSnapshot,
+            pending: Dict[Tuple[str, str, str], List[Tuple[int, DomainConfig, str]]]
+    ) -> Dict[int, UpdateResult]:
+        """批量修改记录值，返回 {配置序号: 结果}，只包含批量修改成功的记录"""
+        results: Dict[int, UpdateResult] = {}
+        if self.batch_threshold <= 0:
+            return results
+
+        # 只有记录已存在、类型一致且值需要变更的才适合批量修改，按目标值分组
+        by_value: Dict[str, List[Tuple[int, DomainConfig, object]]] = {}
+        for group in pending.values():
+            for i, config, ip in group:
+                record = self._match_record(zone, config, ip)
+                if record is None or same_address(record.Value, ip):
+                    continue
+                by_value.setdefault(ip, []).append((i, config, record))
+
+        for ip, items in by_value.items():
+            if len(items) < self.batch_threshold:
+                continue
+            for offset in range(0, len(items), RECORD_BATCH_SIZE):
+                chunk = items[offset:offset + RECORD_BATCH_SIZE]
+                record_ids = [record.RecordId for _, _, record in chunk]
+                self.logger.info(f"批量修改 {domain} 下 {len(chunk)} 条记录 -> {ip}")
                 try:
-                    result = await self._update_single_record(
-                        client, domain, config, ip
-                    )
-                    results.append(result)
-                    self.logger.info(f"更新结果: {result.domain} - {result.subdomain} -> {result.ip} ({result.message})")
+                    succeeded = await self._run_modify_batch(client, record_ids, ip)
                 except Exception as e:
-                    self.logger.error(f"更新失败: {domain} - {config.subdomain}: {str(e)}")
-                    results.append(UpdateResult(
-                        False,
-                        str(e),
+                    self.logger.warning(f"批量修改失败，改为逐条更新: {domain}: {str(e)}")
+                    continue
+                for i, config, record in chunk:
+                    if record.RecordId not in succeeded:
+                        continue
+                    record.Value = ip
+                    results[i] = UpdateResult(
+                        True,
+                        "记录更新成功(批量)",
                         ip,
                         domain,
-                        config.subdomain
-                    ))
+                        config.subdomain,
+                        record_id=record.RecordId
+                    )
+                if len(succeeded) < len(chunk):
+                    self.logger.warning(f"批量修改中 {len(chunk) - len(succeeded)} 条记录未成功，改为逐条更新")
+        return results
+
+    async def _run_modify_batch(
+            self,
+            client: dnspod_client.DnspodClient,
+            record_ids: List[int],
+            value: str
+    ) -> Set[int]:
+        """提交批量修改任务并等待完成，返回修改成功的记录ID"""
+        req = models.ModifyRecordBatchRequest()
+        params = {
+            "RecordIdList": record_ids,
+            "Change": "value",
+            "ChangeTo": value
+        }
+        req.from_json_string(json.dumps(params))
+        resp = await self._call(client, 'ModifyRecordBatch', req)
+        return await self._wait_batch_task(client, resp.JobId)
+
+    async def _wait_batch_task(self, client: dnspod_client.DnspodClient, job_id: int) -> Set[int]:
+        """轮询批量任务直到所有记录执行结束，超时抛出 TimeoutError"""
+        deadline = time.monotonic() + self.batch_task_timeout
+        while True:
+            req = models.DescribeBatchTaskRequest()
+            req.from_json_string(json.dumps({"JobId": job_id}))
+            resp = await self._call(client, 'DescribeBatchTask', req)
+
+            succeeded: Set[int] = set()
+            running = False
+            for detail in resp.DetailList or []:
+                for record in detail.RecordList or []:
+                    status = (record.Status or '').lower()
+                    if status in BATCH_PENDING_STATUSES:
+                        running = True
+                    elif status in BATCH_SUCCESS_STATUSES:
+                        succeeded.add(record.RecordId)
+            if not running:
+                return succeeded
+            if time.monotonic() + BATCH_POLL_INTERVAL > deadline:
+                raise TimeoutError(f"批量任务 {job_id} 等待超时")
+            await asyncio.sleep(BATCH_POLL_INTERVAL)
 
+    @staticmethod
+    def _tag_results(results: List[UpdateResult], configs: List[DomainConfig]) -> List[UpdateResult]:
+        """补充记录类型和线路，界面按完整记录键定位行"""
+        for result, config in zip(results, configs):
+            result.record_type = config.record_type
+            result.line = config.line
         return results
 
+    async def _describe_zone(
+            self,
+            client: dnspod_client.DnspodClient,
+            domain: str
+    ) -> ZoneSnapshot:
+        """分页拉取主域名下的全部记录，构建记录快照"""
+        self.logger.info(f"查询域名记录列表: {domain}")
+        zone = ZoneSnapshot(domain)
+        offset = 0
+        while True:
+            req = models.DescribeRecordListRequest()
+            params = {
+                "Domain": domain,
+                "Offset": offset,
+                "Limit": RECORD_LIST_PAGE_SIZE
+            }
+            req.from_json_string(json.dumps(params))
+            try:
+                resp = await self._call(client, 'DescribeRecordList', req)
+            except Exception as e:
+                # 域名下没有任何记录
+                if "ResourceNotFound.NoDataOfRecord" in str(e):
+                    break
+                raise
+
+            records = resp.RecordList or []
+            for record in records:
+                zone.add(record)
+
+            offset += len(records)
+            total = resp.RecordCountInfo.TotalCount if resp.RecordCountInfo else offset
+            if not records or offset >= total:
+                break
+
+        self.logger.info(f"域名 {domain} 共 {len(zone)} 条记录")
+        return zone
+
     async def _update_single_record(
             self,
             client: dnspod_client.DnspodClient,
             domain: str,
             config: DomainConfig,
-            ip: str
+            ip: str,
+            zone: ZoneSnapshot
     ) -> UpdateResult:
         try:
-            # 1. 尝试查询记录
-            self.logger.info(f"查询记录: {config.subdomain}.{domain}")
-            try:
-                req = models.DescribeRecordListRequest()
-                params = {
-                    "Domain": domain,
-                    "Subdomain": config.subdomain
-                }
-                req.from_json_string(json.dumps(params))
-                resp = client.DescribeRecordList(req)
-
-                # 2. 检查是否存在记录以及类型是否匹配
-                existing_record = None
-                if resp.RecordList:
-                    for record in resp.RecordList:
-                        if record.Name == config.subdomain:
-                            existing_record = record
-                            break
-
-                if existing_record:
-                    # 记录存在
-                    if existing_record.Type != config.record_type:
-                        # 3.1 记录类型不匹配，需要删除后重新创建
-                        self.logger.info(f"记录类型不匹配，正在更改: {config.subdomain}.{domain} "
-                                         f"(原类型:{existing_record.Type} -> 新类型:{config.record_type})")
-
-                        # 先删除旧记录
-                        delete_req = models.DeleteRecordRequest()
-                        delete_params = {
-                            "Domain": domain,
-                            "RecordId": existing_record.RecordId
-                        }
-                        delete_req.from_json_string(json.dumps(delete_params))
-                        client.DeleteRecord(delete_req)
+            # 1. 从记录快照中查找同类型、同线路的现有记录
+            existing_record = self._match_record(zone, config, ip)
 
-                        # 创建新记录
-                        return await self._create_record(client, domain, config, ip)
-                    else:
-                        # 3.2 记录类型匹配，检查是否需要更新值
-                        if existing_record.Value == ip:
-                            return UpdateResult(
-                                True,
-                                "记录是最新的",
-                                ip,
-                                domain,
-                                config.subdomain
-                            )
+            if existing_record is None:
+                # 2.1 记录不存在时创建；同名 CNAME 会导致创建失败，不自动删除他人记录
+                conflict = self._find_conflict(zone, config)
+                if conflict:
+                    return UpdateResult(
+                        False,
+                        f"存在冲突的 CNAME 记录(值: {conflict.Value})，请手动处理",
+                        ip,
+                        domain,
+                        config.subdomain
+                    )
+                return await self._create_record(client, domain, config, ip, zone)
 
-                        # 更新记录值
-                        self.logger.info(f"更新记录值: {config.subdomain}.{domain} -> {ip}")
-                        modify_req = models.ModifyRecordRequest()
-                        modify_params = {
-                            "Domain": domain,
-                            "RecordId": existing_record.RecordId,
-                            "SubDomain": config.subdomain,
-                            "RecordType": config.record_type,
-                            "RecordLine": "默认",
-                            "Value": ip
-                        }
-                        modify_req.from_json_string(json.dumps(modify_params))
-                        client.ModifyRecord(modify_req)
+            # 2.2 记录存在，检查是否需要更新值
+            extra = len(zone.get(config.subdomain, config.record_type, config.line)) - 1
+            if extra:
+                self.logger.warning(
+                    f"{config.subdomain}.{domain} ({config.record_type}, {config.line}) 存在 {extra} 条额外记录，未自动删除"
+                )
+            if same_address(existing_record.Value, ip):
+                return UpdateResult(
+                    True,
+                    "记录是最新的",
+                    ip,
+                    domain,
+                    config.subdomain,
+                    record_id=existing_record.RecordId
+                )
 
-                        return UpdateResult(
-                            True,
-                            "记录更新成功",
-                            ip,
-                            domain,
-                            config.subdomain
-                        )
-                else:
-                    # 3.3 记录不存在，创建新记录
-                    return await self._create_record(client, domain, config, ip)
+            # 更新记录值
+            self.logger.info(f"更新记录值: {config.subdomain}.{domain} -> {ip}")
+            modify_req = models.ModifyRecordRequest()
+            modify_params = {
+                "Domain": domain,
+                "RecordId": existing_record.RecordId,
+                "SubDomain": config.subdomain,
+                "RecordType": config.record_type,
+                "RecordLine": config.line,
+                "Value": ip
+            }
+            modify_req.from_json_string(json.dumps(modify_params))
+            await self._call(client, 'ModifyRecord', modify_req)
+            existing_record.Value = ip
 
-            except Exception as e:
-                # 如果是记录不存在的错误，创建新记录
-                if "ResourceNotFound.NoDataOfRecord" in str(e):
-                    self.logger.info(f"记录不存在，创建新记录: {config.subdomain}.{domain}")
-                    return await self._create_record(client, domain, config, ip)
-                raise e
+            return UpdateResult(
+                True,
+                "记录更新成功",
+                ip,
+                domain,
+                config.subdomain,
+                record_id=existing_record.RecordId
+            )
 
         except Exception as e:
             error_msg = str(e)
@@ -197,7 +708,8 @@ class DNSUpdater:
             client: dnspod_client.DnspodClient,
             domain: str,
             config: DomainConfig,
-            ip: str
+            ip: str,
+            zone: Optional[ZoneSnapshot] = None
     ) -> UpdateResult:
         """创建新的DNS记录"""
         try:
@@ -207,18 +719,29 @@ class DNSUpdater:
                 "Domain": domain,
                 "SubDomain": config.subdomain,
                 "RecordType": config.record_type,
-                "RecordLine": "默认",
+                "RecordLine": config.line,
                 "Value": ip
             }
             create_req.from_json_string(json.dumps(create_params))
-            client.CreateRecord(create_req)
+            resp = await self._call(client, 'CreateRecord', create_req)
+
+            # 同步到记录快照，避免同一轮内重复创建
+            if zone is not None:
+                record = models.RecordListItem()
+                record.RecordId = resp.RecordId
+                record.Name = config.subdomain
+                record.Type = config.record_type
+                record.Line = config.line
+                record.Value = ip
+                zone.add(record)
 
             return UpdateResult(
                 True,
                 "创建记录成功",
                 ip,
                 domain,
-                config.subdomain
+                config.subdomain,
+                record_id=resp.RecordId
             )
         except Exception as e:
             raise Exception(f"创建记录失败: {str(e)}")
@@ -229,7 +752,9 @@ class DNSUpdater:
             client: dnspod_client.DnspodClient,
             domain: str,
             subdomain: str,
-            record_type: str
+            record_type: str,
+            line: Optional[str] = None,
+            account_name: str = ''
     ) -> bool:
         """删除指定的 DNS 记录
 
@@ -238,10 +763,16 @@ class DNSUpdater:
             domain: 主域名
             subdomain: 子域名
             record_type: 记录类型(A或AAAA)
+            line: 线路，为空时删除所有线路的记录
+            account_name: 账号名称，用于清除记录状态
 
         Returns:
             bool: 删除是否成功
         """
+        account_name = account_name or RecordStateStore.anonymous_account(client.credential.secret_id)
+        if self.state_store and line:
+            # 先清除状态，删除中途失败时下次更新也会重新核对云端
+            self.state_store.discard(RecordStateStore.make_key(account_name, domain, subdomain, record_type, line))
         try:
             # 查询记录
             desc_req = models.DescribeRecordListRequest()
@@ -250,21 +781,27 @@ class DNSUpdater:
                 "Subdomain": subdomain,
                 "RecordType": record_type
             }
+            if line:
+                params["RecordLine"] = line
             desc_req.from_json_string(json.dumps(params))
-            resp = client.DescribeRecordList(desc_req)
+            resp = await self._call(client, 'DescribeRecordList', desc_req)
 
             # 如果找到记录就删除
             if resp.RecordList:
                 for record in resp.RecordList:
-                    if record.Name == subdomain and record.Type == record_type:
+                    if record.Name == subdomain and record.Type == record_type and line in (None, record.Line):
                         delete_req = models.DeleteRecordRequest()
                         delete_params = {
                             "Domain": domain,
                             "RecordId": record.RecordId
                         }
                         delete_req.from_json_string(json.dumps(delete_params))
-                        client.DeleteRecord(delete_req)
-                        self.logger.info(f"已删除记录: {subdomain}.{domain} ({record_type})")
+                        await self._call(client, 'DeleteRecord', delete_req)
+                        if self.state_store:
+                            self.state_store.discard(
+                                RecordStateStore.make_key(account_name, domain, subdomain, record_type, record.Line)
+                            )
+                        self.logger.info(f"已删除记录: {subdomain}.{domain} ({record_type}, {record.Line})")
                 return True
             else:
                 self.logger.info(f"未找到要删除的记录: {subdomain}.{domain} ({record_type})")
@@ -272,4 +809,19 @@ class DNSUpdater:
 
         except Exception as e:
             self.logger.error(f"删除记录时出错: {subdomain}.{domain}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+        finally:
+            if self.state_store:
+                self.state_store.save()
+
+    def prune_state(self, accounts: Dict[str, AccountConfig]):
+        """删除配置中已不存在的记录的状态，重新添加同名记录时会先核对云端"""
+        if not self.state_store:
+            return
+        self.state_store.retain(
+            RecordStateStore.make_key(name, domain, config.subdomain, config.record_type, config.line)
+            for name, account in accounts.items()
+            for domain, configs in account.domains.items()
+            for config in configs
+        )
+        self.state_store.save()
\ No newline at end of file
@@ -2,18 +2,44 @@ import aiohttp
 import asyncio
 import random
 import re
+import ipaddress
 import logging
-from typing import Optional, List
+import time
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Tuple
 import psutil
 import socket
 
 from core import config_manager
+from core import metrics
+
+
+@dataclass
+class IPSnapshot:
+    """一轮更新内共享的公网IP快照"""
+    ipv4: Optional[str]
+    ipv6: Optional[str]
+    resolved_at: float = field(default_factory=time.time)
+
+    def get(self, record_type: str) -> Optional[str]:
+        return self.ipv4 if record_type == 'A' else self.ipv6
 
 
 class IPResolver:
-    def __init__(self, logger: Optional[logging.Logger] = None):
+    def __init__(
+            self,
+            logger: Optional[logging.Logger] = None,
+            config: Optional[config_manager.ConfigManager] = None
+    ):
         self._logger = logger or logging.getLogger(__name__)    # 定义传入的logger
-        self.config_manager = config_manager.ConfigManager()
+        # 优先使用调用方共享的配置，避免重复解密加载配置文件
+        self.config_manager = config or config_manager.ConfigManager()
+        # 获取结果缓存: {'ipv4': (获取时间, 地址)}，失败结果不缓存
+        self._cache: Dict[str, Tuple[float, str]] = {}
+        self._last_ipv4: Optional[str] = None
+        # 长连接会话，跨多次查询复用连接和DNS缓存；会话绑定创建时的事件循环
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
         self._ip_pattern = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -22,10 +48,86 @@ class IPResolver:
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/91.0.864.59'
         ]
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取当前事件循环下的共享会话"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # 旧会话所属的事件循环已结束，无法再关闭，直接丢弃
+            connector = aiohttp.TCPConnector(
+                family=socket.AF_INET,      # 强制使用IPv4
+                limit=10,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """关闭共享会话，需在创建会话的事件循环中调用"""
+        if self._session and not self._session.closed and self._session_loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    @property
+    def cache_ttl(self) -> float:
+        """缓存有效期(秒)，0 表示不缓存"""
+        return self.config_manager.global_settings.get('ip_cache_ttl', 30)
+
+    def _get_cached(self, key: str) -> Optional[str]:
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl:
+            return cached[1]
+        return None
+
+    def _set_cached(self, key: str, ip: Optional[str]):
+        if ip:
+            self._cache[key] = (time.monotonic(), ip)
+
+    def invalidate_cache(self):
+        """清空缓存，下次获取时强制重新查询"""
+        self._cache.clear()
+
+    async def resolve(self) -> IPSnapshot:
+        """同时获取IPv4和IPv6地址，生成本轮使用的IP快照"""
+        ipv4, ipv6 = await asyncio.gather(self.get_ipv4(), self.get_ipv6())
+        return IPSnapshot(ipv4=ipv4, ipv6=ipv6)
+
     async def get_ipv4(self) -> Optional[str]:
-        sources = self.config_manager.global_settings['ip_sources'].copy()
+        cached = self._get_cached('ipv4')
+        if cached:
+            return cached
+        ip = await self._fetch_ipv4()
+        self._set_cached('ipv4', ip)
+        return ip
+
+    async def get_ipv6(self) -> Optional[str]:
+        cached = self._get_cached('ipv6')
+        if cached:
+            return cached
+        ip = await self._fetch_ipv6()
+        self._set_cached('ipv6', ip)
+        return ip
+
+    async def _fetch_ipv4(self) -> Optional[str]:
+        settings = self.config_manager.global_settings
+        sources = settings['ip_sources'].copy()
         random.shuffle(sources)
         # self._logger.info(f"开始获取IPv4地址")
+        if not sources:
+            self._logger.error("未配置IPv4获取接口")
+            return None
+
+        # sequential: 逐个尝试; race: 同时请求多个源，最先返回的有效结果胜出;
+        # quorum: 同时请求多个源，新IP需至少 ip_quorum 个源一致才采信
+        strategy = settings.get('ip_resolve_strategy', 'race')
+        if strategy == 'sequential':
+            fanout, quorum = 1, 1
+        else:
+            fanout = max(1, settings.get('ip_race_fanout', 3))
+            quorum = max(1, settings.get('ip_quorum', 2)) if strategy == 'quorum' else 1
+        quorum = min(quorum, len(sources))
 
         headers = {
             'User-Agent': random.choice(self.user_agents),
@@ -34,27 +136,104 @@ class IPResolver:
             'Connection': 'keep-alive',
         }
 
-        # 配置TCP连接器强制使用IPv4
-        connector = aiohttp.TCPConnector(family=socket.AF_INET)
-
-        async with aiohttp.ClientSession(connector=connector) as session:
-            for source in sources:
-                try:
-                    # self._logger.info(f"尝试从 {source} 获取IPv4")
-                    async with session.get(source, headers=headers, timeout=10) as response:
-                        if response.status == 200:
-                            text = await response.text()
-                            matches = self._ip_pattern.findall(text)
-                            if matches:
-                                self._logger.info(f"从 {source} 成功获取IPv4: {matches[0]}")
-                                return matches[0]
-                except Exception as e:
-                    self._logger.warning(f"无法从 {source} 获取IPv4: {e}")
-                    continue
+        ip = await self._race_sources(
+            self._get_session(),
+            sources,
+            headers,
+            fanout=fanout,
+            quorum=quorum,
+            source_timeout=settings.get('ip_source_timeout', 5),
+            budget=settings.get('ip_resolve_budget', 15)
+        )
+        if ip:
+            self._last_ipv4 = ip
+            return ip
         self._logger.error("所有IPv4源均获取失败")
         return None
 
-    async def get_ipv6(self) -> Optional[str]:
+    def _extract_ipv4(self, text: str) -> Optional[str]:
+        """从响应文本中提取第一个合法的IPv4地址"""
+        for match in self._ip_pattern.findall(text):
+            try:
+                ipaddress.IPv4Address(match)
+            except ValueError:
+                continue
+            return match
+        return None
+
+    async def _query_source(self, session, source: str, headers: dict, timeout: float) -> Optional[str]:
+        """从单个源获取IPv4，失败返回None"""
+        start = time.perf_counter()
+        ip = None
+        try:
+            # self._logger.info(f"尝试从 {source} 获取IPv4")
+            async with session.get(source, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status == 200:
+                    ip = self._extract_ipv4(await response.text())
+                if not ip:
+                    self._logger.warning(f"{source} 未返回有效IPv4 (HTTP {response.status})")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._logger.warning(f"无法从 {source} 获取IPv4: {e!r}")
+        metrics.IP_SOURCE_SECONDS.observe(time.perf_counter() - start, source=source)
+        if not ip:
+            metrics.IP_SOURCE_FAILURES.inc(source=source)
+        return ip
+
+    async def _race_sources(
+            self,
+            session,
+            sources: List[str],
+            headers: dict,
+            fanout: int,
+            quorum: int,
+            source_timeout: float,
+            budget: float
+    ) -> Optional[str]:
+        """同时向最多 fanout 个源发起请求，某个源失败时补上下一个源
+
+        与上次结果相同的IP只需一个源确认，新IP需要 quorum 个源一致；
+        得到结果或超出总时间预算后取消其余请求。
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+        waiting = list(sources)
+        running: Dict[asyncio.Task, str] = {}
+        votes: Dict[str, int] = {}
+
+        def launch():
+            while waiting and len(running) < fanout:
+                source = waiting.pop(0)
+                task = asyncio.ensure_future(self._query_source(session, source, headers, source_timeout))
+                running[task] = source
+
+        launch()
+        try:
+            while running:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self._logger.warning(f"获取IPv4超出时间预算 {budget} 秒")
+                    break
+                done, _ = await asyncio.wait(running, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    source = running.pop(task)
+                    ip = task.result()
+                    if not ip:
+                        continue
+                    votes[ip] = votes.get(ip, 0) + 1
+                    if votes[ip] >= quorum or ip == self._last_ipv4:
+                        self._logger.info(f"从 {source} 成功获取IPv4: {ip}")
+                        return ip
+                launch()
+            if votes:
+                self._logger.warning(f"IPv4源结果未达成一致: {votes}")
+            return None
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def _fetch_ipv6(self) -> Optional[str]:
         # self._logger.info("开始获取IPv6地址")
         try:
             interfaces = psutil.net_if_addrs()
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + '}'
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(key)} {value:g}')
+        return '\n'.join(lines)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # {标签: [各桶计数..., 总和, 总数]}
+        self._values: Dict[LabelKey, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """统计代码块耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        data = self._values.get(_label_key(labels))
+        return data[-1] if data else 0
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, data in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, data):
+                    lines.append(f'{self.name}_bucket{_format_labels(key, ("le", f"{bound:g}"))} {count}')
+                lines.append(f'{self.name}_bucket{_format_labels(key, ("le", "+Inf"))} {data[-1]}')
+                lines.append(f'{self.name}_sum{_format_labels(key)} {data[-2]:.6f}')
+                lines.append(f'{self.name}_count{_format_labels(key)} {data[-1]}')
+        return '\n'.join(lines)
+
+
+class MetricsRegistry:
+    """进程内指标集合，可输出 Prometheus 文本格式"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, help_text)
+        return self._metrics[name]
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, help_text, buckets)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+    def write_textfile(self, filename: str):
+        """写出指标快照，供 --stats 查看"""
+        tmp_file = f'{filename}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_file, filename)
+
+
+registry = MetricsRegistry()
+
+IP_SOURCE_SECONDS = registry.histogram('ddns_ip_source_seconds', '单个IP源请求耗时')
+IP_SOURCE_FAILURES = registry.counter('ddns_ip_source_failures_total', 'IP源请求失败次数')
+API_CALL_SECONDS = registry.histogram('ddns_api_call_seconds', '腾讯云API调用耗时')
+API_ERRORS = registry.counter('ddns_api_errors_total', '腾讯云API错误次数')
+API_RETRIES = registry.counter('ddns_api_retries_total', '腾讯云API重试次数(reason=throttled/retryable)')
+RECORD_RECONCILE_SECONDS = registry.histogram('ddns_record_reconcile_seconds', '单条记录核对更新耗时')
+RECORD_RESULTS = registry.counter('ddns_record_results_total', '记录更新结果数')
+ACCOUNT_SECONDS = registry.histogram('ddns_account_update_seconds', '单个账号一轮更新耗时')
+CYCLE_SECONDS = registry.histogram('ddns_cycle_seconds', '一轮更新各阶段耗时(phase=ip_resolve/total)')
+
+
+async def start_metrics_server(host: str, port: int, logger: Optional[logging.Logger] = None):
+    """启动本地 HTTP 指标端点，任意路径均返回 Prometheus 文本"""
+    logger = logger or logging.getLogger(__name__)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # 读取并丢弃请求头
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5)
+                if not line or line in (b'\r\n', b'\n'):
+                    break
+            body = registry.render().encode('utf-8')
+            writer.write(
+                b'HTTP/1.1 200 OK\r\n'
+                b'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                b'Content-Length: ' + str(len(body)).encode() + b'\r\n'
+                b'Connection: close\r\n\r\n' + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.debug(f"指标请求处理失败: {str(e)}")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"指标端点已启动: http://{host}:{port}/metrics")
+    return server
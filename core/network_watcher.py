@@ -0,0 +1,157 @@
+import asyncio
+import ctypes
+import logging
+import os
+import socket
+import threading
+from typing import FrozenSet, Optional, Tuple
+import psutil
+
+# netlink 地址/链路变化通知组
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+AddressSet = FrozenSet[Tuple[str, int, str]]
+
+
+class NetworkWatcher:
+    """监听本机网络地址变化
+
+    以 psutil.net_if_addrs() 轮询对比地址集合为基础，系统支持时同时使用
+    Windows NotifyAddrChange 或 Linux netlink 通知立即唤醒检查；
+    地址在 debounce 秒内保持稳定后才视为一次变化。
+    """
+
+    def __init__(
+            self,
+            poll_interval: float = 5,
+            debounce: float = 3,
+            use_os_notify: bool = True,
+            logger: Optional[logging.Logger] = None
+    ):
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.use_os_notify = use_os_notify
+        self.logger = logger or logging.getLogger(__name__)
+        self._last: AddressSet = self.snapshot()
+        self._notify_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._netlink: Optional[socket.socket] = None
+        self._started = False
+
+    @staticmethod
+    def snapshot() -> AddressSet:
+        """获取当前所有网卡上的有效IPv4/IPv6地址"""
+        addresses = set()
+        try:
+            for interface_name, items in psutil.net_if_addrs().items():
+                for address in items:
+                    if address.family not in (socket.AF_INET, socket.AF_INET6):
+                        continue
+                    ip = address.address.split('%')[0]
+                    if ip.startswith(('127.', 'fe80:', '169.254.')) or ip == '::1':
+                        continue
+                    addresses.add((interface_name, address.family, ip))
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"获取网卡地址失败: {str(e)}")
+        return frozenset(addresses)
+
+    def start(self):
+        """启动系统通知后端，需在事件循环内调用"""
+        if self._started:
+            return
+        self._started = True
+        self._loop = asyncio.get_running_loop()
+        self._notify_event = asyncio.Event()
+        if not self.use_os_notify:
+            return
+        try:
+            if os.name == 'nt':
+                self._start_windows_notify()
+            elif hasattr(socket, 'AF_NETLINK'):
+                self._start_netlink_notify()
+        except Exception as e:
+            self.logger.warning(f"网络变化通知不可用，仅使用轮询: {str(e)}")
+
+    def stop(self):
+        if self._netlink is not None:
+            try:
+                self._loop.remove_reader(self._netlink.fileno())
+            except Exception:
+                pass
+            self._netlink.close()
+            self._netlink = None
+        self._started = False
+
+    def _notify(self):
+        if self._loop and self._notify_event:
+            self._loop.call_soon_threadsafe(self._notify_event.set)
+
+    def _start_windows_notify(self):
+        """NotifyAddrChange 同步调用会一直阻塞到地址变化，放在守护线程中循环等待"""
+        notify_addr_change = ctypes.windll.iphlpapi.NotifyAddrChange
+
+        def worker():
+            while self._started:
+                if notify_addr_change(None, None) != 0:
+                    self.logger.warning("NotifyAddrChange 调用失败，仅使用轮询")
+                    return
+                self._notify()
+
+        threading.Thread(target=worker, name='addr-change', daemon=True).start()
+        self.logger.info("已启用 Windows 网络变化通知")
+
+    def _start_netlink_notify(self):
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+        sock.setblocking(False)
+
+        def on_readable():
+            try:
+                while True:
+                    sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                return
+            self._notify_event.set()
+
+        self._loop.add_reader(sock.fileno(), on_readable)
+        self._netlink = sock
+        self.logger.info("已启用 netlink 网络变化通知")
+
+    async def _wait_tick(self):
+        """等待下一次检查：轮询间隔到期或收到系统通知"""
+        try:
+            await asyncio.wait_for(self._notify_event.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._notify_event.clear()
+
+    async def wait_for_change(self) -> Tuple[AddressSet, AddressSet]:
+        """阻塞直到网络地址发生变化并稳定，返回 (新增地址, 移除地址)"""
+        self.start()
+        while True:
+            await self._wait_tick()
+            current = self.snapshot()
+            if current == self._last:
+                continue
+
+            # 防抖: 地址在 debounce 秒内不再变化才认为变化完成
+            while True:
+                await asyncio.sleep(self.debounce)
+                settled = self.snapshot()
+                if settled == current:
+                    break
+                current = settled
+
+            added = current - self._last
+            removed = self._last - current
+            self._last = current
+            if added or removed:
+                self.logger.info(
+                    f"检测到网络地址变化: 新增 {sorted(a[2] for a in added)}, "
+                    f"移除 {sorted(a[2] for a in removed)}"
+                )
+                return added, removed
@@ -0,0 +1,177 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+# 请求优先级，数值越小越先执行
+PRIORITY_WRITE = 0      # 修改/创建/删除记录
+PRIORITY_READ = 1       # 查询记录列表等核对类读请求
+
+# 腾讯云频率限制错误码前缀
+THROTTLE_CODES = ('RequestLimitExceeded', 'LimitExceeded')
+
+
+def is_throttle_error(error: Exception) -> bool:
+    code = getattr(error, 'code', None) or ''
+    return code.startswith(THROTTLE_CODES)
+
+
+class TokenBucket:
+    """单个凭据的令牌桶，等待者按优先级排队
+
+    触发限流时速率减半并清空令牌(乘性减)，之后调用成功时每秒最多按基准速率的
+    1/10 逐步恢复(加性增)，直至恢复到配置速率。
+    等待者的 future 和定时器属于当前运行的事件循环，同一个令牌桶只能在一个循环中使用。
+    """
+
+    def __init__(self, rate: float, capacity: float, min_rate: float = 1):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.min_rate = min(min_rate, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        # (优先级, 序号, future)
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._throttled_at = 0.0
+        self._recovered_at = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._burst(), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _burst(self) -> float:
+        # 降速期间突发量同比例缩小，避免恢复令牌后再次集中触发限流
+        return max(1.0, self.capacity * self.rate / self.base_rate)
+
+    async def acquire(self, priority: int = PRIORITY_READ):
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 令牌已分配但调用方被取消，归还令牌
+                self._tokens = min(self._burst(), self._tokens + 1)
+                self._schedule()
+            raise
+
+    def _schedule(self):
+        if self._timer is not None or not self._waiters:
+            return
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+        # 丢弃队首已取消的等待者，避免空转
+        while self._waiters and self._waiters[0][2].cancelled():
+            heapq.heappop(self._waiters)
+        self._schedule()
+
+    def on_throttled(self):
+        self._refill()
+        self._tokens = 0
+        # 同一时刻并发的多个请求会一起被限流，一秒内只降速一次
+        now = time.monotonic()
+        if now - self._throttled_at >= 1:
+            self._throttled_at = self._recovered_at = now
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def on_success(self):
+        if self.rate >= self.base_rate:
+            return
+        now = time.monotonic()
+        if now - self._recovered_at >= 1:
+            self._recovered_at = now
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+
+class RateLimiter:
+    """按 SecretId 分配令牌桶，限制每个凭据的API调用频率
+
+    界面的更新线程和主线程(删除记录等操作)各自运行事件循环并共用同一个 DNSUpdater，
+    令牌桶的等待状态不能跨循环共享，因此按事件循环分别维护令牌桶。
+    """
+
+    def __init__(
+            self,
+            rate: float = 20,
+            burst: float = 20,
+            min_rate: float = 1,
+            logger: Optional[logging.Logger] = None
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.logger = logger or logging.getLogger(__name__)
+        # 事件循环 -> {SecretId: 令牌桶}，令牌桶不持有循环的引用，循环回收后对应的令牌桶随之释放
+        self._buckets: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, TokenBucket]]' = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def configure(self, rate: float, burst: float):
+        """运行中调整速率，已有令牌桶保留当前的降速状态"""
+        self.rate = rate
+        self.burst = burst
+        with self._lock:
+            if not self.enabled:
+                self._buckets.clear()
+                return
+            buckets = [bucket for loop_buckets in self._buckets.values() for bucket in loop_buckets.values()]
+        for bucket in buckets:
+            bucket.base_rate = rate
+            bucket.rate = min(bucket.rate, rate)
+            bucket.capacity = max(1.0, burst)
+            bucket.min_rate = min(self.min_rate, rate)
+
+    def bucket(self, key: str) -> TokenBucket:
+        """当前事件循环中该凭据的令牌桶，需在事件循环中调用"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            loop_buckets = self._buckets.get(loop)
+            if loop_buckets is None:
+                loop_buckets = self._buckets[loop] = {}
+            bucket = loop_buckets.get(key)
+            if bucket is None:
+                bucket = loop_buckets[key] = TokenBucket(self.rate, self.burst, self.min_rate)
+        return bucket
+
+    async def acquire(self, key: str, priority: int = PRIORITY_READ):
+        if self.enabled:
+            await self.bucket(key).acquire(priority)
+
+    def on_throttled(self, key: str):
+        if not self.enabled:
+            return
+        bucket = self.bucket(key)
+        bucket.on_throttled()
+        self.logger.warning(f"API调用触发频率限制，速率降至 {bucket.rate:g} 次/秒")
+
+    def on_success(self, key: str):
+        if self.enabled:
+            self.bucket(key).on_success()
@@ -0,0 +1,69 @@
+import contextvars
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from core.rate_limiter import is_throttle_error
+
+# 错误分类
+THROTTLED = 'throttled'     # 频率限制，由限流器降速后重新排队
+RETRYABLE = 'retryable'     # 临时错误，退避后重试
+FATAL = 'fatal'             # 参数、鉴权等错误，重试无意义
+
+# 可重试的腾讯云错误码前缀(含SDK自身的网络错误)
+RETRYABLE_CODES = (
+    'InternalError',
+    'ServiceUnavailable',
+    'ResourceUnavailable',
+    'RequestTimeout',
+    'ClientNetworkError',
+    'ServerNetworkError',
+)
+
+# 本轮重试截止时间(time.monotonic)，由 DNSUpdater 每轮设置，子任务自动继承
+_retry_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    '_retry_deadline', default=None
+)
+
+
+def classify_error(error: Exception) -> str:
+    if is_throttle_error(error):
+        return THROTTLED
+    code = getattr(error, 'code', None)
+    if code:
+        return RETRYABLE if code.startswith(RETRYABLE_CODES) else FATAL
+    # 非SDK异常: 连接中断、超时等网络错误可重试
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return RETRYABLE
+    return FATAL
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3       # 临时错误的最大重试次数
+    base_delay: float = 0.5     # 首次退避上限(秒)，之后按指数增长
+    max_delay: float = 8        # 单次退避上限(秒)
+    budget: float = 30          # 每轮用于重试等待的总时间(秒)
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待时间，采用全抖动避免多个请求同时重试"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def start_cycle(self) -> contextvars.Token:
+        """开始新一轮的重试预算"""
+        return _retry_deadline.set(time.monotonic() + self.budget)
+
+    @staticmethod
+    def end_cycle(token: contextvars.Token):
+        _retry_deadline.reset(token)
+
+    @staticmethod
+    def in_cycle() -> bool:
+        return _retry_deadline.get() is not None
+
+    @staticmethod
+    def remaining() -> float:
+        """本轮剩余的重试预算，未设置时不限制"""
+        deadline = _retry_deadline.get()
+        return float('inf') if deadline is None else deadline - time.monotonic()
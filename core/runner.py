@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from core.config_manager import AccountConfig, ConfigManager, ConfigChange
+from core.dns_updater import AccountRunReport, DNSUpdater
+from core.state_store import RecordStateStore
+from core.rate_limiter import RateLimiter
+from core.retry import RetryPolicy
+from core.network_watcher import NetworkWatcher
+from core.scheduler import DeadlineScheduler, MAX_SCHEDULER_WAIT
+from core import metrics
+
+
+def create_dns_updater(
+        config_manager: ConfigManager,
+        state_store: Optional[RecordStateStore] = None,
+        logger: Optional[logging.Logger] = None
+) -> DNSUpdater:
+    """按全局设置创建 DNSUpdater，界面、服务和守护进程共用"""
+    settings = config_manager.global_settings
+    return DNSUpdater(
+        logger=logger,
+        config_manager=config_manager,
+        max_workers=settings.get('api_concurrency', 8),
+        account_concurrency=settings.get('account_concurrency', 4),
+        state_store=state_store,
+        full_reconcile_interval=settings.get('full_reconcile_interval', 60),
+        parallel_accounts=settings.get('parallel_accounts', 4),
+        account_timeout=settings.get('account_timeout', 120),
+        rate_limiter=RateLimiter(
+            rate=settings.get('api_rate_limit', 20),
+            burst=settings.get('api_rate_burst', 20),
+            logger=logger
+        ),
+        throttle_retries=settings.get('api_throttle_retries', 3),
+        retry_policy=RetryPolicy(
+            max_attempts=settings.get('api_retry_attempts', 3),
+            base_delay=settings.get('api_retry_base_delay', 0.5),
+            max_delay=settings.get('api_retry_max_delay', 8),
+            budget=settings.get('api_retry_budget', 30)
+        ),
+        batch_threshold=settings.get('batch_threshold', 3),
+        batch_task_timeout=settings.get('batch_task_timeout', 30),
+        api_endpoint=settings.get('api_endpoint', '')
+    )
+
+
+class UpdateRunner:
+    """后台更新循环：各记录按各自的间隔到期更新，网络地址或配置文件变化时提前更新
+
+    不依赖界面和 Windows 服务框架，供 Windows 服务和无界面守护进程共用。
+    """
+
+    def __init__(
+            self,
+            config_manager: ConfigManager,
+            dns_updater: DNSUpdater,
+            logger=None,
+            metrics_file: Optional[str] = None
+    ):
+        self.config_manager = config_manager
+        self.dns_updater = dns_updater
+        self.logger = logger or logging.getLogger(__name__)
+        self.metrics_file = metrics_file
+        # 创建后即视为运行中，run() 开始前调用 stop() 也能生效
+        self.running = True
+        # 用于从其他线程或信号处理中唤醒等待中的事件循环
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # 记录级调度，间隔按 记录 > 账号 > 全局 update_interval 确定
+        self.scheduler = DeadlineScheduler(config_manager.global_settings.get('failure_retry_interval', 60))
+
+    def stop(self):
+        """停止更新循环，可在任意线程调用"""
+        self.running = False
+        if self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def update_all_records(
+            self,
+            accounts: Optional[Dict[str, AccountConfig]] = None
+    ) -> List[AccountRunReport]:
+        """更新给定的账号记录，为空时更新全部账号"""
+        with metrics.CYCLE_SECONDS.time(phase='total'):
+            reports = await self._update_all_records(accounts)
+        self.dump_metrics()
+        return reports
+
+    def dump_metrics(self):
+        """每轮结束后写出指标快照，供 --stats 查看"""
+        if not self.metrics_file:
+            return
+        try:
+            metrics.registry.write_textfile(self.metrics_file)
+        except Exception as e:
+            self.logger.warning(f"写出指标快照失败: {str(e)}")
+
+    async def _update_all_records(
+            self,
+            accounts: Optional[Dict[str, AccountConfig]] = None
+    ) -> List[AccountRunReport]:
+        try:
+            if accounts is None:
+                accounts = self.config_manager.get_all_accounts()
+            self.logger.info(f'开始更新DNS记录，本轮账号数量: {len(accounts)}')
+
+            if len(accounts) < 1:
+                self.logger.info(f'本轮账号数量为: {len(accounts)}，跳出更新')
+                return []
+
+            # 本轮只获取一次公网IP，所有账号共用
+            with metrics.CYCLE_SECONDS.time(phase='ip_resolve'):
+                ip_snapshot = await self.dns_updater.ip_resolver.resolve()
+            self.logger.info(f'本轮IP: IPv4={ip_snapshot.ipv4}, IPv6={ip_snapshot.ipv6}')
+
+            for name, account in accounts.items():
+                domain_count = sum(len(domains) for domains in account.domains.values())
+                self.logger.info(f'账号 {name} 配置的域名数量: {domain_count}')
+
+            # 各账号并发更新，单个账号超时或出错不影响其他账号
+            reports = await self.dns_updater.update_all(accounts, ip_snapshot, self.log_account_report)
+            slowest = max(reports, key=lambda report: report.elapsed)
+            self.logger.info(
+                f'本轮更新完成: {sum(report.success for report in reports)}/{len(reports)} 个账号成功，'
+                f'最慢账号 {slowest.account} 耗时 {slowest.elapsed:.2f} 秒'
+            )
+            return reports
+
+        except Exception as e:
+            self.logger.error(f"更新过程发生错误: {str(e)}", exc_info=True)
+            return []
+
+    def log_account_report(self, report):
+        """单个账号完成时输出其记录结果"""
+        for result in report.results:
+            if result.success:
+                self.logger.info(f"更新成功: {result.domain} - {result.subdomain} -> {result.ip}")
+            else:
+                self.logger.error(f"更新失败: {result.domain} - {result.subdomain}: {result.message}")
+
+    async def wait_next_cycle(self, watcher, timeout: float):
+        """等待下一轮更新：网络地址变化、配置文件变化、到达超时或收到停止信号
+
+        网络变化时全部记录立即到期，配置变化时有变化的账号立即到期。
+        """
+        waiters = [asyncio.ensure_future(self._wakeup.wait())]
+        network_task = None
+        if watcher:
+            network_task = asyncio.ensure_future(watcher.wait_for_change())
+            waiters.append(network_task)
+        config_task = None
+        poll_interval = self.config_manager.global_settings.get('config_poll_interval', 5)
+        if poll_interval:
+            config_task = asyncio.ensure_future(self.wait_config_change(poll_interval))
+            waiters.append(config_task)
+        try:
+            done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in waiters:
+                task.cancel()
+        if network_task in done and not network_task.cancelled() and network_task.exception() is None:
+            # 网络变化后缓存的IP已不可信
+            self.dns_updater.ip_resolver.invalidate_cache()
+            self.logger.info('网络地址变化，立即更新')
+            self.scheduler.mark_due()
+        if config_task in done and not config_task.cancelled() and config_task.exception() is None:
+            self.scheduler.mark_due(self.apply_config_change(config_task.result()))
+
+    async def wait_config_change(self, poll_interval: float) -> ConfigChange:
+        """按间隔检查配置文件，直到检测到实际内容变化"""
+        while True:
+            await asyncio.sleep(poll_interval)
+            change = self.config_manager.reload_if_changed()
+            if change:
+                return change
+
+    def apply_config_change(self, change: ConfigChange) -> List[str]:
+        """应用重新加载的配置，网络会话、IP缓存和记录状态均保留，返回需要立即核对的账号"""
+        self.logger.info(
+            f'配置文件已变化: 新增账号 {change.added}, 删除账号 {change.removed}, '
+            f'修改账号 {change.changed}, 修改设置 {change.settings}'
+        )
+        settings = self.config_manager.global_settings
+        if change.settings:
+            self.dns_updater.apply_settings(settings)
+            self.scheduler.retry_delay = settings.get('failure_retry_interval', self.scheduler.retry_delay)
+        accounts = self.config_manager.get_all_accounts()
+        # 间隔变化的记录重新对齐，新增记录立即到期，删除的记录不再调度
+        self.scheduler.sync(accounts, settings['update_interval'])
+        self.dns_updater.prune_state(accounts)
+        # 未变化的记录会因记录状态未过期而跳过，实际只有新增或修改的记录调用API
+        return change.affected_accounts
+
+    async def run(self, once: bool = False):
+        """运行更新循环直到 stop() 被调用；once 为True时只执行一轮"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        if once:
+            try:
+                await self.update_all_records()
+            finally:
+                await self.dns_updater.close()
+                self.dns_updater.shutdown()
+            return
+        settings = self.config_manager.global_settings
+        watcher = None
+        if settings.get('network_watch', True):
+            # 网络变化作为主要触发方式，定时间隔仅作兜底
+            watcher = NetworkWatcher(
+                poll_interval=settings.get('network_poll_interval', 5),
+                debounce=settings.get('network_debounce', 3),
+                logger=self.logger
+            )
+            watcher.start()
+        metrics_server = None
+        if settings.get('metrics_port'):
+            try:
+                metrics_server = await metrics.start_metrics_server(
+                    settings.get('metrics_host', '127.0.0.1'), settings['metrics_port'], self.logger
+                )
+            except Exception as e:
+                self.logger.error(f"指标端点启动失败: {str(e)}")
+        try:
+            self.scheduler.sync(self.config_manager.get_all_accounts(), settings['update_interval'])
+            while self.running:
+                try:
+                    # 取出所有已到期的记录合并为一轮；下次到期时间按间隔对齐，不受本轮耗时影响
+                    due = self.scheduler.pop_due()
+                    if due:
+                        reports = []
+                        try:
+                            reports = await self.update_all_records(due)
+                        finally:
+                            # 没有结果的记录按失败处理，稍后重试
+                            self.scheduler.complete(due, [r for report in reports for r in report.results])
+                        next_due = self.scheduler.next_due()
+                        if next_due is not None:
+                            self.logger.info(
+                                f"等待网络变化或 {time.strftime('%H:%M:%S', time.localtime(next_due))} 进行下一次更新"
+                            )
+                    next_due = self.scheduler.next_due()
+                    timeout = MAX_SCHEDULER_WAIT if next_due is None else next_due - time.time()
+                    # 分段等待，系统休眠或时间调整后按实际时间重新计算
+                    await self.wait_next_cycle(watcher, min(MAX_SCHEDULER_WAIT, max(0.0, timeout)))
+
+                except Exception as e:
+                    self.logger.error(f"服务运行错误: {str(e)}", exc_info=True)
+                    await asyncio.sleep(60)
+        finally:
+            if watcher:
+                watcher.stop()
+            if metrics_server:
+                metrics_server.close()
+            # stop() 可能在其他线程调用，会话需在本事件循环内关闭
+            await self.dns_updater.close()
+            self.dns_updater.shutdown()
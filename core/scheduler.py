@@ -0,0 +1,160 @@
+import heapq
+import itertools
+import math
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.config_manager import AccountConfig, DomainConfig
+
+# 记录键: (账号, 主域名, 主机记录, 记录类型, 线路)
+RecordKey = Tuple[str, str, str, str, str]
+
+# 到期时间相差不超过该值(秒)的记录合并到同一轮更新
+COALESCE_WINDOW = 1.0
+# 等待下次到期时单次最长等待(秒)，休眠唤醒或系统时间调整后能及时按实际时间重新计算
+MAX_SCHEDULER_WAIT = 60
+
+
+@dataclass
+class _Entry:
+    interval: float             # 更新间隔(秒)
+    due: Optional[float]        # 下次到期时间(time.time)，正在更新时为None
+    popped: Optional[float] = None  # 取出更新时的到期时间，计算下次到期时间的下限
+
+
+def resolve_interval(account: AccountConfig, config: DomainConfig, default_minutes: float) -> float:
+    """记录的更新间隔(秒)：记录设置优先，其次账号设置，都为0时使用全局间隔"""
+    minutes = config.update_interval or account.update_interval or default_minutes
+    return max(1.0, minutes) * 60
+
+
+class DeadlineScheduler:
+    """按到期时间调度各条记录的更新
+
+    每条记录按各自的间隔对齐到本地时间的整数倍(如每5分钟在 :00、:05 ... 到期)，
+    下次到期时间只取决于间隔而不受本轮耗时影响，不会逐轮漂移；同一时刻到期的记录
+    合并为一轮，共用一次IP获取和记录列表查询。更新失败的记录在 retry_delay 秒后重试。
+    """
+
+    def __init__(self, retry_delay: float = 60, clock: Callable[[], float] = time.time):
+        self.retry_delay = retry_delay
+        self._clock = clock
+        self._accounts: Dict[str, AccountConfig] = {}
+        self._entries: Dict[RecordKey, _Entry] = {}
+        # (到期时间, 序号, 记录键)，到期时间变化后旧条目留在堆中，弹出时按 _entries 校验后丢弃
+        self._heap: List[Tuple[float, int, RecordKey]] = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def align(now: float, interval: float) -> float:
+        """now 之后第一个按本地时间对齐到 interval 整数倍的时刻"""
+        offset = time.localtime(now).tm_gmtoff
+        return (math.floor((now + offset) / interval) + 1) * interval - offset
+
+    def _push(self, key: RecordKey, due: float):
+        self._entries[key].due = due
+        heapq.heappush(self._heap, (due, next(self._seq), key))
+
+    def sync(self, accounts: Dict[str, AccountConfig], default_minutes: float):
+        """按当前配置更新调度表：新记录立即到期，删除或禁用的记录移除，间隔变化的记录重新对齐"""
+        now = self._clock()
+        entries: Dict[RecordKey, _Entry] = {}
+        for name, account in accounts.items():
+            for domain, configs in account.domains.items():
+                for config in configs:
+                    if not config.enabled:
+                        continue
+                    key = (name, domain, config.subdomain, config.record_type, config.line)
+                    interval = resolve_interval(account, config, default_minutes)
+                    old = self._entries.get(key)
+                    if old is None or old.due is None:
+                        # 新记录，或上一轮取出后未调用 complete() 的记录
+                        due = now
+                    elif old.interval == interval:
+                        due = old.due
+                    else:
+                        due = min(old.due, self.align(now, interval))
+                    entries[key] = _Entry(interval, due)
+        self._accounts = dict(accounts)
+        self._entries = entries
+        self._heap = [(entry.due, next(self._seq), key) for key, entry in entries.items() if entry.due is not None]
+        heapq.heapify(self._heap)
+
+    def mark_due(self, accounts: Optional[Iterable[str]] = None):
+        """将指定账号(为空时全部)的记录设为立即到期，用于网络或配置变化"""
+        now = self._clock()
+        names = None if accounts is None else set(accounts)
+        for key, entry in self._entries.items():
+            if entry.due is not None and (names is None or key[0] in names) and entry.due > now:
+                self._push(key, now)
+
+    def next_due(self) -> Optional[float]:
+        """最近的到期时间，没有待调度记录时返回None"""
+        while self._heap:
+            due, _, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry.due == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: Optional[float] = None) -> Dict[str, AccountConfig]:
+        """取出已到期的记录，返回只包含这些记录的账号配置，完成后需调用 complete()"""
+        now = self._clock() if now is None else now
+        due_keys: List[RecordKey] = []
+        while True:
+            due = self.next_due()
+            if due is None or due > now + COALESCE_WINDOW:
+                break
+            _, _, key = heapq.heappop(self._heap)
+            entry = self._entries[key]
+            entry.popped, entry.due = due, None
+            due_keys.append(key)
+        return self._subset(due_keys)
+
+    def _subset(self, keys: List[RecordKey]) -> Dict[str, AccountConfig]:
+        wanted = set(keys)
+        subset: Dict[str, AccountConfig] = {}
+        for name, account in self._accounts.items():
+            domains = {}
+            for domain, configs in account.domains.items():
+                selected = [
+                    config for config in configs
+                    if (name, domain, config.subdomain, config.record_type, config.line) in wanted
+                ]
+                if selected:
+                    domains[domain] = selected
+            if domains:
+                subset[name] = replace(account, domains=domains)
+        return subset
+
+    def complete(self, accounts: Dict[str, AccountConfig], results: Iterable, now: Optional[float] = None):
+        """根据更新结果安排下次到期时间：成功的对齐到下一个间隔，失败或没有结果的在 retry_delay 秒后重试
+
+        Args:
+            accounts: pop_due() 返回的账号配置
+            results: 本轮的 UpdateResult，按记录键匹配
+        """
+        now = self._clock() if now is None else now
+        succeeded = {
+            (result.account, result.domain, result.subdomain, result.record_type, result.line)
+            for result in results if result.success
+        }
+        for name, account in accounts.items():
+            for domain, configs in account.domains.items():
+                for config in configs:
+                    key = (name, domain, config.subdomain, config.record_type, config.line)
+                    entry = self._entries.get(key)
+                    if entry is None or entry.due is not None:
+                        # 更新期间记录已被删除或重新设为到期
+                        continue
+                    if key in succeeded:
+                        # 记录可能在到期前 COALESCE_WINDOW 内被提前取出，从本次到期时间之后对齐，
+                        # 避免在到期前完成时又被安排到同一时刻重复更新
+                        self._push(key, self.align(max(now, entry.popped or now), entry.interval))
+                    else:
+                        self._push(key, now + min(self.retry_delay, entry.interval))
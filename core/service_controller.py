@@ -6,8 +6,6 @@ import subprocess
 import logging
 import winreg
 
-from PySide2.QtWidgets import QMessageBox
-
 
 class ServiceController:
     SERVICE_NAME = "DdnsUpdater"
@@ -17,6 +15,8 @@ class ServiceController:
         self.service_path = os.path.join(os.path.dirname(self.executable_path), 'ddns_service.exe')
 
     def install_service(self):
+        # 确认框只在界面中弹出，延迟导入 Qt
+        from PySide2.QtWidgets import QMessageBox
         try:
             # 检查开机启动状态
             if self.is_startup_enabled():
@@ -82,6 +82,7 @@ class ServiceController:
             return False
 
     def enable_startup(self):
+        from PySide2.QtWidgets import QMessageBox
         try:
             # 检查服务安装状态
             if self.is_service_installed():
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+
+@dataclass
+class RecordState:
+    value: str          # 最后一次成功写入/确认的记录值
+    record_id: int      # 云端记录ID
+    verified_at: float  # 最后一次与云端核对的时间
+
+
+class RecordStateStore:
+    """记录最后一次成功应用的状态，IP未变化时可跳过API调用"""
+
+    def __init__(self, filename: str = 'ddns_state.json', logger: Optional[logging.Logger] = None):
+        self.filename = filename
+        self.logger = logger or logging.getLogger(__name__)
+        self._states: Dict[str, RecordState] = {}
+        self._dirty = False
+
+    @staticmethod
+    def make_key(account: str, domain: str, subdomain: str, record_type: str, line: str) -> str:
+        return '|'.join((account, domain, subdomain, record_type, line))
+
+    @staticmethod
+    def anonymous_account(secret_id: str) -> str:
+        """没有账号名称时代替账号名的标识，状态文件为明文，不写入 SecretId 本身"""
+        return 'id-' + hashlib.sha256(secret_id.encode('utf-8')).hexdigest()[:16]
+
+    def load(self):
+        """从文件加载状态，文件损坏时从空状态开始"""
+        self._states = {}
+        try:
+            if os.path.exists(self.filename):
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for key, item in data.items():
+                    self._states[key] = RecordState(**item)
+                self.logger.info(f"已加载 {len(self._states)} 条记录状态")
+        except Exception as e:
+            self.logger.error(f"加载记录状态失败: {str(e)}")
+            self._states = {}
+        self._dirty = False
+
+    def save(self):
+        """有变化时写回文件"""
+        if not self._dirty:
+            return
+        try:
+            tmp_file = f"{self.filename}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({key: asdict(state) for key, state in self._states.items()}, f)
+            os.replace(tmp_file, self.filename)
+            self._dirty = False
+        except Exception as e:
+            self.logger.error(f"保存记录状态失败: {str(e)}")
+
+    def get(self, key: str) -> Optional[RecordState]:
+        return self._states.get(key)
+
+    def put(self, key: str, value: str, record_id: int):
+        """记录一次成功的写入或核对"""
+        self._states[key] = RecordState(value=value, record_id=record_id, verified_at=time.time())
+        self._dirty = True
+
+    def discard(self, key: str):
+        if self._states.pop(key, None) is not None:
+            self._dirty = True
+
+    def retain(self, keys):
+        """只保留 keys 中的记录状态，用于删除已从配置中移除的记录"""
+        keys = set(keys)
+        removed = [key for key in self._states if key not in keys]
+        for key in removed:
+            del self._states[key]
+        if removed:
+            self._dirty = True
+
+    def is_fresh(self, key: str, value: str, max_age: float) -> bool:
+        """记录值未变化且在强制核对周期内"""
+        state = self._states.get(key)
+        if not state or state.value != value or max_age <= 0:
+            return False
+        return time.time() - state.verified_at < max_age
@@ -0,0 +1,107 @@
+"""无界面守护进程，不依赖 PySide2 和 pywin32，可在 Linux 等环境运行
+
+用法:
+    python daemon.py --config config.enc            持续运行，网络或配置变化时及时更新
+    python daemon.py --config config.enc --once     只执行一轮更新后退出
+    python daemon.py --stats                        输出最近一轮的指标快照
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+from loguru import logger
+
+from core.config_manager import ConfigManager
+from core.state_store import RecordStateStore
+from core.runner import UpdateRunner, create_dns_updater
+
+
+def get_app_path():
+    # 获取程序运行目录
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args(argv=None):
+    app_path = get_app_path()
+    parser = argparse.ArgumentParser(description='DDNS 无界面守护进程')
+    parser.add_argument('--config', default=os.path.join(app_path, 'config.enc'), help='加密配置文件路径')
+    parser.add_argument('--state', default=os.path.join(app_path, 'ddns_state.json'), help='记录状态文件路径')
+    parser.add_argument('--log-dir', default=os.path.join(app_path, 'logs'), help='日志目录，为空时只输出到控制台')
+    parser.add_argument('--log-level', default='INFO', help='日志级别')
+    parser.add_argument('--once', action='store_true', help='只执行一轮更新后退出')
+    parser.add_argument('--stats', action='store_true', help='输出最近一轮的指标快照')
+    return parser.parse_args(argv)
+
+
+def setup_logging(log_dir: str, level: str):
+    logger.remove()
+    log_format = "{time:YYYY-MM-DD HH:mm:ss}| PID:{process} | {level} | {message}"
+    logger.add(sys.stderr, format=log_format, level=level)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        logger.add(
+            os.path.join(log_dir, 'daemon_{time:YYYYMMDD}.log'),
+            rotation="00:00",
+            retention="30 days",
+            format=log_format,
+            level=level,
+            encoding="utf-8"
+        )
+    # 第三方库及核心模块中的标准 logging 输出到控制台
+    logging.basicConfig(level=level)
+
+
+async def run(runner: UpdateRunner, once: bool):
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, runner.stop)
+        except (NotImplementedError, RuntimeError):
+            # Windows 事件循环不支持信号处理器，依赖 KeyboardInterrupt 退出
+            pass
+    await runner.run(once=once)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    metrics_file = os.path.join(args.log_dir, 'metrics.prom') if args.log_dir else None
+
+    if args.stats:
+        if metrics_file and os.path.exists(metrics_file):
+            with open(metrics_file, 'r', encoding='utf-8') as f:
+                print(f.read())
+            return 0
+        print(f'未找到指标文件: {metrics_file}')
+        return 1
+
+    setup_logging(args.log_dir, args.log_level)
+    if not os.path.exists(args.config):
+        logger.error(f'配置文件不存在: {args.config}')
+        return 1
+    logger.info(f'配置文件路径: {args.config}')
+
+    config_manager = ConfigManager(args.config)
+    state_store = RecordStateStore(args.state, logger=logger)
+    state_store.load()
+    runner = UpdateRunner(
+        config_manager,
+        create_dns_updater(config_manager, state_store, logger),
+        logger=logger,
+        metrics_file=metrics_file
+    )
+    logger.info('守护进程开始运行')
+    try:
+        asyncio.run(run(runner, args.once))
+    except KeyboardInterrupt:
+        pass
+    logger.info('守护进程已停止')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,11 +6,10 @@ import webbrowser
 from PySide2.QtGui import QIcon
 from PySide2.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QLineEdit,
                                QPushButton, QTableWidget, QTableWidgetItem,
-                               QHBoxLayout, QComboBox, QCheckBox, QMessageBox)
+                               QHBoxLayout, QComboBox, QCheckBox, QMessageBox, QSpinBox)
 from PySide2.QtCore import Qt
 
 from core.config_manager import AccountConfig
-from core.dns_updater import DNSUpdater
 from .base_dialog import ProtectedDialog
 
 
@@ -54,6 +53,9 @@ class AccountDialog(ProtectedDialog):
         form.addRow("Secret Key:", self.secret_key_edit)
         self.secret_id_edit.setWhatsThis(secret_id_edit_help_text)
         self.secret_key_edit.setWhatsThis(secret_id_edit_help_text)
+        self.interval_spin = self.create_interval_spin("跟随全局设置")
+        self.interval_spin.setWhatsThis("该账号下记录的更新间隔，记录可在下方表格中单独设置。")
+        form.addRow("更新间隔:", self.interval_spin)
         layout.addLayout(form)
         # 添加帮助按钮
         reg_secret_btn = QPushButton("申请Secret", self)
@@ -63,9 +65,9 @@ class AccountDialog(ProtectedDialog):
 
         # Domains table
         self.domains_table = QTableWidget()
-        self.domains_table.setColumnCount(5)  # 增加一列用于启用/禁用
+        self.domains_table.setColumnCount(6)  # 增加一列用于启用/禁用，一列用于更新间隔
         self.domains_table.setHorizontalHeaderLabels([
-            "主域名", "子域名", "记录类型", "线路", "状态"
+            "主域名", "子域名", "记录类型", "线路", "状态", "间隔"
         ])
         # 设置表头提示信息
         header = self.domains_table.horizontalHeader()
@@ -76,6 +78,7 @@ class AccountDialog(ProtectedDialog):
         self.domains_table.horizontalHeaderItem(2).setToolTip("A记录=IPV4地址，AAAA记录=IPV6地址")
         self.domains_table.horizontalHeaderItem(3).setToolTip("如无特殊要求，默认就好")
         self.domains_table.horizontalHeaderItem(4).setToolTip("如果暂时不想更新这条域名，去掉勾就好")
+        self.domains_table.horizontalHeaderItem(5).setToolTip("单独设置这条记录的更新间隔，默认跟随账号")
 
         layout.addWidget(self.domains_table)
 
@@ -112,6 +115,15 @@ class AccountDialog(ProtectedDialog):
         webbrowser.open('https://console.cloud.tencent.com/cam/capi')
         return
 
+    @staticmethod
+    def create_interval_spin(default_text: str) -> QSpinBox:
+        """更新间隔输入框，0表示使用上一级的间隔"""
+        spin = QSpinBox()
+        spin.setRange(0, 1440)
+        spin.setSuffix(" 分钟")
+        spin.setSpecialValueText(default_text)
+        return spin
+
     def add_domain_row(self):
         """添加域名"""
         row = self.domains_table.rowCount()
@@ -137,6 +149,8 @@ class AccountDialog(ProtectedDialog):
         enabled_check.setChecked(True)
         self.domains_table.setCellWidget(row, 4, enabled_check)
 
+        self.domains_table.setCellWidget(row, 5, self.create_interval_spin("默认"))
+
     def on_domain_item_changed(self, item):
         """处理域名表格项变化"""
         row = item.row()
@@ -187,19 +201,22 @@ class AccountDialog(ProtectedDialog):
             type_combo = self.domains_table.cellWidget(row, 2)
             line_combo = self.domains_table.cellWidget(row, 3)
             enabled_check = self.domains_table.cellWidget(row, 4)
+            interval_spin = self.domains_table.cellWidget(row, 5)
 
             domains.append({
                 'domain': domain,
                 'subdomain': subdomain,
                 'type': type_combo.currentText(),
                 'line': line_combo.currentText(),
-                'enabled': enabled_check.isChecked()
+                'enabled': enabled_check.isChecked(),
+                'update_interval': interval_spin.value()
             })
 
         return {
             'name': self.name_edit.text(),
             'secret_id': self.secret_id_edit.text(),
             'secret_key': self.secret_key_edit.text(),
+            'update_interval': self.interval_spin.value(),
             'domains': domains
         }
 
@@ -209,6 +226,7 @@ class AccountDialog(ProtectedDialog):
         self.name_edit.setEnabled(False)
         self.secret_id_edit.setText(account_config.secret_id)
         self.secret_key_edit.setText(account_config.secret_key)
+        self.interval_spin.setValue(account_config.update_interval)
 
         # 清空并重新加载域名表格
         self.domains_table.setRowCount(0)
@@ -234,10 +252,16 @@ class AccountDialog(ProtectedDialog):
                 self.domains_table.setCellWidget(row, 3, line_combo)
                 self.domains_table.setCellWidget(row, 4, enabled_check)
 
-    async def delete_dns_record_async(self, client, domain, subdomain, record_type):
+                interval_spin = self.create_interval_spin("默认")
+                interval_spin.setValue(config.update_interval)
+                self.domains_table.setCellWidget(row, 5, interval_spin)
+
+    async def delete_dns_record_async(self, client, domain, subdomain, record_type, line=None):
         """异步删除DNS记录"""
-        dns_updater = DNSUpdater(logger=self.logger)
-        await dns_updater.delete_dns_records(client, domain, subdomain, record_type)
+        # 复用主窗口的 DNSUpdater，避免重复加载配置
+        await self.parent().dns_updater.delete_dns_records(
+            client, domain, subdomain, record_type, line, self.name_edit.text()
+        )
 
     def remove_domain(self):
         """删除选中的域名及其DNS记录"""
@@ -246,6 +270,7 @@ class AccountDialog(ProtectedDialog):
             domain = self.domains_table.item(current_row, 0).text()
             subdomain = self.domains_table.item(current_row, 1).text()
             record_type = self.domains_table.cellWidget(current_row, 2).currentText()
+            line = self.domains_table.cellWidget(current_row, 3).currentText()
 
             reply = QMessageBox.question(
                 self,
@@ -261,17 +286,13 @@ class AccountDialog(ProtectedDialog):
                     secret_id = self.secret_id_edit.text()
                     secret_key = self.secret_key_edit.text()
 
-                    # 创建DNS客户端
-                    from tencentcloud.dnspod.v20210323 import dnspod_client
-                    from tencentcloud.common import credential
-
-                    cred = credential.Credential(secret_id, secret_key)
-                    client = dnspod_client.DnspodClient(cred, "")
+                    # 与更新使用同一客户端，删除请求发往相同的API地址
+                    client = self.parent().dns_updater.get_client(secret_id, secret_key)
 
                     # 使用事件循环删除记录
                     loop = asyncio.get_event_loop()
                     loop.run_until_complete(
-                        self.delete_dns_record_async(client, domain, subdomain, record_type)
+                        self.delete_dns_record_async(client, domain, subdomain, record_type, line)
                     )
 
                 except Exception as e:
@@ -2,11 +2,109 @@ import sys
 
 from PySide2.QtGui import QIcon
 from PySide2.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
-                               QLineEdit, QDateEdit, QTextEdit, QComboBox, QLabel)
-from PySide2.QtCore import Qt, QDate
+                               QLineEdit, QDateTimeEdit, QListView, QComboBox, QLabel, QCheckBox)
+from PySide2.QtCore import Qt, QDate, QTime, QDateTime, QThread, Signal, QAbstractListModel, QModelIndex
 import os
-import glob
-from datetime import datetime
+from datetime import timedelta
+
+from utils.log_search import SearchQuery, search_files
+
+# 每次向界面推送的结果行数
+RESULT_BATCH_SIZE = 500
+# 列表视图每次按需展示的行数
+RESULT_PAGE_SIZE = 1000
+
+
+class LogSearchWorker(QThread):
+    """后台搜索日志，分批推送结果"""
+    batch_found = Signal(list)
+    search_finished = Signal(int)
+
+    def __init__(self, log_files, query: SearchQuery, parent=None):
+        super().__init__(parent)
+        self.log_files = log_files
+        self.query = query
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        total = 0
+        batch = []
+        results = search_files(self.log_files, self.query)
+        while not self._cancelled:
+            try:
+                log_file, lines = next(results)
+            except StopIteration:
+                break
+            except Exception as e:
+                batch.append(f"搜索日志出错: {str(e)}")
+                break
+            file_name = os.path.basename(log_file)
+            # 确定日志来源标识
+            log_source = "服务" if file_name.startswith("service_") else "窗口"
+            for line in lines:
+                # 添加文件名标识到每行日志前
+                batch.append(f"[{log_source}] {line}")
+                if len(batch) >= RESULT_BATCH_SIZE:
+                    total += len(batch)
+                    self.batch_found.emit(batch)
+                    batch = []
+        results.close()
+        if batch:
+            total += len(batch)
+            self.batch_found.emit(batch)
+        self.search_finished.emit(total)
+
+
+class LogListModel(QAbstractListModel):
+    """日志结果模型，结果分页暴露给视图，滚动到底部时再加载下一页"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lines = []
+        self._visible = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._visible
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role == Qt.DisplayRole:
+            return self._lines[index.row()]
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self._lines = []
+        self._visible = 0
+        self.endResetModel()
+
+    def set_message(self, message: str):
+        self.clear()
+        self.append_lines([message])
+
+    def append_lines(self, lines):
+        self._lines.extend(lines)
+        # 首页未满时直接展示
+        if self._visible < RESULT_PAGE_SIZE:
+            self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._visible < len(self._lines)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(RESULT_PAGE_SIZE, len(self._lines) - self._visible)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._visible, self._visible + count - 1)
+        self._visible += count
+        self.endInsertRows()
+
+    def total(self) -> int:
+        return len(self._lines)
 
 
 class LogViewerDialog(QDialog):
@@ -14,6 +112,7 @@ class LogViewerDialog(QDialog):
         super().__init__(parent)
         self.setWindowTitle("日志查看器")
         self.resize(800, 600)
+        self.search_worker = None
         self.setup_ui()
         self.apply_theme()
         self.search_logs()
@@ -39,34 +138,48 @@ class LogViewerDialog(QDialog):
         search_layout.addWidget(QLabel("日志类型:"))
         search_layout.addWidget(self.log_type)
 
-        # 日期范围选择
-        self.start_date = QDateEdit()
-        self.start_date.setDate(QDate.currentDate())
-        self.end_date = QDateEdit()
-        self.end_date.setDate(QDate.currentDate())
+        # 日志级别选择
+        self.log_level = QComboBox()
+        self.log_level.addItems(["所有级别", "INFO", "WARNING", "ERROR"])
+        search_layout.addWidget(self.log_level)
+
+        # 时间范围选择
+        self.start_date = QDateTimeEdit(QDateTime(QDate.currentDate(), QTime(0, 0)))
+        self.start_date.setDisplayFormat("yyyy-MM-dd HH:mm")
+        self.end_date = QDateTimeEdit(QDateTime(QDate.currentDate(), QTime(23, 59)))
+        self.end_date.setDisplayFormat("yyyy-MM-dd HH:mm")
 
-        search_layout.addWidget(QLabel("开始日期:"))
+        search_layout.addWidget(QLabel("开始:"))
         search_layout.addWidget(self.start_date)
-        search_layout.addWidget(QLabel("结束日期:"))
+        search_layout.addWidget(QLabel("结束:"))
         search_layout.addWidget(self.end_date)
 
         # 关键字搜索
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("输入搜索关键字")
+        self.search_input.returnPressed.connect(self.search_logs)
         search_layout.addWidget(self.search_input)
+        self.regex_check = QCheckBox("正则")
+        search_layout.addWidget(self.regex_check)
 
         # 搜索按钮
-        search_btn = QPushButton("搜索")
-        search_btn.clicked.connect(self.search_logs)
-        search_layout.addWidget(search_btn)
+        self.search_btn = QPushButton("搜索")
+        self.search_btn.clicked.connect(self.search_logs)
+        search_layout.addWidget(self.search_btn)
 
         layout.addLayout(search_layout)
 
-        # 日志显示区域
-        self.log_display = QTextEdit()
-        self.log_display.setReadOnly(True)
+        # 日志显示区域，只渲染可见行
+        self.log_model = LogListModel(self)
+        self.log_display = QListView()
+        self.log_display.setModel(self.log_model)
+        self.log_display.setUniformItemSizes(True)
+        self.log_display.setSelectionMode(QListView.ExtendedSelection)
         layout.addWidget(self.log_display)
 
+        self.result_label = QLabel()
+        layout.addWidget(self.result_label)
+
         self.setLayout(layout)
 
     def apply_theme(self):
@@ -75,64 +188,87 @@ class LogViewerDialog(QDialog):
         else:
             self.parent().set_light_theme(self)
 
+    def get_log_dir(self):
+        # 获取日志目录
+        if getattr(sys, 'frozen', False):
+            base_dir = os.path.dirname(sys.executable)
+        else:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.join(base_dir, 'logs')
+
+    def collect_log_files(self, start_date, end_date, log_type):
+        """按日期收集日志文件，适配日志命名格式 window_YYYYMMDD.log 和 service_YYYYMMDD.log"""
+        log_dir = self.get_log_dir()
+        log_files = []
+
+        # 逐日遍历日期范围
+        current_date = start_date
+        while current_date <= end_date:
+            date_str = current_date.strftime("%Y%m%d")
+
+            # 根据选择的日志类型确定要搜索的文件
+            if log_type in ["所有日志", "窗口日志"]:
+                window_log = os.path.join(log_dir, f"window_{date_str}.log")
+                if os.path.exists(window_log):
+                    log_files.append(window_log)
+
+            if log_type in ["所有日志", "服务日志"]:
+                service_log = os.path.join(log_dir, f"service_{date_str}.log")
+                if os.path.exists(service_log):
+                    log_files.append(service_log)
+
+            # 移到下一天
+            current_date += timedelta(days=1)
+        return log_files
+
     def search_logs(self):
-        """按日期搜索日志函数，适配新的日志命名格式 window_YYYYMMDD.log 和 service_YYYYMMDD.log"""
+        """在后台线程中搜索日志，结果分批显示"""
         try:
-            keyword = self.search_input.text()
-            start_date = self.start_date.date().toPython()
-            end_date = self.end_date.date().toPython()
-            log_type = self.log_type.currentText()
-
-            # 获取日志目录
-            if getattr(sys, 'frozen', False):
-                base_dir = os.path.dirname(sys.executable)
-            else:
-                base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-            log_dir = os.path.join(base_dir, 'logs')
-            results = []
-
-            # 逐日遍历日期范围
-            current_date = start_date
-            while current_date <= end_date:
-                date_str = current_date.strftime("%Y%m%d")
-
-                # 根据选择的日志类型确定要搜索的文件
-                log_files_to_check = []
-
-                if log_type in ["所有日志", "窗口日志"]:
-                    window_log = os.path.join(log_dir, f"window_{date_str}.log")
-                    print(f"{window_log}")
-                    if os.path.exists(window_log):
-                        log_files_to_check.append(window_log)
-
-                if log_type in ["所有日志", "服务日志"]:
-                    service_log = os.path.join(log_dir, f"service_{date_str}.log")
-                    if os.path.exists(service_log):
-                        log_files_to_check.append(service_log)
-
-                # 搜索当天的日志文件
-                for log_file in log_files_to_check:
-                    try:
-                        with open(log_file, 'r', encoding='utf-8') as f:
-                            file_name = os.path.basename(log_file)
-                            # 确定日志来源标识
-                            log_source = "服务" if file_name.startswith("service_") else "窗口"
-                            for line in f:
-                                if keyword.lower() in line.lower():
-                                    # 添加文件名标识到每行日志前
-                                    results.append(f"[{log_source}] {line.strip()}")
-                    except Exception as e:
-                        results.append(f"Error reading {os.path.basename(log_file)}: {str(e)}")
-
-                # 移到下一天
-                current_date = current_date.replace(day=current_date.day + 1)
-
-            # 显示结果
-            if results:
-                self.log_display.setText('\n'.join(results))
-            else:
-                self.log_display.setText("未找到匹配的日志记录")
+            self.stop_search()
+
+            start = self.start_date.dateTime().toPython()
+            end = self.end_date.dateTime().toPython()
+            level = self.log_level.currentText()
+            query = SearchQuery(
+                keyword=self.search_input.text(),
+                regex=self.regex_check.isChecked(),
+                start_time=start.strftime("%Y-%m-%d %H:%M:00"),
+                end_time=end.strftime("%Y-%m-%d %H:%M:59"),
+                levels=None if level == "所有级别" else frozenset([level])
+            )
+            log_files = self.collect_log_files(start.date(), end.date(), self.log_type.currentText())
+
+            self.log_model.clear()
+            self.result_label.setText("正在搜索...")
+            self.search_worker = LogSearchWorker(log_files, query, self)
+            self.search_worker.batch_found.connect(self.on_batch_found)
+            self.search_worker.search_finished.connect(self.on_search_finished)
+            self.search_worker.start()
 
         except Exception as e:
-            self.log_display.setText(f"搜索日志时出错: {str(e)}")
+            self.log_model.set_message(f"搜索日志时出错: {str(e)}")
+
+    def on_batch_found(self, lines):
+        # 忽略已取消搜索残留的结果
+        if self.sender() is self.search_worker:
+            self.log_model.append_lines(lines)
+            self.result_label.setText(f"正在搜索... 已找到 {self.log_model.total()} 条")
+
+    def on_search_finished(self, total):
+        if self.sender() is not self.search_worker:
+            return
+        if total:
+            self.result_label.setText(f"共找到 {total} 条记录")
+        else:
+            self.log_model.set_message("未找到匹配的日志记录")
+            self.result_label.setText("")
+
+    def stop_search(self):
+        if self.search_worker and self.search_worker.isRunning():
+            self.search_worker.cancel()
+            self.search_worker.wait()
+        self.search_worker = None
+
+    def done(self, result):
+        self.stop_search()
+        super().done(result)
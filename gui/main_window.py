@@ -4,20 +4,20 @@ import sys
 from datetime import datetime
 from logging.handlers import TimedRotatingFileHandler
 import asyncio
+import time
 import win32service
 from PySide2.QtGui import QIcon, QPixmap, QPalette, QColor
 
 from PySide2.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                               QPushButton, QTableWidget, QTableWidgetItem, QMenuBar,
+                               QPushButton, QTableView, QLineEdit, QMenuBar, QAbstractItemView,
                                QStatusBar, QLabel, QMessageBox, QMenu, QSystemTrayIcon, QApplication, QDialog)
 from PySide2.QtCore import Qt, Signal, Slot, QThread, QEvent, QTimer
 
 from core.service_controller import ServiceController
-from .account_dialog import AccountDialog
-from .log_viewer import LogViewerDialog
-from .settings_dialog import SettingsDialog
+from .records_model import RecordsTableModel, RecordsFilterProxyModel
 from core.config_manager import ConfigManager
-from core.dns_updater import DNSUpdater
+from core.state_store import RecordStateStore
+from core.scheduler import DeadlineScheduler, MAX_SCHEDULER_WAIT
 from utils.validators import InputValidator
 from ctypes import windll, c_int, byref, sizeof, c_uint
 import platform
@@ -29,27 +29,43 @@ class UpdateThread(QThread):
     status_changed = Signal(str)  # 状态变化信号
     stopped = Signal()  # 添加停止信号
 
-    def __init__(self, dns_updater, accounts, interval):
+    def __init__(self, dns_updater, accounts, interval, retry_delay=60):
         super().__init__()
         self.dns_updater = dns_updater
         self.accounts = accounts
         self.interval = interval
         self.is_running = True
         self._loop = None
+        # 各记录按账号或记录自身的间隔分别到期，失败的记录 retry_delay 秒后重试
+        self.scheduler = DeadlineScheduler(retry_delay)
 
     def run(self):
         async def update():
             while self.is_running:
                 try:
-                    for account in self.accounts.values():
-                        if not self.is_running:
-                            return
-                        results = await self.dns_updater.update_records(account)
-                        self.update_finished.emit(results)
-
-                    if self.is_running:
-                        self.status_changed.emit(f"等待下次更新 ({self.interval}分钟)")
-                        await asyncio.sleep(self.interval * 60)
+                    # 账号配置可能在更新期间被编辑，每次调度前同步
+                    self.scheduler.sync(dict(self.accounts), self.interval)
+                    due = self.scheduler.pop_due()
+                    if due:
+                        # 本轮只获取一次公网IP，到期的记录共用
+                        ip_snapshot = await self.dns_updater.ip_resolver.resolve()
+                        # 各账号并发更新，每个账号完成后立即刷新界面
+                        reports = await self.dns_updater.update_all(
+                            due,
+                            ip_snapshot,
+                            lambda report: self.update_finished.emit(report.results)
+                        )
+                        self.scheduler.complete(due, [r for report in reports for r in report.results])
+                        next_due = self.scheduler.next_due()
+                        if self.is_running and next_due is not None:
+                            self.status_changed.emit(
+                                f"等待下次更新 ({time.strftime('%H:%M:%S', time.localtime(next_due))})"
+                            )
+
+                    next_due = self.scheduler.next_due()
+                    delay = MAX_SCHEDULER_WAIT if next_due is None else next_due - time.time()
+                    # 分段等待，系统休眠或时间调整后按实际时间重新计算
+                    await asyncio.sleep(min(MAX_SCHEDULER_WAIT, max(0.0, delay)))
                 except asyncio.CancelledError:
                     return
 
@@ -62,6 +78,11 @@ class UpdateThread(QThread):
             # 忽略事件循环停止的错误
             pass
         finally:
+            try:
+                # 关闭本线程事件循环内创建的网络会话
+                self._loop.run_until_complete(self.dns_updater.close())
+            except Exception:
+                pass
             self._loop.close()
             self.stopped.emit()
 
@@ -102,14 +123,24 @@ class MainWindow(QMainWindow):
         # 初始化日志系统
         self.setup_logging()
         self.config_manager = ConfigManager()
-        self.dns_updater = DNSUpdater()
         self.service_controller = ServiceController()
         self.update_thread = None
-        self.dns_updater = DNSUpdater(logger=self.logger)   # 向dns_update传入logger
+        self.state_store = RecordStateStore(logger=self.logger)
+        self.state_store.load()
+        # DNSUpdater 依赖腾讯云SDK、aiohttp等较重的模块，首次使用时再创建，加快窗口显示
+        self._dns_updater = None
         self.setup_ui()
         self.refresh_table()
         self.setup_tray_icon()
 
+    @property
+    def dns_updater(self):
+        if self._dns_updater is None:
+            from core.runner import create_dns_updater
+            # 向dns_update传入logger
+            self._dns_updater = create_dns_updater(self.config_manager, self.state_store, self.logger)
+        return self._dns_updater
+
     def setup_logging(self):
         """配置日志系统"""
         try:
@@ -192,12 +223,15 @@ class MainWindow(QMainWindow):
 
         layout.addLayout(toolbar)
 
-        # Records table
-        self.records_table = QTableWidget()
-        self.records_table.setColumnCount(6)
-        self.records_table.setHorizontalHeaderLabels([
-            "账号", "主域名", "子域名", "记录类型(AAAA=IPV6)", "当前IP", "状态"
-        ])
+        # Records table: 模型按记录键索引，更新结果只刷新变化的行
+        self.records_model = RecordsTableModel(self)
+        self.records_proxy = RecordsFilterProxyModel(self)
+        self.records_proxy.setSourceModel(self.records_model)
+        self.records_table = QTableView()
+        self.records_table.setModel(self.records_proxy)
+        self.records_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.records_table.setSortingEnabled(True)
+        self.records_table.verticalHeader().setVisible(False)
         # 设置固定宽度
         self.records_table.setColumnWidth(0, 80)  # 账号列宽100像素
         self.records_table.setColumnWidth(1, 100)  # 主域名列宽150像素
@@ -217,6 +251,13 @@ class MainWindow(QMainWindow):
         self.records_table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.records_table.customContextMenuRequested.connect(self.show_context_menu)
 
+        # 记录筛选
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("筛选记录")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.records_proxy.setFilterFixedString)
+        layout.addWidget(self.filter_input)
+
         layout.addWidget(self.records_table)
 
         # Status bar
@@ -254,6 +295,7 @@ class MainWindow(QMainWindow):
         self.theme_button.clicked.connect(self.toggle_theme)
 
     def show_log_viewer(self):
+        from .log_viewer import LogViewerDialog
         dialog = LogViewerDialog(self)
         dialog.exec_()
 
@@ -354,6 +396,7 @@ class MainWindow(QMainWindow):
     @Slot()
     def show_add_account_dialog(self):
         """显示添加账号对话框"""
+        from .account_dialog import AccountDialog
         dialog = AccountDialog(self)
         if dialog.exec_():  # 注意这里是exec_
             account_data = dialog.get_account_data()
@@ -370,7 +413,8 @@ class MainWindow(QMainWindow):
                 account_data['name'],
                 account_data['secret_id'],
                 account_data['secret_key'],
-                account_data['domains']  # 添加domains参数
+                account_data['domains'],  # 添加domains参数
+                account_data['update_interval']
             )
             # 保存配置
             self.config_manager.save_config()
@@ -395,11 +439,12 @@ class MainWindow(QMainWindow):
         self.stop_update_btn.setEnabled(True)
         self.status_bar.showMessage("正在更新DNS记录...")
 
-        interval = self.config_manager.global_settings.get('update_interval', 5)
+        settings = self.config_manager.global_settings
         self.update_thread = UpdateThread(
             self.dns_updater,
             self.config_manager.accounts,
-            interval
+            settings.get('update_interval', 5),
+            settings.get('failure_retry_interval', 60)
         )
         self.update_thread.update_finished.connect(self.update_table_with_results)
         self.update_thread.status_changed.connect(self.status_bar.showMessage)
@@ -423,64 +468,34 @@ class MainWindow(QMainWindow):
         self.status_bar.showMessage("已停止更新", 5000)
 
     def update_table_with_results(self, results):
-        """更新表格显示DNS更新结果"""
-        for row in range(self.records_table.rowCount()):
-            account = self.records_table.item(row, 0).text()
-            domain = self.records_table.item(row, 1).text()
-            subdomain = self.records_table.item(row, 2).text()
-
-            # 查找对应的结果
-            for result in results:
-                if (result.domain == domain and
-                        result.subdomain == subdomain):
-                    # 更新IP和状态
-                    self.records_table.setItem(
-                        row, 4,
-                        QTableWidgetItem(result.ip if result.success else "-")
-                    )
-                    status = "更新成功" if result.success else f"失败: {result.message}"
-                    self.records_table.setItem(row, 5, QTableWidgetItem(status))
-                    break
+        """更新表格显示DNS更新结果，只刷新结果有变化的行"""
+        self.records_model.apply_results(results)
 
     def refresh_table(self):
-        """刷新表格显示"""
-        self.records_table.setRowCount(0)
-        row = 0
-
-        for account_name, account in self.config_manager.accounts.items():
-            for domain, configs in account.domains.items():
-                for config in configs:
-                    self.records_table.insertRow(row)
-                    # 账号列设置为不可编辑
-                    account_item = QTableWidgetItem(account_name)
-                    account_item.setFlags(account_item.flags() & ~Qt.ItemIsEditable)
-                    self.records_table.setItem(row, 0, account_item)
-
-                    self.records_table.setItem(row, 1, QTableWidgetItem(domain))
-                    self.records_table.setItem(row, 2, QTableWidgetItem(config.subdomain))
-                    self.records_table.setItem(row, 3, QTableWidgetItem(config.record_type))
-                    self.records_table.setItem(row, 4, QTableWidgetItem("-"))
-                    status = "启用" if config.enabled else "禁用"
-                    self.records_table.setItem(row, 5, QTableWidgetItem(status))
-                    row += 1
+        """按账号配置刷新表格，保留未变化记录的IP和状态"""
+        self.records_model.set_accounts(self.config_manager.accounts)
+
+    def selected_account_name(self) -> str:
+        """返回当前选中行的账号名，未选中时返回空字符串"""
+        rows = self.records_table.selectionModel().selectedRows()
+        if not rows:
+            return ''
+        return self.records_proxy.source_row(rows[0]).account
 
     @Slot()
     def show_edit_account_dialog(self):
         # 获取当前选中的账号
-        selected_items = self.records_table.selectedItems()
-        if not selected_items:
+        account_name = self.selected_account_name()
+        if not account_name:
             QMessageBox.warning(self, "提示", "请先选择要编辑的账号")
             return
 
-        # 获取所选行的行号
-        row = selected_items[0].row()
-        # 获取该行第一列的账号名
-        account_name = self.records_table.item(row, 0).text()
         if account_name not in self.config_manager.accounts:
             QMessageBox.warning(self, "错误", "未找到选中的账号")
             return
 
         # 打开编辑对话框
+        from .account_dialog import AccountDialog
         dialog = AccountDialog(self)
         dialog.load_account_data(account_name, self.config_manager.accounts[account_name])
 
@@ -491,19 +506,32 @@ class MainWindow(QMainWindow):
                 account_name,
                 account_data['secret_id'],
                 account_data['secret_key'],
-                account_data['domains']
+                account_data['domains'],
+                account_data['update_interval']
             )
             self.refresh_table()
 
     @Slot()
     def show_settings_dialog(self):
         """显示设置对话框"""
+        from .settings_dialog import SettingsDialog
         dialog = SettingsDialog(self.config_manager, self)
         if dialog.exec():
             # 保存设置
             self.config_manager.save_config('config.enc')
-            # 如果服务正在运行，可能需要重启服务以应用新设置
-            if self.service_controller.is_service_running():
+            if not self.service_controller.is_service_running():
+                return
+            poll_interval = self.config_manager.global_settings.get('config_poll_interval', 5)
+            if poll_interval > 0:
+                # 服务会检测到配置文件变化并自动应用，无需重启
+                QMessageBox.information(
+                    self,
+                    "设置已保存",
+                    f"服务将在 {poll_interval:g} 秒内自动应用新设置。\n"
+                    "API并发数、网络变化监测和指标端点的修改需重启服务后生效。"
+                )
+            else:
+                # 已关闭配置文件检查，需重启服务以应用新设置
                 reply = QMessageBox.question(
                     self,
                     "重启服务",
@@ -521,11 +549,10 @@ class MainWindow(QMainWindow):
         delete_action = menu.addAction("删除账号")
 
         # 获取点击的行
-        item = self.records_table.itemAt(pos)
-        if item:
-            action = menu.exec_(self.records_table.mapToGlobal(pos))
-            row = item.row()
-            account_name = self.records_table.item(row, 0).text()
+        index = self.records_table.indexAt(pos)
+        if index.isValid():
+            action = menu.exec_(self.records_table.viewport().mapToGlobal(pos))
+            account_name = self.records_proxy.source_row(index).account
 
             if action == edit_action:
                 self.edit_account(account_name)
@@ -535,6 +562,7 @@ class MainWindow(QMainWindow):
     def edit_account(self, account_name):
         """编辑账号"""
         if account_name in self.config_manager.accounts:
+            from .account_dialog import AccountDialog
             dialog = AccountDialog(self)
             dialog.load_account_data(account_name, self.config_manager.accounts[account_name])
             if dialog.exec_():
@@ -543,17 +571,18 @@ class MainWindow(QMainWindow):
                     account_name,
                     account_data['secret_id'],
                     account_data['secret_key'],
-                    account_data['domains']
+                    account_data['domains'],
+                    account_data['update_interval']
                 )
                 self.refresh_table()
 
-    async def delete_account_records_async(self, client, account):
+    async def delete_account_records_async(self, client, account, account_name=''):
         """异步删除账号下所有记录"""
         for domain, configs in account.domains.items():
             for config in configs:
                 try:
                     await self.dns_updater.delete_dns_records(
-                        client, domain, config.subdomain, config.record_type
+                        client, domain, config.subdomain, config.record_type, config.line, account_name
                     )
                 except Exception as e:
                     self.logger.error(f"删除腾讯云域名记录时出错: {str(e)}")
@@ -571,16 +600,13 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.Yes:
             try:
                 account = self.config_manager.accounts[account_name]
-                # 创建DNS客户端
-                from tencentcloud.dnspod.v20210323 import dnspod_client
-                from tencentcloud.common import credential
-                cred = credential.Credential(account.secret_id, account.secret_key)
-                client = dnspod_client.DnspodClient(cred, "")
+                # 与更新使用同一客户端，删除请求发往相同的API地址
+                client = self.dns_updater.get_client(account.secret_id, account.secret_key)
 
                 # 使用事件循环删除所有记录
                 loop = asyncio.get_event_loop()
                 loop.run_until_complete(
-                    self.delete_account_records_async(client, account)
+                    self.delete_account_records_async(client, account, account_name)
                 )
 
             except Exception as e:
@@ -683,6 +709,12 @@ class MainWindow(QMainWindow):
                 )
 
     def quit_application(self):
+        # 停止更新线程，确保网络会话被关闭
+        if self.update_thread and self.update_thread.isRunning():
+            self.update_thread.stop()
+            self.update_thread.wait(5000)
+        if self._dns_updater is not None:
+            self._dns_updater.shutdown()
         self.tray_icon.hide()
         QApplication.quit()
 
@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from PySide2.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+from core.config_manager import AccountConfig
+
+COLUMNS = ["账号", "主域名", "子域名", "记录类型(AAAA=IPV6)", "当前IP", "状态"]
+IP_COLUMN = 4
+STATUS_COLUMN = 5
+
+# (账号, 主域名, 子域名, 记录类型, 线路)
+RecordKey = Tuple[str, str, str, str, str]
+
+
+@dataclass
+class RecordRow:
+    account: str
+    domain: str
+    subdomain: str
+    record_type: str
+    line: str
+    ip: str = "-"
+    status: str = ""
+
+    @property
+    def key(self) -> RecordKey:
+        return self.account, self.domain, self.subdomain, self.record_type, self.line
+
+    def value(self, column: int) -> str:
+        return (self.account, self.domain, self.subdomain, self.record_type, self.ip, self.status)[column]
+
+
+class RecordsTableModel(QAbstractTableModel):
+    """记录表格模型，按记录键建立行索引，更新结果只刷新变化的行"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[RecordRow] = []
+        self._index: Dict[RecordKey, int] = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self._rows[index.row()].value(index.column())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def row_at(self, row: int) -> RecordRow:
+        return self._rows[row]
+
+    def set_accounts(self, accounts: Dict[str, AccountConfig]):
+        """按账号配置重建行，保留仍存在记录的IP和更新状态"""
+        old_rows = {row.key: row for row in self._rows}
+        rows = []
+        for account_name, account in accounts.items():
+            for domain, configs in account.domains.items():
+                for config in configs:
+                    row = RecordRow(account_name, domain, config.subdomain, config.record_type, config.line)
+                    previous = old_rows.get(row.key)
+                    if previous and config.enabled:
+                        row.ip, row.status = previous.ip, previous.status
+                    else:
+                        row.status = "启用" if config.enabled else "禁用"
+                    rows.append(row)
+
+        self.beginResetModel()
+        self._rows = rows
+        self._index = {row.key: i for i, row in enumerate(rows)}
+        self.endResetModel()
+
+    def apply_results(self, results):
+        """按结果更新对应行，只对内容变化的行发出 dataChanged"""
+        for result in results:
+            key = (result.account, result.domain, result.subdomain, result.record_type, result.line)
+            row_number = self._index.get(key)
+            if row_number is None:
+                continue
+            row = self._rows[row_number]
+            ip = result.ip if result.success else "-"
+            status = "更新成功" if result.success else f"失败: {result.message}"
+            if row.ip == ip and row.status == status:
+                continue
+            row.ip, row.status = ip, status
+            self.dataChanged.emit(
+                self.index(row_number, IP_COLUMN),
+                self.index(row_number, STATUS_COLUMN),
+                [Qt.DisplayRole, Qt.ToolTipRole]
+            )
+
+
+class RecordsFilterProxyModel(QSortFilterProxyModel):
+    """记录表格排序和筛选，关键字匹配任意列"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setFilterKeyColumn(-1)
+        self.setSortCaseSensitivity(Qt.CaseInsensitive)
+
+    def source_row(self, proxy_index) -> RecordRow:
+        return self.sourceModel().row_at(self.mapToSource(proxy_index).row())
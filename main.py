@@ -1,10 +1,13 @@
+import os
 import sys
 
 from PySide2.QtWidgets import QApplication
-from PySide2.QtCore import QCoreApplication
-from gui.main_window import MainWindow
+from PySide2.QtCore import QCoreApplication, QTimer
 import logging
 
+# 冷启动导入耗时预算(毫秒)，用于 --import-report
+IMPORT_BUDGET_MS = 800
+
 
 def setup_application():
     # 设置应用程序基本信息
@@ -22,7 +25,24 @@ def setup_application():
     )
 
 
+def import_report():
+    # 以 -X importtime 重新启动自身，窗口显示后立即退出，输出导入耗时报告
+    from utils.import_report import run_report
+
+    budget = IMPORT_BUDGET_MS
+    args = ['--exit-after-start']
+    for arg in sys.argv[1:]:
+        if arg.startswith('--import-budget='):
+            budget = float(arg.split('=', 1)[1])
+        elif arg != '--import-report':
+            args.append(arg)
+    return run_report(os.path.abspath(__file__), args, budget)
+
+
 def main():
+    if '--import-report' in sys.argv:
+        sys.exit(import_report())
+
     setup_application()
 
     app = QApplication(sys.argv)
@@ -30,6 +50,9 @@ def main():
     # 设置应用程序样式
     app.setStyle('Fusion')
 
+    # 主窗口依赖较多模块，在 QApplication 创建后再导入
+    from gui.main_window import MainWindow
+
     # 创建并显示主窗口
     window = MainWindow()
 
@@ -45,6 +68,10 @@ def main():
     if start_update:
         window.update_records()
 
+    if "--exit-after-start" in sys.argv:
+        # 仅用于测量冷启动，事件循环开始后立即退出
+        QTimer.singleShot(0, app.quit)
+
     # sys.exit(app.exec())    # PySide6写法
     sys.exit(app.exec_())   # PySide2写法
 
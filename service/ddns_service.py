@@ -8,8 +8,6 @@ import servicemanager
 import asyncio
 import logging
 from logging.handlers import TimedRotatingFileHandler
-from core.config_manager import ConfigManager
-from core.dns_updater import DNSUpdater
 from loguru import logger
 
 
@@ -29,7 +27,8 @@ class DnsUpdateService(win32serviceutil.ServiceFramework):
     _svc_display_name_ = "Ddns_Manager自动更新域名解析服务"
     _svc_description_ = "自动更新动态IP到腾讯云域名解析DNS记录"
 
-    def get_app_path(self):
+    @staticmethod
+    def get_app_path():
         # 获取程序运行目录
         if getattr(sys, 'frozen', False):
             base_dir = os.path.dirname(sys.executable)
@@ -76,68 +75,43 @@ class DnsUpdateService(win32serviceutil.ServiceFramework):
         win32serviceutil.ServiceFramework.__init__(self, args)
         self.stop_event = win32event.CreateEvent(None, 0, 0, None)
 
-        # 初始化配置管理器时传入配置文件路径
-        config_file = os.path.join(self.get_app_path(), 'config.enc')
-        logging.info(f'配置文件路径: {config_file}')
-        self.config_manager = ConfigManager()
-        self.config_manager.load_config(config_file)
-
-        self.dns_updater = DNSUpdater()
-        self.running = True
-
         # 在服务实际运行前初始化日志系统
         self.logger = self.setup_logging()
+        # 配置和更新组件依赖较重的模块，在 SvcDoRun 中创建，使服务尽快响应启动请求
+        self.runner = None
+        self._stop_requested = False
 
-    async def update_all_records(self):
-        try:
-            accounts = self.config_manager.get_all_accounts()
-            self.logger.info(f'开始更新DNS记录，当前配置的账号数量: {len(accounts)}')
-
-            if len(accounts) < 1:
-                self.logger.info(f'当前配置的账号数量为: {len(accounts)}，跳出更新')
-                return
+    def create_runner(self):
+        from core.config_manager import ConfigManager
+        from core.state_store import RecordStateStore
+        from core.runner import UpdateRunner, create_dns_updater
 
-            for name, account in accounts.items():
-                self.logger.info(f'处理账号: {name}')
-                domain_count = sum(len(domains) for domains in account.domains.values())
-                self.logger.info(f'账号 {name} 配置的域名数量: {domain_count}')
+        # 初始化配置管理器时传入配置文件路径
+        config_file = os.path.join(self.get_app_path(), 'config.enc')
+        self.logger.info(f'配置文件路径: {config_file}')
+        self.config_manager = ConfigManager(config_file)
 
-                for domain, configs in account.domains.items():
-                    self.logger.info(f'处理域名: {domain}, 子域名数量: {len(configs)}')
-                    for config in configs:
-                        self.logger.info(f'更新记录: {config.subdomain}.{domain} ({config.record_type})')
+        # 加载上次成功应用的记录状态
+        self.state_store = RecordStateStore(os.path.join(self.get_app_path(), 'ddns_state.json'))
+        self.state_store.load()
 
-                results = await self.dns_updater.update_records(account)
-                for result in results:
-                    if result.success:
-                        self.logger.info(f"更新成功: {result.domain} - {result.subdomain} -> {result.ip}")
-                    else:
-                        self.logger.error(f"更新失败: {result.domain} - {result.subdomain}: {result.message}")
+        self.dns_updater = create_dns_updater(self.config_manager, self.state_store, self.logger)
+        return UpdateRunner(
+            self.config_manager,
+            self.dns_updater,
+            logger=self.logger,
+            metrics_file=self.get_metrics_file()
+        )
 
-        except Exception as e:
-            self.logger.error(f"更新过程发生错误: {str(e)}", exc_info=True)
-
-    async def run_service(self):
-        self.logger.info('服务开始运行')
-        while self.running:
-            try:
-                await self.update_all_records()
-                interval = self.config_manager.global_settings['update_interval']
-                self.logger.info(f'等待 {interval} 分钟后进行下一次更新')
-
-                # 分段检查停止信号
-                for _ in range(interval * 60):
-                    if not self.running:
-                        break
-                    await asyncio.sleep(1)
-
-            except Exception as e:
-                self.logger.error(f"服务运行错误: {str(e)}", exc_info=True)
-                await asyncio.sleep(60)
+    @classmethod
+    def get_metrics_file(cls):
+        return os.path.join(cls.get_app_path(), 'logs', 'metrics.prom')
 
     def SvcStop(self):
         self.logger.info('收到停止服务信号')
-        self.running = False
+        self._stop_requested = True
+        if self.runner:
+            self.runner.stop()
         self.ReportServiceStatus(win32service.SERVICE_STOP_PENDING)
         win32event.SetEvent(self.stop_event)
         self.logger.info('服务停止完成')
@@ -145,14 +119,26 @@ class DnsUpdateService(win32serviceutil.ServiceFramework):
     def SvcDoRun(self):
         try:
             self.logger.info('服务启动，日志系统初始化完成')
-            asyncio.run(self.run_service())
+            self.runner = self.create_runner()
+            if self._stop_requested:
+                return
+            self.logger.info('服务开始运行')
+            asyncio.run(self.runner.run())
         except Exception as e:
             self.logger.error(f'服务运行失败: {str(e)}', exc_info=True)
             raise
 
 
 if __name__ == '__main__':
-    if len(sys.argv) == 1:
+    if '--stats' in sys.argv:
+        # 输出服务最近一轮的指标快照
+        stats_file = DnsUpdateService.get_metrics_file()
+        if os.path.exists(stats_file):
+            with open(stats_file, 'r', encoding='utf-8') as f:
+                print(f.read())
+        else:
+            print(f'未找到指标文件: {stats_file}')
+    elif len(sys.argv) == 1:
         servicemanager.Initialize()
         servicemanager.PrepareToHostSingle(DnsUpdateService)
         servicemanager.StartServiceCtrlDispatcher()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from core.config_manager import ConfigManager
+from utils.encryption import default_key_provider
+
+
+class ReloadTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, 'config.enc')
+        env = mock.patch.dict(os.environ, {'DDNS_MACHINE_ID': 'test-machine'})
+        env.start()
+        self.addCleanup(env.stop)
+        default_key_provider.reset()
+        self.addCleanup(default_key_provider.reset)
+        # 界面进程写入配置，服务进程检测变化后重新加载
+        self.writer = ConfigManager(self.filename)
+        self.writer.add_account('keep', 'AKID1', 'key1', [self.domain('www')])
+        self.writer.add_account('edit', 'AKID2', 'key2', [self.domain('www')])
+        self.writer.add_account('drop', 'AKID3', 'key3', [self.domain('www')])
+        self.writer.global_settings['api_rate_limit'] = 5
+        self.writer.save_config()
+        self.reader = ConfigManager(self.filename)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    @staticmethod
+    def domain(subdomain: str) -> dict:
+        return {'domain': 'example.com', 'subdomain': subdomain, 'type': 'A', 'line': '默认', 'enabled': True}
+
+    def save(self):
+        self.writer.save_config()
+        # 同一秒内写入时大小也可能相同，清除签名以确保重新比较内容
+        self.reader._file_signature = None
+
+    def test_unchanged_file_is_not_reloaded(self):
+        self.assertIsNone(self.reader.reload_if_changed())
+
+    def test_account_diff(self):
+        self.writer.add_account('new', 'AKID4', 'key4', [self.domain('www')])
+        self.writer.update_account('edit', 'AKID2', 'key2', [self.domain('www'), self.domain('api')])
+        del self.writer.accounts['drop']
+        self.save()
+        accounts = self.reader.accounts
+        change = self.reader.reload_if_changed()
+        self.assertEqual(change.added, ['new'])
+        self.assertEqual(change.changed, ['edit'])
+        self.assertEqual(change.removed, ['drop'])
+        self.assertEqual(change.settings, [])
+        self.assertEqual(change.affected_accounts, ['new', 'edit'])
+        # 就地更新，持有该对象的组件看到新配置
+        self.assertIs(self.reader.accounts, accounts)
+        self.assertEqual(len(self.reader.accounts['edit'].domains['example.com']), 2)
+
+    def test_settings_diff(self):
+        settings = self.reader.global_settings
+        self.writer.global_settings['batch_threshold'] = 0
+        self.save()
+        change = self.reader.reload_if_changed()
+        self.assertEqual(change.settings, ['batch_threshold'])
+        self.assertIs(self.reader.global_settings, settings)
+        self.assertEqual(settings['batch_threshold'], 0)
+
+    def test_removed_setting_resets_to_default(self):
+        del self.writer.global_settings['api_rate_limit']
+        self.save()
+        change = self.reader.reload_if_changed()
+        self.assertEqual(change.settings, ['api_rate_limit'])
+        self.assertEqual(self.reader.global_settings['api_rate_limit'], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,241 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from bench import BenchSettings
+from bench.mock_dnspod import MockDnspodServer
+from core.config_manager import AccountConfig, DomainConfig
+from core import dns_updater
+from core.dns_updater import DNSUpdater
+from core.ip_resolver import IPSnapshot
+from core.retry import RetryPolicy
+from core.state_store import RecordStateStore
+
+IPV4 = '198.51.100.1'
+IPV6 = '2001:db8::1'
+
+
+def make_account(*configs: DomainConfig, domain: str = 'example.com') -> AccountConfig:
+    return AccountConfig(secret_id='AKIDtest', secret_key='key', domains={domain: list(configs)})
+
+
+class MockDnspodTestCase(unittest.IsolatedAsyncioTestCase):
+    """在本地模拟 DNSPod API 上运行 DNSUpdater"""
+
+    batch_threshold = 3
+    # 为False时不记录状态，每轮都与云端核对
+    use_state_store = True
+
+    def setUp(self):
+        self.server = MockDnspodServer().start()
+        self.dir = tempfile.TemporaryDirectory()
+        self.state_store = RecordStateStore(os.path.join(self.dir.name, 'ddns_state.json'))
+        self.updater = DNSUpdater(
+            logger=logging.getLogger('test'),
+            config_manager=BenchSettings(),
+            state_store=self.state_store if self.use_state_store else None,
+            account_timeout=0,
+            retry_policy=RetryPolicy(base_delay=0.01),
+            batch_threshold=self.batch_threshold,
+            api_endpoint=self.server.endpoint
+        )
+        self.client = self.updater.get_client('AKIDtest', 'key')
+
+    async def asyncTearDown(self):
+        await self.updater.close()
+
+    def tearDown(self):
+        self.updater.shutdown()
+        self.server.stop()
+        self.dir.cleanup()
+
+    def seed(self, name: str, record_type: str, value: str, line: str = '默认', domain: str = 'example.com') -> int:
+        """直接在模拟服务中创建记录，返回记录ID"""
+        record = {'Domain': domain, 'SubDomain': name, 'RecordType': record_type, 'RecordLine': line, 'Value': value}
+        return self.server.store.create_record(record)['RecordId']
+
+    def records(self, domain: str = 'example.com') -> list:
+        return sorted(
+            (r['Name'], r['Type'], r['Line'], r['Value']) for r in self.server.store._zones.get(domain, [])
+        )
+
+    def calls(self) -> dict:
+        """上次调用以来服务端收到的各接口调用次数"""
+        return self.server.store.stats()['calls']
+
+    async def update(self, accounts: dict, ipv4: str = IPV4, ipv6: str = IPV6) -> list:
+        reports = await self.updater.update_all(accounts, IPSnapshot(ipv4=ipv4, ipv6=ipv6))
+        return [result for report in reports for result in report.results]
+
+
+class RecordStateTest(MockDnspodTestCase):
+    async def test_unchanged_ip_skips_api_calls(self):
+        accounts = {'acc': make_account(DomainConfig('www', 'A', '默认'))}
+        self.assertTrue(all(r.success for r in await self.update(accounts)))
+        self.calls()
+        results = await self.update(accounts)
+        self.assertEqual(results[0].message, 'IP未变化，跳过')
+        self.assertEqual(self.calls(), {})
+
+    async def test_deleted_record_is_recreated(self):
+        accounts = {'acc': make_account(DomainConfig('www', 'A', '默认'))}
+        await self.update(accounts)
+        await self.updater.delete_dns_records(self.client, 'example.com', 'www', 'A', '默认', 'acc')
+        self.assertEqual(self.records(), [])
+        results = await self.update(accounts)
+        self.assertTrue(results[0].success)
+        self.assertEqual(self.records(), [('www', 'A', '默认', IPV4)])
+
+    async def test_prune_state_drops_removed_records(self):
+        accounts = {'acc': make_account(DomainConfig('www', 'A', '默认'), DomainConfig('api', 'A', '默认'))}
+        await self.update(accounts)
+        self.updater.prune_state({'acc': make_account(DomainConfig('www', 'A', '默认'))})
+        self.assertIsNotNone(self.state_store.get(RecordStateStore.make_key('acc', 'example.com', 'www', 'A', '默认')))
+        self.assertIsNone(self.state_store.get(RecordStateStore.make_key('acc', 'example.com', 'api', 'A', '默认')))
+
+
+class ZoneQueryTest(MockDnspodTestCase):
+    use_state_store = False
+
+    async def test_one_record_list_query_per_domain(self):
+        configs = [DomainConfig(f'r{i}', 'A', '默认') for i in range(4)]
+        accounts = {'acc': AccountConfig('AKIDtest', 'key', {'a.example.com': configs, 'b.example.com': configs})}
+        self.assertTrue(all(r.success for r in await self.update(accounts)))
+        self.assertEqual(self.calls(), {'DescribeRecordList': 2, 'CreateRecord': 8})
+        self.assertTrue(all(r.success for r in await self.update(accounts)))
+        self.assertEqual(self.calls(), {'DescribeRecordList': 2})
+
+    async def test_record_list_is_paged(self):
+        for i in range(5):
+            self.seed(f'r{i}', 'A', '192.0.2.1')
+        accounts = {'acc': make_account(*(DomainConfig(f'r{i}', 'A', '默认') for i in range(5)))}
+        with mock.patch.object(dns_updater, 'RECORD_LIST_PAGE_SIZE', 2):
+            results = await self.update(accounts)
+        calls = self.calls()
+        self.assertTrue(all(r.success for r in results))
+        self.assertEqual(calls['DescribeRecordList'], 3)
+        self.assertNotIn('CreateRecord', calls)
+        self.assertEqual({value for *_, value in self.records()}, {IPV4})
+
+
+class BatchModifyTest(MockDnspodTestCase):
+    use_state_store = False
+
+    def setUp(self):
+        super().setUp()
+        self.record_ids = [self.seed(f'r{i}', 'A', '192.0.2.1') for i in range(3)]
+        self.accounts = {'acc': make_account(*(DomainConfig(f'r{i}', 'A', '默认') for i in range(3)))}
+        self.calls()
+
+    def intercept(self, action: str, rewrite):
+        """改写模拟服务对某个接口的响应"""
+        handle = self.server.handle
+
+        def handler(name, secret_id, params):
+            response = handle(name, secret_id, params)
+            return rewrite(response) if name == action else response
+
+        self.server.handle = handler
+
+    async def test_batch_at_threshold(self):
+        results = await self.update(self.accounts)
+        self.assertEqual(self.calls(), {'DescribeRecordList': 1, 'ModifyRecordBatch': 1, 'DescribeBatchTask': 1})
+        self.assertEqual({r.message for r in results}, {'记录更新成功(批量)'})
+        self.assertEqual({value for *_, value in self.records()}, {IPV4})
+
+    async def test_single_updates_below_threshold(self):
+        self.updater.batch_threshold = 4
+        results = await self.update(self.accounts)
+        self.assertEqual(self.calls(), {'DescribeRecordList': 1, 'ModifyRecord': 3})
+        self.assertTrue(all(r.success for r in results))
+
+    async def test_failed_batch_falls_back_to_single_updates(self):
+        self.intercept('ModifyRecordBatch', lambda response: {
+            'Error': {'Code': 'FailedOperation', 'Message': '批量任务创建失败。'},
+            'RequestId': response['RequestId']
+        })
+        results = await self.update(self.accounts)
+        calls = self.calls()
+        self.assertEqual(calls['ModifyRecord'], 3)
+        self.assertNotIn('DescribeBatchTask', calls)
+        self.assertEqual({r.message for r in results}, {'记录更新成功'})
+        self.assertEqual({value for *_, value in self.records()}, {IPV4})
+
+    async def test_records_failed_in_batch_are_retried_singly(self):
+        def fail_first(response):
+            for detail in response.get('DetailList', []):
+                for record in detail['RecordList']:
+                    if record['RecordId'] == self.record_ids[0]:
+                        record['Status'] = 'fail'
+            return response
+
+        self.intercept('DescribeBatchTask', fail_first)
+        results = await self.update(self.accounts)
+        self.assertEqual(self.calls()['ModifyRecord'], 1)
+        self.assertEqual(
+            [r.message for r in results], ['记录更新成功', '记录更新成功(批量)', '记录更新成功(批量)']
+        )
+
+
+class RecordLineTest(MockDnspodTestCase):
+    use_state_store = False
+
+    async def test_records_are_matched_per_line(self):
+        for line in ('默认', '电信', '联通'):
+            self.seed('www', 'A', '192.0.2.1', line)
+        accounts = {'acc': make_account(DomainConfig('www', 'A', '默认'), DomainConfig('www', 'A', '电信'))}
+        self.calls()
+        results = await self.update(accounts)
+        self.assertTrue(all(r.success for r in results))
+        self.assertEqual(self.calls(), {'DescribeRecordList': 1, 'ModifyRecord': 2})
+        self.assertEqual(self.records(), [
+            ('www', 'A', '电信', IPV4), ('www', 'A', '联通', '192.0.2.1'), ('www', 'A', '默认', IPV4)
+        ])
+
+    async def test_missing_line_is_created(self):
+        self.seed('www', 'A', IPV4, '默认')
+        accounts = {'acc': make_account(DomainConfig('www', 'A', '电信'))}
+        self.calls()
+        results = await self.update(accounts)
+        self.assertEqual((results[0].line, results[0].message), ('电信', '创建记录成功'))
+        self.assertEqual(self.calls(), {'DescribeRecordList': 1, 'CreateRecord': 1})
+        self.assertEqual(self.records(), [('www', 'A', '电信', IPV4), ('www', 'A', '默认', IPV4)])
+
+
+class RecordTypeTest(MockDnspodTestCase):
+    use_state_store = False
+
+    async def test_a_and_aaaa_need_no_writes_in_steady_state(self):
+        self.seed('www', 'A', IPV4)
+        self.seed('www', 'AAAA', IPV6)
+        accounts = {'acc': make_account(DomainConfig('www', 'A', '默认'), DomainConfig('www', 'AAAA', '默认'))}
+        self.calls()
+        for _ in range(2):
+            results = await self.update(accounts)
+            self.assertEqual([r.message for r in results], ['记录是最新的', '记录是最新的'])
+            self.assertEqual(self.calls(), {'DescribeRecordList': 1})
+
+    async def test_other_type_is_not_replaced(self):
+        self.seed('www', 'A', IPV4)
+        accounts = {'acc': make_account(DomainConfig('www', 'AAAA', '默认'))}
+        self.calls()
+        results = await self.update(accounts)
+        self.assertTrue(results[0].success)
+        self.assertEqual(self.calls(), {'DescribeRecordList': 1, 'CreateRecord': 1})
+        self.assertEqual(self.records(), [('www', 'A', '默认', IPV4), ('www', 'AAAA', '默认', IPV6)])
+
+    async def test_cname_conflict_is_reported(self):
+        self.seed('www', 'CNAME', 'target.example.net.')
+        accounts = {'acc': make_account(DomainConfig('www', 'A', '默认'))}
+        self.calls()
+        results = await self.update(accounts)
+        self.assertFalse(results[0].success)
+        self.assertIn('CNAME', results[0].message)
+        self.assertEqual(self.calls(), {'DescribeRecordList': 1})
+        self.assertEqual(self.records(), [('www', 'CNAME', '默认', 'target.example.net.')])
+
+
+if __name__ == '__main__':
+    unittest.main()
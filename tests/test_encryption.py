@@ -0,0 +1,43 @@
+import unittest
+
+from cryptography.fernet import InvalidToken
+
+from utils.encryption import EncryptionHandler, MachineKeyProvider
+
+
+class MachineKeyProviderTest(unittest.TestCase):
+    def test_key_is_generated_once(self):
+        calls = []
+
+        def source():
+            calls.append(1)
+            return 'machine-1'
+
+        provider = MachineKeyProvider([source])
+        self.assertEqual(provider.get_key(), provider.get_key())
+        self.assertEqual(len(calls), 1)
+        provider.reset()
+        provider.get_key()
+        self.assertEqual(len(calls), 2)
+
+    def test_falls_through_failing_and_empty_sources(self):
+        def broken():
+            raise OSError('wmic not found')
+
+        provider = MachineKeyProvider([broken, lambda: None, lambda: 'machine-1'])
+        self.assertEqual(provider.get_key(), MachineKeyProvider([lambda: 'machine-1']).get_key())
+
+    def test_no_source_raises(self):
+        with self.assertRaises(RuntimeError):
+            MachineKeyProvider([lambda: None]).get_key()
+
+    def test_key_depends_on_machine(self):
+        provider = MachineKeyProvider([lambda: 'machine-1'])
+        encrypted = EncryptionHandler(provider).encrypt('{"accounts": {}}')
+        self.assertEqual(EncryptionHandler(provider).decrypt(encrypted), '{"accounts": {}}')
+        with self.assertRaises(InvalidToken):
+            EncryptionHandler(MachineKeyProvider([lambda: 'machine-2'])).decrypt(encrypted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from utils.import_report import format_report, parse_import_times, total_import_ms
+
+OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        420 | io
+import time:      1000 |       1000 |     core.metrics
+import time:       500 |       1500 |   core.runner
+import time:       200 |       1700 | core
+some other stderr line
+"""
+
+
+class ImportReportTest(unittest.TestCase):
+    def test_parse(self):
+        records = parse_import_times(OUTPUT)
+        self.assertEqual([r.name for r in records], ['_io', 'io', 'core.metrics', 'core.runner', 'core'])
+        self.assertEqual([r.depth for r in records], [1, 0, 2, 1, 0])
+        self.assertEqual(records[3].self_us, 500)
+        self.assertEqual(records[3].cumulative_us, 1500)
+
+    def test_total_counts_top_level_only(self):
+        self.assertEqual(total_import_ms(parse_import_times(OUTPUT)), 2.12)
+
+    def test_format_budget(self):
+        records = parse_import_times(OUTPUT)
+        self.assertIn('预算 5 ms，未超出预算', format_report(records, budget_ms=5))
+        self.assertIn('预算 1 ms，超出预算', format_report(records, budget_ms=1))
+        report = format_report(records, top=1)
+        self.assertIn('core', report)
+        self.assertNotIn('_io', report)
+
+
+if __name__ == '__main__':
+    unittest.main()
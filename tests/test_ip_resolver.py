@@ -0,0 +1,96 @@
+import logging
+import time
+import unittest
+
+from bench import BenchSettings
+from bench.mock_ip_source import MockIPSourceGroup, SourceSpec
+from core.ip_resolver import IPResolver
+
+LIAR_IP = '203.0.113.99'
+
+
+class IPResolverTest(unittest.IsolatedAsyncioTestCase):
+    """在本地模拟IP源上获取IPv4"""
+
+    def start_sources(self, *specs: str) -> MockIPSourceGroup:
+        group = MockIPSourceGroup([SourceSpec.parse(spec) for spec in specs]).start()
+        self.addCleanup(group.stop)
+        return group
+
+    def make_resolver(self, group: MockIPSourceGroup, **settings) -> IPResolver:
+        defaults = {
+            'ip_sources': group.urls,
+            'ip_resolve_strategy': 'race',
+            'ip_race_fanout': 3,
+            'ip_quorum': 2,
+            'ip_source_timeout': 5,
+            'ip_resolve_budget': 15,
+            'ip_cache_ttl': 0,
+        }
+        defaults.update(settings)
+        resolver = IPResolver(logger=logging.getLogger('test'), config=BenchSettings(defaults))
+        self.resolvers.append(resolver)
+        return resolver
+
+    async def asyncSetUp(self):
+        self.resolvers = []
+
+    async def asyncTearDown(self):
+        for resolver in self.resolvers:
+            await resolver.close()
+
+    async def timed(self, resolver: IPResolver):
+        start = time.perf_counter()
+        ip = await resolver.get_ipv4()
+        return ip, time.perf_counter() - start
+
+    async def test_race_does_not_wait_for_slow_or_dead_sources(self):
+        group = self.start_sources('fast:delay=0.02', 'slow:delay=3', 'dead:hang=1')
+        ip, elapsed = await self.timed(self.make_resolver(group))
+        self.assertEqual(ip, group.ip)
+        self.assertLess(elapsed, 2)
+
+    async def test_race_skips_invalid_and_refused_sources(self):
+        group = self.start_sources('junk:body=<html>busy</html>', 'gone:refuse=1', 'flaky:fail=1', 'fast')
+        # 每次只请求一个源，失败后补上下一个
+        ip = await self.make_resolver(group, ip_race_fanout=1).get_ipv4()
+        self.assertEqual(ip, group.ip)
+
+    async def test_sequential(self):
+        group = self.start_sources('gone:refuse=1', 'fast')
+        ip = await self.make_resolver(group, ip_resolve_strategy='sequential').get_ipv4()
+        self.assertEqual(ip, group.ip)
+        self.assertEqual(group.sources[1].hits, 1)
+
+    async def test_quorum_rejects_single_wrong_source(self):
+        group = self.start_sources(f'liar:body={LIAR_IP}', 'a:delay=0.1', 'b:delay=0.1')
+        resolver = self.make_resolver(group, ip_resolve_strategy='quorum')
+        self.assertEqual(await resolver.get_ipv4(), group.ip)
+        # 与上次相同的IP只需一个源确认
+        group.sources[2].spec.hang = True
+        self.assertEqual(await resolver.get_ipv4(), group.ip)
+
+    async def test_quorum_without_agreement_fails(self):
+        group = self.start_sources(f'liar:body={LIAR_IP}', 'honest')
+        resolver = self.make_resolver(group, ip_resolve_strategy='quorum')
+        self.assertIsNone(await resolver.get_ipv4())
+
+    async def test_budget_limits_total_time(self):
+        group = self.start_sources('dead1:hang=1', 'dead2:hang=1')
+        ip, elapsed = await self.timed(self.make_resolver(group, ip_resolve_budget=0.5))
+        self.assertIsNone(ip)
+        self.assertLess(elapsed, 2)
+
+    async def test_result_is_cached(self):
+        group = self.start_sources('fast')
+        resolver = self.make_resolver(group, ip_cache_ttl=30)
+        self.assertEqual(await resolver.get_ipv4(), group.ip)
+        group.ip = '198.51.100.2'
+        self.assertEqual(await resolver.get_ipv4(), '198.51.100.1')
+        self.assertEqual(group.sources[0].hits, 1)
+        resolver.invalidate_cache()
+        self.assertEqual(await resolver.get_ipv4(), '198.51.100.2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import log_search
+from utils.log_search import SearchQuery, get_index, scan_file, search_files
+
+LINES = [
+    '2024-05-01 10:00:00 | INFO | 开始更新DNS记录',
+    '2024-05-01 10:00:01 | ERROR | 更新记录失败: Timeout',
+    'Traceback (most recent call last):',
+    '2024-05-01 10:05:00| PID:123 | WARNING | API调用触发频率限制',
+    '2024-05-01 10:10:00 | INFO | 更新完成 www.example.com',
+]
+
+
+class LogSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'ddns.log')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(LINES) + '\n')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_keyword_is_case_insensitive(self):
+        self.assertEqual(scan_file(self.path, SearchQuery('timeout')), [LINES[1]])
+        self.assertEqual(scan_file(self.path, SearchQuery('WWW.EXAMPLE')), [LINES[4]])
+
+    def test_non_ascii_keyword(self):
+        self.assertEqual(scan_file(self.path, SearchQuery('频率限制')), [LINES[3]])
+
+    def test_regex(self):
+        self.assertEqual(scan_file(self.path, SearchQuery(r'更新\w*完成', regex=True)), [LINES[4]])
+
+    def test_level_filter_applies_to_continuation_lines(self):
+        query = SearchQuery(levels=frozenset({'ERROR'}))
+        self.assertEqual(scan_file(self.path, query), LINES[1:3])
+
+    def test_time_range(self):
+        query = SearchQuery(start_time='2024-05-01 10:01:00', end_time='2024-05-01 10:06:00')
+        self.assertEqual(scan_file(self.path, query), [LINES[3]])
+
+    def test_appended_lines_are_indexed(self):
+        scan_file(self.path, SearchQuery('更新'))
+        line = '2024-05-01 10:15:00 | INFO | 更新完成 api.example.com'
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+        self.assertEqual(scan_file(self.path, SearchQuery('api.example')), [line])
+
+    def write(self, lines):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def test_long_traceback_keeps_block_time_range(self):
+        traceback = [f'  File "core/dns_updater.py", line {i}, in _update_domain' for i in range(300)]
+        self.write([
+            '2024-05-01 10:00:00 | INFO | 开始更新DNS记录',
+            '2024-05-01 10:30:00 | ERROR | 更新记录失败: Timeout',
+            *traceback,
+        ])
+        self.assertEqual(len(get_index(self.path).blocks), 1)
+        query = SearchQuery('Timeout', start_time='2024-05-01 10:15:00')
+        self.assertEqual(scan_file(self.path, query), ['2024-05-01 10:30:00 | ERROR | 更新记录失败: Timeout'])
+
+    def test_continuation_lines_across_blocks(self):
+        traceback = [f'  File "core/dns_updater.py", line {i}, in _update_domain' for i in range(20)]
+        lines = [f'2024-05-01 10:00:{i:02d} | INFO | 处理记录 r{i}' for i in range(5)]
+        lines += ['2024-05-01 10:01:00 | ERROR | 更新记录失败: Timeout', *traceback]
+        lines += [f'2024-05-01 10:02:{i:02d} | INFO | 更新完成 r{i}' for i in range(5)]
+        self.write(lines)
+        with mock.patch.object(log_search, 'BLOCK_SIZE', 400):
+            blocks = get_index(self.path).blocks
+            self.assertGreater(len(blocks), 2)
+            self.assertEqual(scan_file(self.path, SearchQuery(levels=frozenset({'ERROR'}))), lines[5:26])
+            query = SearchQuery('line 19', end_time='2024-05-01 10:01:30')
+            self.assertEqual(scan_file(self.path, query), [traceback[19]])
+
+    def test_search_files_keeps_order(self):
+        empty = os.path.join(self.dir.name, 'empty.log')
+        open(empty, 'w').close()
+        results = list(search_files([empty, self.path], SearchQuery('timeout')))
+        self.assertEqual(results, [(empty, []), (self.path, [LINES[1]])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from core import metrics
+from core.metrics import Counter, Histogram, MetricsRegistry
+
+
+class CounterTest(unittest.TestCase):
+    def test_values_per_label_set(self):
+        counter = Counter('ddns_test_total', '测试')
+        counter.inc(result='success')
+        counter.inc(2, result='success')
+        counter.inc(result='failure')
+        self.assertEqual(counter.value(result='success'), 3)
+        self.assertEqual(counter.value(result='skipped'), 0)
+        self.assertEqual(counter.render().splitlines(), [
+            '# HELP ddns_test_total 测试',
+            '# TYPE ddns_test_total counter',
+            'ddns_test_total{result="failure"} 1',
+            'ddns_test_total{result="success"} 3',
+        ])
+
+    def test_label_values_are_escaped(self):
+        counter = Counter('ddns_test_total', '测试')
+        counter.inc(source='http://a/"b"\\\n')
+        self.assertIn('ddns_test_total{source="http://a/\\"b\\"\\\\\\n"} 1', counter.render())
+
+
+class HistogramTest(unittest.TestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram('ddns_test_seconds', '测试', buckets=(0.1, 1))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, phase='total')
+        self.assertEqual(histogram.count(phase='total'), 3)
+        lines = histogram.render().splitlines()
+        self.assertIn('ddns_test_seconds_bucket{phase="total",le="0.1"} 1', lines)
+        self.assertIn('ddns_test_seconds_bucket{phase="total",le="1"} 2', lines)
+        self.assertIn('ddns_test_seconds_bucket{phase="total",le="+Inf"} 3', lines)
+        self.assertIn('ddns_test_seconds_sum{phase="total"} 5.550000', lines)
+        self.assertIn('ddns_test_seconds_count{phase="total"} 3', lines)
+
+    def test_time_context_manager(self):
+        histogram = Histogram('ddns_test_seconds', '测试')
+        with self.assertRaises(ValueError):
+            with histogram.time(phase='ip_resolve'):
+                raise ValueError()
+        self.assertEqual(histogram.count(phase='ip_resolve'), 1)
+
+
+class RegistryTest(unittest.TestCase):
+    def test_metrics_are_registered_once(self):
+        registry = MetricsRegistry()
+        self.assertIs(registry.counter('a_total', 'a'), registry.counter('a_total', 'a'))
+
+    def test_write_textfile(self):
+        registry = MetricsRegistry()
+        registry.counter('a_total', 'a').inc()
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'metrics.prom')
+            registry.write_textfile(filename)
+            with open(filename, encoding='utf-8') as f:
+                self.assertEqual(f.read(), registry.render())
+
+
+class MetricsServerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_serves_registry(self):
+        metrics.RECORD_RESULTS.inc(result='success')
+        server = await metrics.start_metrics_server('127.0.0.1', 0)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        response = (await reader.read()).decode('utf-8')
+        writer.close()
+        self.assertTrue(response.startswith('HTTP/1.1 200 OK'))
+        self.assertIn('ddns_record_results_total{result="success"}', response)
+
+
+if __name__ == '__main__':
+    unittest.main()
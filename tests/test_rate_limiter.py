@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import unittest
+
+from core.rate_limiter import PRIORITY_READ, PRIORITY_WRITE, RateLimiter, TokenBucket
+
+
+class TokenBucketTest(unittest.IsolatedAsyncioTestCase):
+    async def test_writes_are_served_before_queued_reads(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        await bucket.acquire()
+        order = []
+
+        async def acquire(name, priority):
+            await bucket.acquire(priority)
+            order.append(name)
+
+        tasks = [asyncio.create_task(acquire('read1', PRIORITY_READ)),
+                 asyncio.create_task(acquire('read2', PRIORITY_READ))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(acquire('write', PRIORITY_WRITE)))
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+        self.assertEqual(order, ['write', 'read1', 'read2'])
+
+    async def test_cancelled_waiter_is_skipped(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        await bucket.acquire()
+        cancelled = asyncio.create_task(bucket.acquire(PRIORITY_WRITE))
+        waiting = asyncio.create_task(bucket.acquire(PRIORITY_READ))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.wait_for(waiting, 5)
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(bucket._waiters, [])
+
+    async def test_throttle_halves_rate_once_per_second(self):
+        bucket = TokenBucket(rate=8, capacity=8, min_rate=1)
+        bucket.on_throttled()
+        bucket.on_throttled()
+        self.assertEqual(bucket.rate, 4)
+        self.assertEqual(bucket._tokens, 0)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_buckets_are_separate_per_event_loop(self):
+        limiter = RateLimiter(rate=5, burst=1)
+        buckets = {}
+
+        async def acquire(name):
+            await limiter.acquire('AKID')
+            buckets[name] = limiter.bucket('AKID')
+
+        thread = threading.Thread(target=lambda: asyncio.run(acquire('thread')))
+        thread.start()
+        thread.join()
+        asyncio.run(acquire('main'))
+        self.assertIsNot(buckets['thread'], buckets['main'])
+
+    def test_configure_updates_existing_buckets(self):
+        limiter = RateLimiter(rate=10, burst=10)
+
+        async def bucket():
+            await limiter.acquire('AKID')
+            return limiter.bucket('AKID')
+
+        async def run():
+            current = await bucket()
+            limiter.configure(4, 2)
+            return current
+
+        current = asyncio.run(run())
+        self.assertEqual((current.base_rate, current.rate, current.capacity), (4, 4, 2))
+        limiter.configure(0, 0)
+        self.assertFalse(limiter.enabled)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+
+from core.retry import FATAL, RETRYABLE, THROTTLED, RetryPolicy, classify_error
+
+
+class SdkError(Exception):
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+
+class ClassifyErrorTest(unittest.TestCase):
+    def test_sdk_codes(self):
+        self.assertEqual(classify_error(SdkError('RequestLimitExceeded.UinLimitExceeded')), THROTTLED)
+        self.assertEqual(classify_error(SdkError('InternalError')), RETRYABLE)
+        self.assertEqual(classify_error(SdkError('ClientNetworkError')), RETRYABLE)
+        self.assertEqual(classify_error(SdkError('AuthFailure.SignatureFailure')), FATAL)
+
+    def test_plain_exceptions(self):
+        self.assertEqual(classify_error(ConnectionResetError()), RETRYABLE)
+        self.assertEqual(classify_error(TimeoutError()), RETRYABLE)
+        self.assertEqual(classify_error(ValueError()), FATAL)
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_backoff_is_capped(self):
+        policy = RetryPolicy(base_delay=0.5, max_delay=2)
+        for attempt in range(8):
+            self.assertLessEqual(policy.backoff(attempt), min(2, 0.5 * 2 ** attempt))
+
+    def test_cycle_budget(self):
+        policy = RetryPolicy(budget=30)
+        self.assertFalse(RetryPolicy.in_cycle())
+        self.assertEqual(RetryPolicy.remaining(), float('inf'))
+        token = policy.start_cycle()
+        try:
+            self.assertTrue(RetryPolicy.in_cycle())
+            self.assertTrue(29 < RetryPolicy.remaining() <= 30)
+        finally:
+            RetryPolicy.end_cycle(token)
+        self.assertFalse(RetryPolicy.in_cycle())
+
+    def test_budget_is_inherited_by_tasks(self):
+        policy = RetryPolicy(budget=10)
+
+        async def run():
+            token = policy.start_cycle()
+            try:
+                return await asyncio.create_task(asyncio.sleep(0, RetryPolicy.remaining()))
+            finally:
+                RetryPolicy.end_cycle(token)
+
+        self.assertLessEqual(asyncio.run(run()), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+from types import SimpleNamespace
+
+from core.config_manager import AccountConfig, DomainConfig
+from core.scheduler import COALESCE_WINDOW, DeadlineScheduler, resolve_interval
+
+# 本地时间的整点，5分钟间隔的记录在此时刻到期
+BASE = DeadlineScheduler.align(1_700_000_000, 3600)
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_accounts(update_interval: int = 5, other_interval: int = 0) -> dict:
+    configs = [DomainConfig('www', 'A', '默认', update_interval=update_interval)]
+    if other_interval:
+        configs.append(DomainConfig('api', 'A', '默认', update_interval=other_interval))
+    return {'acc': AccountConfig(secret_id='AKIDtest', secret_key='key', domains={'example.com': configs})}
+
+
+def result(success: bool = True, subdomain: str = 'www'):
+    return SimpleNamespace(
+        account='acc', domain='example.com', subdomain=subdomain, record_type='A', line='默认', success=success
+    )
+
+
+def subdomains(accounts: dict) -> list:
+    return [config.subdomain for account in accounts.values() for configs in account.domains.values()
+            for config in configs]
+
+
+class ResolveIntervalTest(unittest.TestCase):
+    def test_record_overrides_account_and_global(self):
+        account = AccountConfig('id', 'key', {}, update_interval=3)
+        self.assertEqual(resolve_interval(account, DomainConfig('www', 'A', '默认', update_interval=2), 10), 120)
+        self.assertEqual(resolve_interval(account, DomainConfig('www', 'A', '默认'), 10), 180)
+        account.update_interval = 0
+        self.assertEqual(resolve_interval(account, DomainConfig('www', 'A', '默认'), 10), 600)
+
+    def test_minimum_one_minute(self):
+        account = AccountConfig('id', 'key', {})
+        self.assertEqual(resolve_interval(account, DomainConfig('www', 'A', '默认'), 0.1), 60)
+
+
+class DeadlineSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(BASE - 290)
+        self.scheduler = DeadlineScheduler(retry_delay=60, clock=self.clock)
+        self.scheduler.sync(make_accounts(), default_minutes=10)
+        # 首轮立即到期，完成后对齐到 BASE
+        due = self.scheduler.pop_due()
+        self.scheduler.complete(due, [result()])
+        self.assertEqual(self.scheduler.next_due(), BASE)
+
+    def test_align_is_strictly_after_now(self):
+        self.assertEqual(DeadlineScheduler.align(BASE, 300), BASE + 300)
+        self.assertEqual(DeadlineScheduler.align(BASE - 0.5, 300), BASE)
+        self.assertEqual(DeadlineScheduler.align(BASE + 299, 300), BASE + 300)
+
+    def test_nothing_due_before_deadline(self):
+        self.clock.now = BASE - COALESCE_WINDOW - 0.5
+        self.assertEqual(self.scheduler.pop_due(), {})
+        self.assertEqual(self.scheduler.next_due(), BASE)
+
+    def test_coalesces_records_due_within_window(self):
+        self.scheduler.sync(make_accounts(update_interval=5, other_interval=10), default_minutes=10)
+        # 新记录立即到期，与 BASE 到期的记录不在同一窗口
+        due = self.scheduler.pop_due()
+        self.assertEqual(subdomains(due), ['api'])
+        self.scheduler.complete(due, [result(subdomain='api')])
+        self.assertEqual(self.scheduler.next_due(), BASE)
+        # 两条记录在 BASE 同时到期，合并为一轮
+        self.clock.now = BASE
+        due = self.scheduler.pop_due()
+        self.assertEqual(subdomains(due), ['www', 'api'])
+        self.assertIsNone(self.scheduler.next_due())
+        self.scheduler.complete(due, [result(subdomain='www'), result(subdomain='api')])
+        self.assertEqual(self.scheduler.next_due(), BASE + 300)
+        self.clock.now = BASE + 300
+        self.assertEqual(subdomains(self.scheduler.pop_due()), ['www'])
+
+    def test_completion_does_not_drift(self):
+        self.clock.now = BASE
+        due = self.scheduler.pop_due()
+        # 本轮耗时不影响下次到期时间
+        self.clock.now = BASE + 42
+        self.scheduler.complete(due, [result()])
+        self.assertEqual(self.scheduler.next_due(), BASE + 300)
+
+    def test_failed_and_missing_results_retry(self):
+        self.clock.now = BASE
+        due = self.scheduler.pop_due()
+        self.scheduler.complete(due, [result(success=False)])
+        self.assertEqual(self.scheduler.next_due(), BASE + 60)
+        self.clock.now = BASE + 60
+        due = self.scheduler.pop_due()
+        self.scheduler.complete(due, [])
+        self.assertEqual(self.scheduler.next_due(), BASE + 120)
+
+    def test_mark_due(self):
+        self.scheduler.mark_due(['other'])
+        self.assertEqual(self.scheduler.next_due(), BASE)
+        self.scheduler.mark_due()
+        self.assertEqual(self.scheduler.next_due(), self.clock.now)
+
+    def test_sync_realigns_changed_interval_and_drops_removed(self):
+        self.scheduler.sync(make_accounts(update_interval=1), default_minutes=10)
+        self.assertEqual(self.scheduler.next_due(), DeadlineScheduler.align(self.clock.now, 60))
+        self.scheduler.sync({}, default_minutes=10)
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertIsNone(self.scheduler.next_due())
+
+    def test_entry_reset_during_update_is_not_overwritten(self):
+        self.clock.now = BASE
+        due = self.scheduler.pop_due()
+        # 更新期间配置重新加载，未完成的记录重新到期
+        self.scheduler.sync(make_accounts(), default_minutes=10)
+        self.scheduler.complete(due, [result()])
+        self.assertEqual(self.scheduler.next_due(), BASE)
+
+    def test_early_pop_does_not_reschedule_same_boundary(self):
+        self.clock.now = BASE - 0.3
+        due = self.scheduler.pop_due()
+        self.assertIn('acc', due)
+        self.clock.now = BASE - 0.1
+        self.scheduler.complete(due, [result()])
+        self.assertEqual(self.scheduler.next_due(), BASE + 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from core.state_store import RecordStateStore
+
+
+class RecordStateStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.dir.name, 'ddns_state.json')
+        self.key = RecordStateStore.make_key('acc', 'example.com', 'www', 'A', '默认')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_save_and_load(self):
+        store = RecordStateStore(self.filename)
+        store.put(self.key, '1.2.3.4', 42)
+        store.save()
+        loaded = RecordStateStore(self.filename)
+        loaded.load()
+        state = loaded.get(self.key)
+        self.assertEqual((state.value, state.record_id), ('1.2.3.4', 42))
+
+    def test_is_fresh(self):
+        store = RecordStateStore(self.filename)
+        store.put(self.key, '1.2.3.4', 42)
+        self.assertTrue(store.is_fresh(self.key, '1.2.3.4', 60))
+        self.assertFalse(store.is_fresh(self.key, '5.6.7.8', 60))
+        self.assertFalse(store.is_fresh(self.key, '1.2.3.4', 0))
+        store.discard(self.key)
+        self.assertFalse(store.is_fresh(self.key, '1.2.3.4', 60))
+
+    def test_retain(self):
+        other = RecordStateStore.make_key('acc', 'example.com', 'api', 'A', '默认')
+        store = RecordStateStore(self.filename)
+        store.put(self.key, '1.2.3.4', 42)
+        store.put(other, '1.2.3.4', 43)
+        store.retain([self.key])
+        self.assertIsNotNone(store.get(self.key))
+        self.assertIsNone(store.get(other))
+
+    def test_corrupt_file_starts_empty(self):
+        with open(self.filename, 'w', encoding='utf-8') as f:
+            f.write('{not json')
+        store = RecordStateStore(self.filename)
+        store.load()
+        self.assertIsNone(store.get(self.key))
+
+    def test_anonymous_account_hides_secret_id(self):
+        name = RecordStateStore.anonymous_account('AKIDsecret')
+        self.assertNotIn('AKIDsecret', name)
+        self.assertEqual(name, RecordStateStore.anonymous_account('AKIDsecret'))
+        self.assertNotEqual(name, RecordStateStore.anonymous_account('AKIDother'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,30 +1,97 @@
 from cryptography.fernet import Fernet
 import base64
 import hashlib
+import logging
+import os
 import subprocess
+import threading
 import json
+from typing import Callable, List, Optional
 
 
-class EncryptionHandler:
-    def __init__(self):
-        self._key = self._generate_machine_key()
-        self._cipher = Fernet(self._key)
+def env_machine_id() -> Optional[str]:
+    """从环境变量 DDNS_MACHINE_ID 读取机器码，便于测试和无wmic的环境"""
+    return os.environ.get('DDNS_MACHINE_ID') or None
+
+
+def wmic_machine_id() -> Optional[str]:
+    """通过 wmic 获取主板UUID(仅Windows)"""
+    if os.name != 'nt':
+        return None
+    # 使用无窗口方式获取机器码
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = subprocess.SW_HIDE
+
+    # 获取机器唯一标识
+    cmd = 'wmic csproduct get uuid'
+    uuid = subprocess.check_output(cmd, startupinfo=startupinfo).decode('utf-8').strip()
+    return uuid.split('\n')[1].strip()
+
+
+def file_machine_id() -> Optional[str]:
+    """从文件读取机器码，路径可通过环境变量 DDNS_MACHINE_ID_FILE 指定"""
+    candidates = [os.environ.get('DDNS_MACHINE_ID_FILE'), '/etc/machine-id', '/var/lib/dbus/machine-id']
+    for path in candidates:
+        if path and os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                machine_id = f.read().strip()
+            if machine_id:
+                return machine_id
+    return None
+
+
+class MachineKeyProvider:
+    """按顺序尝试各个机器码来源生成密钥，结果在进程内缓存"""
+
+    def __init__(self, sources: Optional[List[Callable[[], Optional[str]]]] = None):
+        self.sources = sources if sources is not None else [env_machine_id, wmic_machine_id, file_machine_id]
+        self._key: Optional[bytes] = None
+        self._lock = threading.Lock()
 
-    def _generate_machine_key(self):
+    def get_key(self) -> bytes:
+        if self._key is None:
+            with self._lock:
+                if self._key is None:
+                    self._key = self._generate_key()
+        return self._key
+
+    def reset(self):
+        """清除缓存的密钥，下次获取时重新生成"""
+        with self._lock:
+            self._key = None
+
+    def _generate_key(self) -> bytes:
         """基于机器特征生成加密密钥"""
-        # 使用无窗口方式获取机器码
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        startupinfo.wShowWindow = subprocess.SW_HIDE
+        errors = []
+        for source in self.sources:
+            try:
+                machine_id = source()
+            except Exception as e:
+                errors.append(f"{source.__name__}: {str(e)}")
+                continue
+            if machine_id:
+                # 生成密钥
+                key = hashlib.sha256(machine_id.encode()).digest()[:32]
+                return base64.urlsafe_b64encode(key)
+        for error in errors:
+            logging.warning(f"获取机器码失败 {error}")
+        raise RuntimeError("无法获取机器码，可设置环境变量 DDNS_MACHINE_ID")
+
+
+# 进程内共享的默认密钥来源
+default_key_provider = MachineKeyProvider()
+
 
-        # 获取机器唯一标识
-        cmd = 'wmic csproduct get uuid'
-        uuid = subprocess.check_output(cmd, startupinfo=startupinfo).decode('utf-8').strip()
-        uuid = uuid.split('\n')[1].strip()
+def get_machine_key() -> bytes:
+    """获取进程内共享的机器密钥"""
+    return default_key_provider.get_key()
 
-        # 生成密钥
-        key = hashlib.sha256(uuid.encode()).digest()[:32]
-        return base64.urlsafe_b64encode(key)
+
+class EncryptionHandler:
+    def __init__(self, key_provider: Optional[MachineKeyProvider] = None):
+        self._key = (key_provider or default_key_provider).get_key()
+        self._cipher = Fernet(self._key)
 
     def encrypt(self, data: str) -> str:
         """加密数据"""
@@ -33,4 +100,3 @@ class EncryptionHandler:
     def decrypt(self, encrypted_data: str) -> str:
         """解密数据"""
         return self._cipher.decrypt(encrypted_data.encode()).decode()
-
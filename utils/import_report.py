@@ -0,0 +1,79 @@
+"""启动导入耗时报告
+
+以 ``python -X importtime`` 运行目标脚本，解析其输出并列出累计耗时最多的模块，
+用于测量冷启动并检查是否超出预算。打包后的程序无法使用 -X 参数，仅支持源码运行。
+"""
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import List
+
+# -X importtime 输出行: "import time:   self [us] | cumulative | imported package"
+IMPORT_TIME_PATTERN = re.compile(r'^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S.*)$')
+# 默认列出的模块数
+DEFAULT_TOP = 25
+
+
+@dataclass
+class ImportRecord:
+    name: str           # 模块名
+    self_us: int        # 模块自身导入耗时(微秒)
+    cumulative_us: int  # 含子模块的累计耗时(微秒)
+    depth: int          # 导入层级，0 表示由脚本直接导入
+
+
+def parse_import_times(output: str) -> List[ImportRecord]:
+    records = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        # 顶层模块前有一个空格，之后每层缩进两个空格
+        records.append(ImportRecord(
+            name=name.strip(),
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            depth=max(0, (len(indent) - 1) // 2)
+        ))
+    return records
+
+
+def total_import_ms(records: List[ImportRecord]) -> float:
+    """顶层模块累计耗时之和，即全部导入耗时"""
+    return sum(r.cumulative_us for r in records if r.depth == 0) / 1000
+
+
+def format_report(records: List[ImportRecord], budget_ms: float = 0, top: int = DEFAULT_TOP) -> str:
+    total = total_import_ms(records)
+    lines = [f'{"累计(ms)":>10} {"自身(ms)":>10}  模块']
+    for record in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+        lines.append(
+            f'{record.cumulative_us / 1000:>10.1f} {record.self_us / 1000:>10.1f}  '
+            f'{"  " * record.depth}{record.name}'
+        )
+    lines.append(f'导入模块 {len(records)} 个，总耗时 {total:.1f} ms')
+    if budget_ms:
+        verdict = '未超出' if total <= budget_ms else '超出'
+        lines.append(f'预算 {budget_ms:g} ms，{verdict}预算')
+    return '\n'.join(lines)
+
+
+def run_report(script: str, args: List[str], budget_ms: float = 0, top: int = DEFAULT_TOP) -> int:
+    """在子进程中以 -X importtime 运行脚本并输出报告，超出预算时返回1"""
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', script, *args],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        encoding='utf-8',
+        errors='replace'
+    )
+    records = parse_import_times(process.stderr)
+    if not records:
+        print('未获取到导入耗时数据')
+        return 1
+    print(format_report(records, budget_ms, top))
+    if process.returncode:
+        print(f'目标进程退出码: {process.returncode}')
+    return 1 if budget_ms and total_import_ms(records) > budget_ms else 0
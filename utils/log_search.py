@@ -0,0 +1,298 @@
+import mmap
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+# 兼容窗口日志 "时间 | 级别 | 内容" 与服务日志 "时间| PID:xx | 级别 | 内容" 两种格式
+LINE_PATTERN = re.compile(rb'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s*\|(?:\s*PID:\d+\s*\|)?\s*([A-Z]+)\s*\|')
+# 行首日志头(用于在整块数据中查找)
+HEADER_SEARCH = re.compile(rb'(?m)^' + LINE_PATTERN.pattern)
+# 每个索引块的大致字节数，块边界对齐到行尾
+BLOCK_SIZE = 64 * 1024
+# 各日志级别在行中的标记，两种格式中级别前都是 "| "
+LEVEL_MARKERS = {
+    name: b'| ' + name.encode() + b' '
+    for name in ('TRACE', 'DEBUG', 'INFO', 'SUCCESS', 'WARNING', 'ERROR', 'CRITICAL')
+}
+# 续行(如异常堆栈)向前查找所属日志头的最大行数
+CONTEXT_LOOKBACK_LINES = 64
+# 忽略大小写的字面量搜索时，每次转小写处理的字节数
+LOWER_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+@dataclass
+class IndexBlock:
+    offset: int                 # 块起始字节偏移
+    end: int                    # 块结束字节偏移
+    first_time: str             # 块内第一条日志时间，无日志头时为空
+    last_time: str              # 块内最后一条日志时间
+    levels: FrozenSet[str]      # 块内出现过的日志级别
+    last_level: str = ''        # 块内最后一条日志的级别，下一块开头的续行沿用
+
+
+class LogIndex:
+    """单个日志文件的轻量索引：按块记录字节偏移、时间范围和日志级别
+
+    日志只会追加写入，文件变大时只索引新增部分；文件变小或被替换时重建。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.blocks: List[IndexBlock] = []
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            size = os.path.getsize(self.path)
+            if size < self._size:
+                self.blocks = []
+                self._size = 0
+            if size == self._size:
+                return
+            # 最后一块可能未写满，从它的起点重新索引
+            if self.blocks:
+                self._size = self.blocks.pop().offset
+            self._index_from(self._size)
+
+    def _index_from(self, offset: int):
+        with open(self.path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # 空文件无法映射
+                return
+            with mm:
+                size = len(mm)
+                # 上一块最后一条日志的时间和级别
+                prev_time, prev_level = (self.blocks[-1].last_time, self.blocks[-1].last_level) \
+                    if self.blocks else ('', '')
+                while offset < size:
+                    end = min(offset + BLOCK_SIZE, size)
+                    if end < size:
+                        newline = mm.find(b'\n', end)
+                        end = size if newline < 0 else newline + 1
+                    chunk = mm[offset:end]
+                    first = HEADER_SEARCH.search(chunk)
+                    last = _last_header(chunk)
+                    levels = {name for name, marker in LEVEL_MARKERS.items() if marker in chunk}
+                    first_time = first.group(1).decode() if first else ''
+                    if first is None or first.start() > 0:
+                        # 块以上一块最后一条日志的续行(如异常堆栈)开头，续行沿用其时间和级别
+                        first_time = prev_time or first_time
+                        if prev_level:
+                            levels.add(prev_level)
+                    if last:
+                        prev_time, prev_level = last.group(1).decode(), last.group(2).decode()
+                    self.blocks.append(IndexBlock(offset, end, first_time, prev_time, frozenset(levels), prev_level))
+                    offset = end
+        self._size = offset
+
+    def select(
+            self,
+            start_time: Optional[str] = None,
+            end_time: Optional[str] = None,
+            levels: Optional[FrozenSet[str]] = None
+    ) -> List[Tuple[int, int]]:
+        """返回可能包含匹配日志的字节区间(相邻块已合并)"""
+        ranges: List[Tuple[int, int]] = []
+        for block in self.blocks:
+            if block.last_time:
+                if start_time and block.last_time < start_time:
+                    continue
+                if end_time and block.first_time > end_time:
+                    continue
+            if levels and block.levels and not (block.levels & levels):
+                continue
+            if ranges and ranges[-1][1] == block.offset:
+                ranges[-1] = (ranges[-1][0], block.end)
+            else:
+                ranges.append((block.offset, block.end))
+        return ranges
+
+
+def _last_header(chunk: bytes) -> Optional['re.Match']:
+    """块内最后一个日志头，从块尾逐行向前查找"""
+    pos = len(chunk)
+    while pos > 0:
+        line_start = chunk.rfind(b'\n', 0, pos - 1) + 1
+        match = LINE_PATTERN.match(chunk, line_start)
+        if match:
+            return match
+        pos = line_start
+    return None
+
+
+_indexes: Dict[str, LogIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(path: str) -> LogIndex:
+    """获取(并增量更新)文件索引，索引在进程内缓存"""
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = LogIndex(path)
+    index.refresh()
+    return index
+
+
+@dataclass
+class SearchQuery:
+    keyword: str = ''
+    regex: bool = False                     # keyword 按正则表达式匹配
+    start_time: Optional[str] = None        # 'YYYY-MM-DD HH:MM:SS'
+    end_time: Optional[str] = None
+    levels: Optional[FrozenSet[str]] = None
+
+    def compile(self) -> Optional['re.Pattern']:
+        """编译为忽略大小写的字节正则，无关键字时返回None"""
+        if not self.keyword:
+            return None
+        keyword = self.keyword.encode('utf-8')
+        return re.compile(keyword if self.regex else re.escape(keyword), re.IGNORECASE)
+
+
+class _LowerFinder:
+    """在映射区上做忽略大小写的字面量查找：分块转小写后用 bytes.find 查找，比 re.IGNORECASE 快得多"""
+
+    def __init__(self, mm, keyword: bytes):
+        self.mm = mm
+        self.keyword = keyword.lower()
+        self._chunk_start = 0
+        self._chunk_end = -1
+        self._chunk = b''
+
+    def search(self, pos: int, end: int) -> Optional[Tuple[int, int]]:
+        size = len(self.keyword)
+        while pos + size <= end:
+            if not (self._chunk_start <= pos and pos + size <= self._chunk_end):
+                # 相邻块重叠 keyword 长度，避免漏掉跨块命中
+                self._chunk_start = pos
+                self._chunk_end = min(end, pos + max(LOWER_CHUNK_SIZE, size))
+                self._chunk = self.mm[self._chunk_start:self._chunk_end].lower()
+            index = self._chunk.find(self.keyword, pos - self._chunk_start)
+            if index >= 0:
+                start = self._chunk_start + index
+                return start, start + size
+            if self._chunk_end >= end:
+                return None
+            pos = self._chunk_end - size + 1
+        return None
+
+
+def _make_finder(mm, query: SearchQuery, pattern):
+    """返回 finder(pos, end) -> (命中起点, 命中终点) 或 None"""
+    keyword = query.keyword.encode('utf-8')
+    if query.regex:
+        def find_regex(pos, end):
+            match = pattern.search(mm, pos, end)
+            return match.span() if match else None
+        return find_regex
+    if keyword.lower() == keyword.upper():
+        # 不含英文字母(如纯中文、数字)，直接在映射区上查找
+        def find_plain(pos, end):
+            index = mm.find(keyword, pos, end)
+            return (index, index + len(keyword)) if index >= 0 else None
+        return find_plain
+    return _LowerFinder(mm, keyword).search
+
+
+def _line_header(mm, line_start: int, floor: int) -> Tuple[str, str]:
+    """返回行所属日志头的 (时间, 级别)，续行向前查找最近的日志头"""
+    pos = line_start
+    for _ in range(CONTEXT_LOOKBACK_LINES):
+        match = LINE_PATTERN.match(mm, pos)
+        if match:
+            return match.group(1).decode(), match.group(2).decode()
+        if pos <= floor:
+            break
+        pos = mm.rfind(b'\n', floor, pos - 1) + 1
+        pos = max(pos, floor)
+    return '', ''
+
+
+def _accept(query: SearchQuery, current_time: str, level: str) -> bool:
+    if current_time:
+        if query.start_time and current_time < query.start_time:
+            return False
+        if query.end_time and current_time > query.end_time:
+            return False
+    if query.levels and level and level not in query.levels:
+        return False
+    return True
+
+
+def _decode(line: bytes) -> str:
+    return line.decode('utf-8', errors='replace').rstrip('\r\n')
+
+
+def scan_file(path: str, query: SearchQuery, pattern: Optional['re.Pattern'] = None) -> List[str]:
+    """内存映射日志文件，在索引选出的字节区间内直接搜索原始字节"""
+    index = get_index(path)
+    if pattern is None:
+        pattern = query.compile()
+    results: List[str] = []
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            return results
+        with mm:
+            size = len(mm)
+            finder = _make_finder(mm, query, pattern) if pattern is not None else None
+            for offset, end in index.select(query.start_time, query.end_time, query.levels):
+                end = min(end, size)
+                if pattern is None:
+                    # 无关键字: 按行遍历区间，顺带跟踪日志头
+                    current_time, level = _line_header(mm, offset, 0)
+                    pos = offset
+                    while pos < end:
+                        line_end = mm.find(b'\n', pos, end)
+                        line_end = end if line_end < 0 else line_end + 1
+                        match = LINE_PATTERN.match(mm, pos)
+                        if match:
+                            current_time, level = match.group(1).decode(), match.group(2).decode()
+                        if _accept(query, current_time, level):
+                            results.append(_decode(mm[pos:line_end]))
+                        pos = line_end
+                    continue
+
+                # 有关键字: 直接在映射区上查找命中位置，再扩展到整行
+                pos = offset
+                while pos < end:
+                    hit = finder(pos, end)
+                    if not hit:
+                        break
+                    line_start = mm.rfind(b'\n', offset, hit[0]) + 1
+                    line_start = max(line_start, offset)
+                    line_end = mm.find(b'\n', hit[1], end)
+                    line_end = end if line_end < 0 else line_end + 1
+                    current_time, level = _line_header(mm, line_start, 0)
+                    if _accept(query, current_time, level):
+                        results.append(_decode(mm[line_start:line_end]))
+                    pos = line_end
+    return results
+
+
+def search_files(
+        paths: List[str],
+        query: SearchQuery,
+        max_workers: Optional[int] = None
+) -> Iterator[Tuple[str, List[str]]]:
+    """在线程池中并行扫描多个文件，按文件顺序逐个返回 (文件, 匹配行)"""
+    if not paths:
+        return
+    pattern = query.compile()
+    executor = ThreadPoolExecutor(max_workers=max_workers or min(8, len(paths)), thread_name_prefix='log-scan')
+    try:
+        futures = [executor.submit(scan_file, path, query, pattern) for path in paths]
+        for path, future in zip(paths, futures):
+            yield path, future.result()
+    finally:
+        # 调用方提前停止迭代时取消尚未开始的扫描
+        executor.shutdown(wait=False, cancel_futures=True)
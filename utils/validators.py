@@ -2,12 +2,14 @@ import re
 from typing import Tuple, Optional
 import ipaddress
 from core.config_manager import ConfigManager
-from PySide2.QtWidgets import QMessageBox
 
 
 class InputValidator:
     @staticmethod
     def check_accounts_valid(config_manager: ConfigManager, parent=None) -> bool:
+        # 仅界面调用此方法，延迟导入避免无界面环境加载 Qt
+        from PySide2.QtWidgets import QMessageBox
+
         accounts = config_manager.get_all_accounts()
         if not accounts:
             QMessageBox.warning(